@@ -0,0 +1,244 @@
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+from .orm_models import RecommendationLogORM, RecommendationRollupORM
+
+# Hourly buckets are only needed for the edges of a range; daily buckets are kept forever
+ROLLUP_HOURLY_RETENTION_DAYS = int(os.getenv("ROLLUP_HOURLY_RETENTION_DAYS", "35"))  # 0 = forever
+
+DIMENSIONS = ("job_family", "job_level", "use_case", "volume")
+ROLLUP = RecommendationRollupORM.__table__
+
+
+class HourlyResolutionUnavailable(ValueError):
+    """
+    Raised for an hourly series reaching back past the hourly retention window;
+    the API maps it to 400.
+    """
+
+    def __init__(self, hourly_from: datetime):
+        super().__init__(
+            f"Hourly resolution unavailable before {hourly_from.isoformat()}; use interval=day or a later start"
+        )
+        self.hourly_from = hourly_from
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def _floor_hour(ts: datetime) -> datetime:
+    return _utc(ts).replace(minute=0, second=0, microsecond=0)
+
+
+def _ceil_hour(ts: datetime) -> datetime:
+    floor = _floor_hour(ts)
+    return floor if floor == _utc(ts) else floor + timedelta(hours=1)
+
+
+def _floor_day(ts: datetime) -> datetime:
+    return _floor_hour(ts).replace(hour=0)
+
+
+def _ceil_day(ts: datetime) -> datetime:
+    floor = _floor_day(ts)
+    return floor if floor == _utc(ts) else floor + timedelta(days=1)
+
+
+def rollup_counts(rows: Iterable[Dict[str, Any]]) -> Counter:
+    """
+    Aggregate log rows (as written by `LogStorage`) into per-bucket counts.
+    """
+    counts: Counter = Counter()
+    for row in rows:
+        hour = _floor_hour(row["timestamp"])
+        buckets = (("hour", hour), ("day", hour.replace(hour=0)))
+        keys = [("total", "")] + [(dim, row.get(dim) or "") for dim in DIMENSIONS]
+        products = {p.get("product_id") for p in row.get("products_json") or []}
+        keys += [("product", pid) for pid in sorted(products) if pid]
+        for granularity, bucket in buckets:
+            for dim, value in keys:
+                counts[(granularity, dim, bucket, value)] += 1
+    return counts
+
+
+def apply_rollups(conn: Connection, counts: Counter):
+    """
+    Add `counts` to the rollup table with one batched upsert, inside the caller's transaction.
+    """
+    if not counts:
+        return
+    if conn.dialect.name == "postgresql":
+        insert = postgresql.insert
+    elif conn.dialect.name == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise NotImplementedError(f"rollup upserts are not supported on {conn.dialect.name}")
+    # Sorted keys give concurrent writers the same row-lock order (no deadlocks)
+    values = [
+        dict(granularity=g, dimension=d, bucket_start=b, value=v, count=n)
+        for (g, d, b, v), n in sorted(counts.items())
+    ]
+    stmt = insert(ROLLUP)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[c.name for c in ROLLUP.primary_key.columns],
+        set_={"count": ROLLUP.c.count + stmt.excluded.count},
+    )
+    conn.execute(stmt, values)  # executemany with one cached statement
+
+
+def update_rollups(conn: Connection, rows: List[Dict[str, Any]]):
+    apply_rollups(conn, rollup_counts(rows))
+
+
+def _log_rows(conn: Connection, chunk: int = 5000):
+    cols = [RecommendationLogORM.timestamp] + [getattr(RecommendationLogORM, d) for d in DIMENSIONS]
+    result = conn.execution_options(yield_per=chunk).execute(
+        select(*cols, RecommendationLogORM.products_json).where(RecommendationLogORM.timestamp.isnot(None))
+    )
+    for row in result:
+        yield row._asdict()
+
+
+def backfill_rollups(conn: Connection, rebuild: bool = False) -> int:
+    """
+    Aggregate the existing logs into the rollup table (once, when it is still empty,
+    or from scratch with `rebuild`). One pass over the logs; memory is bounded by the
+    number of distinct buckets, not rows. Returns the number of rollup rows written.
+    """
+    if rebuild:
+        conn.execute(delete(ROLLUP))
+    elif conn.execute(select(ROLLUP.c.count).limit(1)).first() is not None:
+        return 0
+    counts = rollup_counts(_log_rows(conn))
+    apply_rollups(conn, counts)
+    return len(counts)
+
+
+def hourly_cutoff(retention_days: int = ROLLUP_HOURLY_RETENTION_DAYS) -> Optional[datetime]:
+    """
+    Oldest hourly bucket still kept (a day boundary), or None when they are kept forever.
+    """
+    if retention_days <= 0:
+        return None
+    return _floor_day(datetime.now(timezone.utc)) - timedelta(days=retention_days)
+
+
+def expire_hourly_rollups(conn: Connection, retention_days: int = ROLLUP_HOURLY_RETENTION_DAYS) -> int:
+    cutoff = hourly_cutoff(retention_days)
+    if cutoff is None:
+        return 0
+    return conn.execute(
+        delete(ROLLUP).where(ROLLUP.c.granularity == "hour", ROLLUP.c.bucket_start < cutoff)
+    ).rowcount
+
+
+def _snap_to_days(
+    start: Optional[datetime], end: Optional[datetime], hourly_from: Optional[datetime]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Hour-aligned [start, end), with an edge whose hourly buckets have expired (it lies
+    before `hourly_from`) widened to the whole day it falls in.
+    """
+    start = _floor_hour(start) if start else None
+    end = _ceil_hour(end) if end else None
+    if hourly_from is not None:
+        if start and start < hourly_from:
+            start = _floor_day(start)
+        if end and end < hourly_from:
+            end = _ceil_day(end)
+    return start, end
+
+
+def _segments(start: Optional[datetime], end: Optional[datetime]) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+    """
+    Cover [start, end) with whole days plus hourly edges, so a range costs at most
+    ~48 hourly buckets on top of its days.
+    """
+    start = _floor_hour(start) if start else None
+    end = _ceil_hour(end) if end else None
+    day_lo = _ceil_day(start) if start else None
+    day_hi = _floor_day(end) if end else None
+    if day_lo and day_hi and day_lo >= day_hi:
+        return [("hour", start, end)]
+    segments = [("day", day_lo, day_hi)]
+    if start and start < day_lo:
+        segments.append(("hour", start, day_lo))
+    if end and day_hi < end:
+        segments.append(("hour", day_hi, end))
+    return segments
+
+
+def _in_segment(granularity: str, lo: Optional[datetime], hi: Optional[datetime]):
+    cond = [ROLLUP.c.granularity == granularity]
+    if lo is not None:
+        cond.append(ROLLUP.c.bucket_start >= lo)
+    if hi is not None:
+        cond.append(ROLLUP.c.bucket_start < hi)
+    return cond
+
+
+def query_analytics(
+    conn: Connection,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: str = "day",
+    hourly_retention_days: int = ROLLUP_HOURLY_RETENTION_DAYS,
+) -> dict:
+    """
+    Counts for [start, end) at hour resolution, from the rollups only: the cost depends
+    on the number of buckets and dimension values, not on the number of logged rows.
+
+    Hourly buckets older than `hourly_retention_days` are gone, so an edge before
+    `hourly_from` is counted as its whole day (`start` / `end` in the result are the
+    range actually counted, `snapped_to_days` is set), and an hourly series that would
+    start before it raises HourlyResolutionUnavailable instead of coming back empty.
+    """
+    hourly_from = hourly_cutoff(hourly_retention_days)
+    if interval == "hour" and hourly_from is not None and (start is None or _floor_hour(start) < hourly_from):
+        raise HourlyResolutionUnavailable(hourly_from)
+    requested = (_floor_hour(start) if start else None, _ceil_hour(end) if end else None)
+    start, end = _snap_to_days(start, end, hourly_from)
+
+    totals: Dict[str, Counter] = {dim: Counter() for dim in ("total",) + DIMENSIONS + ("product",)}
+    for granularity, lo, hi in _segments(start, end):
+        rows = conn.execute(
+            select(ROLLUP.c.dimension, ROLLUP.c.value, func.sum(ROLLUP.c.count))
+            .where(*_in_segment(granularity, lo, hi))
+            .group_by(ROLLUP.c.dimension, ROLLUP.c.value)
+        )
+        for dim, value, n in rows:
+            totals.setdefault(dim, Counter())[value] += int(n)
+
+    series_lo = _floor_hour(start) if start else None
+    series_hi = _ceil_hour(end) if end else None
+    if interval == "day":
+        # Partial first/last days still come from the daily bucket they fall in
+        series_lo = _floor_day(series_lo) if series_lo else None
+        series_hi = _ceil_day(series_hi) if series_hi else None
+    series = conn.execute(
+        select(ROLLUP.c.bucket_start, ROLLUP.c.count)
+        .where(ROLLUP.c.dimension == "total", *_in_segment(interval, series_lo, series_hi))
+        .order_by(ROLLUP.c.bucket_start)
+    )
+
+    def ordered(counter: Counter) -> Dict[str, int]:
+        return dict(counter.most_common())
+
+    return {
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "snapped_to_days": (start, end) != requested,
+        "hourly_from": hourly_from.isoformat() if hourly_from else None,
+        "total_requests": totals["total"][""],
+        **{f"by_{dim}": ordered(totals[dim]) for dim in DIMENSIONS},
+        "by_product": ordered(totals["product"]),
+        "interval": interval,
+        "series": [{"bucket": _utc(b).isoformat(), "count": int(n)} for b, n in series],
+    }
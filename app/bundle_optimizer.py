@@ -0,0 +1,370 @@
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from .metrics import EVENTS
+from .scoring import BlueprintScores
+
+# Value of covering a blueprint construct, by priority. Must-haves are additionally
+# raised above everything else a bundle can gain or pay, so no combination of
+# should/nice items or saved minutes can outweigh a single must-have (see `_weights`).
+PRIORITY_WEIGHTS = {"must": 100.0, "should": 10.0, "nice": 3.0}
+# Share of a construct's weight earned by covering it at all; the rest scales with how
+# good the covering product is relative to the best candidate for that construct.
+COVERAGE_SHARE = 0.5
+# Small per-minute cost so equally good bundles prefer the shorter one
+DURATION_PENALTY = 0.01
+
+# assessment_budget -> (max products in a bundle, cost per product)
+BUDGET_LEVELS = {
+    "low": (3, 1.0),
+    "medium": (5, 0.5),
+    "high": (8, 0.1),
+}
+
+# Candidate pool: best products per construct plus best multi-construct products overall
+BUNDLE_CANDIDATES_PER_CONSTRUCT = int(os.getenv("BUNDLE_CANDIDATES_PER_CONSTRUCT", "8"))
+# The node budget decides where the search stops, so results are deterministic
+# (~0.1 ms per node; typical searches need tens, rarely over a thousand)
+BUNDLE_MAX_NODES = int(os.getenv("BUNDLE_MAX_NODES", "2000"))
+# Opt-in wall-clock backstop (0 = off). A search it cuts short depends on machine
+# load: it is counted, flagged `timed_out` and its response is not cached
+BUNDLE_TIME_LIMIT_MS = float(os.getenv("BUNDLE_TIME_LIMIT_MS", "0"))
+
+
+@dataclass(frozen=True)
+class BundleObjective:
+    """
+    What a bundle search maximises; the constraints (duration, budget cap) never change.
+    """
+    name: str
+    label: str
+    priority_weights: Dict[str, float] = field(default_factory=lambda: dict(PRIORITY_WEIGHTS))
+    coverage_share: float = COVERAGE_SHARE
+    duration_penalty: float = DURATION_PENALTY
+    product_cost_scale: float = 1.0
+
+
+BEST_FIT = BundleObjective("best_fit", "Best overall fit")
+# Must-haves only, every minute counts
+SHORTEST = BundleObjective(
+    "shortest",
+    "Shortest bundle that keeps the must-haves",
+    priority_weights={"must": 1.0, "should": 0.0, "nice": 0.0},
+    coverage_share=1.0,
+    duration_penalty=1.0,
+)
+# Number of constructs covered, regardless of fit quality
+MOST_COVERAGE = BundleObjective(
+    "most_coverage",
+    "Covers the most constructs",
+    priority_weights={"must": 1.0, "should": 1.0, "nice": 1.0},
+    coverage_share=1.0,
+    duration_penalty=0.0001,
+    product_cost_scale=0.01,
+)
+
+
+@dataclass
+class BundleSolution:
+    """
+    Selected catalogue positions (in blueprint order of the first construct each one
+    covers) plus, per position, the blueprint rows it is credited with.
+    """
+    positions: List[int]
+    covers: Dict[int, List[int]]
+    value: float
+    duration: int
+    uncovered: List[int]
+    optimal: bool
+    nodes: int
+    elapsed_ms: float
+    candidates: int = 0
+    timed_out: bool = False  # stopped by the wall-clock backstop, not the node budget
+
+
+def _weights(
+    priorities: Sequence[str],
+    objective: BundleObjective,
+    max_duration: int,
+    max_products: int,
+    product_cost: float,
+) -> np.ndarray:
+    weights = np.array([objective.priority_weights[p] for p in priorities], dtype=np.float64)
+    must = np.array([p == "must" for p in priorities], dtype=bool)
+    # Covering a must-have earns at least coverage_share * weight, which must exceed all
+    # other value plus the most a bundle can pay in minutes and product costs
+    others = weights[~must].sum()
+    costs = objective.duration_penalty * max_duration + product_cost * max_products
+    weights[must] = np.maximum(weights[must], (others + costs + 1.0) / objective.coverage_share)
+    return weights
+
+
+def priority_weights(
+    priorities: Sequence[str],
+    max_duration: int = 0,
+    budget: str = "medium",
+    objective: BundleObjective = BEST_FIT,
+) -> np.ndarray:
+    """
+    Construct weights `solve_bundles` uses for `objective` under these constraints.
+    """
+    max_products, product_cost = BUDGET_LEVELS.get(budget, BUDGET_LEVELS["medium"])
+    return _weights(priorities, objective, max_duration, max_products, product_cost * objective.product_cost_scale)
+
+
+def quality_matrix(scored: BlueprintScores) -> np.ndarray:
+    """
+    Per (construct, product) quality in (0, 1]: score relative to the best valid
+    product for that construct; 0 where the product is not a valid candidate.
+    """
+    masked = np.where(scored.valid, scored.scores, 0.0)
+    best = masked.max(axis=1, initial=0.0)
+    return np.where(scored.valid, masked / np.where(best > 0, best, 1.0)[:, None], 0.0)
+
+
+def row_value(q: np.ndarray, coverage_share: float = COVERAGE_SHARE) -> np.ndarray:
+    return np.where(q > 0, coverage_share + (1.0 - coverage_share) * q, 0.0)
+
+
+def _top_positions(values: np.ndarray, eligible: np.ndarray, k: int) -> np.ndarray:
+    idx = np.flatnonzero(eligible)
+    if len(idx) > k:
+        vals = values[idx]
+        kth = -np.partition(-vals, k - 1)[k - 1]
+        above = idx[vals > kth]
+        idx = np.concatenate([above, idx[vals == kth][: k - len(above)]])
+    return idx
+
+
+def candidate_pool(
+    quality: np.ndarray,
+    weights: np.ndarray,
+    durations: np.ndarray,
+    max_duration: int,
+    k: int = BUNDLE_CANDIDATES_PER_CONSTRUCT,
+    coverage_share: float = COVERAGE_SHARE,
+) -> np.ndarray:
+    """
+    Catalogue positions worth searching: the `k` best fitting products per construct
+    and the `k` with the highest combined value across all constructs (products that
+    cover several needs at once). Sorted ascending.
+    """
+    fits = durations <= max_duration
+    pool = set()
+    for row in range(quality.shape[0]):
+        pool.update(_top_positions(quality[row], fits & (quality[row] > 0), k).tolist())
+    combined = (weights[:, None] * row_value(quality, coverage_share)).sum(axis=0)
+    pool.update(_top_positions(combined, fits & (combined > 0), k).tolist())
+    return np.array(sorted(pool), dtype=np.int64)
+
+
+def _undominated(q: np.ndarray, dur: np.ndarray) -> np.ndarray:
+    """
+    Mask of candidates not dominated by another that is no longer and at least as good
+    on every construct (strictly better somewhere, or equal with a lower index).
+    """
+    n = len(dur)
+    keep = np.ones(n, dtype=bool)
+    for a in range(n):
+        others = (dur <= dur[a]) & (q >= q[a]).all(axis=1)
+        others[a] = False
+        strictly = (dur < dur[a]) | (q > q[a]).any(axis=1)
+        if (others & (strictly | (np.arange(n) < a))).any():
+            keep[a] = False
+    return keep
+
+
+def solve_bundle(
+    scored: BlueprintScores,
+    priorities: Sequence[str],
+    durations: np.ndarray,
+    max_duration: int,
+    budget: str = "medium",
+    objective: BundleObjective = BEST_FIT,
+    max_nodes: int = BUNDLE_MAX_NODES,
+    time_limit_ms: float = BUNDLE_TIME_LIMIT_MS,
+    candidates_per_construct: int = BUNDLE_CANDIDATES_PER_CONSTRUCT,
+) -> BundleSolution:
+    """
+    Weighted set cover under a 0-1 knapsack constraint, solved by depth-first branch
+    and bound over the candidate pool.
+
+    Maximises  sum_c w_c * value(best chosen quality for c)
+               - cost_per_product * |bundle| - duration_penalty * minutes
+    subject to total duration <= max_duration and |bundle| <= the budget level's cap.
+    A greedy solution seeds the incumbent, so hitting `max_nodes` or the optional
+    time cap (`time_limit_ms` > 0) still returns a feasible (possibly non-optimal)
+    bundle, flagged `optimal=False`.
+    """
+    return solve_bundles(
+        scored, priorities, durations, max_duration, budget, objective, 1,
+        max_nodes, time_limit_ms, candidates_per_construct,
+    )[0]
+
+
+def solve_bundles(
+    scored: BlueprintScores,
+    priorities: Sequence[str],
+    durations: np.ndarray,
+    max_duration: int,
+    budget: str = "medium",
+    objective: BundleObjective = BEST_FIT,
+    top_n: int = 1,
+    max_nodes: int = BUNDLE_MAX_NODES,
+    time_limit_ms: float = BUNDLE_TIME_LIMIT_MS,
+    candidates_per_construct: int = BUNDLE_CANDIDATES_PER_CONSTRUCT,
+) -> List[BundleSolution]:
+    """
+    The `top_n` best distinct bundles for `objective`, best first (see `solve_bundle`).
+    Bundles with a product that adds nothing to the rest are skipped. Always returns
+    at least one (possibly empty) solution.
+    """
+    t0 = time.perf_counter()
+    max_products, product_cost = BUDGET_LEVELS.get(budget, BUDGET_LEVELS["medium"])
+    product_cost *= objective.product_cost_scale
+    n_rows = len(priorities)
+    if n_rows == 0 or max_duration <= 0:
+        return [BundleSolution([], {}, 0.0, 0, list(range(n_rows)), True, 0, 0.0)]
+
+    share = objective.coverage_share
+    weights = _weights(priorities, objective, max_duration, max_products, product_cost)
+    quality = quality_matrix(scored)
+    pool = candidate_pool(quality, weights, durations, max_duration, candidates_per_construct, share)
+
+    q = quality[:, pool].T  # candidates x rows
+    dur = durations[pool].astype(np.int64)
+    keep = _undominated(q, dur)
+    q, dur, pool = q[keep], dur[keep], pool[keep]
+    row_values = weights[None, :] * row_value(q, share)
+    n = len(pool)
+    item_cost = product_cost + objective.duration_penalty * dur
+
+    def useful(candidates, current, minutes):
+        """
+        Candidates that still fit and have a positive marginal gain. Coverage is
+        submodular, so an item useless here stays useless deeper in this subtree.
+        """
+        idx = candidates[dur[candidates] <= max_duration - minutes]
+        gains = np.maximum(row_values[idx] - current, 0.0).sum(axis=1) - item_cost[idx]
+        positive = gains > 1e-12
+        return idx[positive], gains[positive]
+
+    def value_of(current, count, minutes):
+        return float(current.sum()) - product_cost * count - objective.duration_penalty * minutes
+
+    # Best distinct bundles so far as (value, sorted items), best first
+    found: List[Tuple[float, Tuple[int, ...]]] = []
+
+    def threshold():
+        return found[-1][0] if len(found) >= top_n else -np.inf
+
+    def record(items, value):
+        key = tuple(sorted(items))
+        if not key or value <= threshold() + 1e-9 or any(k == key for _, k in found):
+            return
+        if len(key) > 1:
+            # Every product must add something the rest of the bundle does not cover
+            vals = row_values[list(key)]
+            for i in range(len(key)):
+                if (np.delete(vals, i, axis=0).max(axis=0) >= vals.max(axis=0)).all():
+                    return
+        found.append((value, key))
+        found.sort(key=lambda x: (-x[0], x[1]))
+        del found[top_n:]
+
+    everything = np.arange(n)
+
+    # Greedy seed: repeatedly add the item with the best marginal gain per minute
+    chosen: List[int] = []
+    current = np.zeros(n_rows)
+    minutes = 0
+    while len(chosen) < max_products:
+        idx, gains = useful(everything, current, minutes)
+        if not len(idx):
+            break
+        pick = int(idx[np.argmax(gains / np.maximum(dur[idx], 1))])
+        chosen.append(pick)
+        minutes += int(dur[pick])
+        current = np.maximum(current, row_values[pick])
+    record(chosen, value_of(current, len(chosen), minutes))
+
+    # Depth-first branch and bound. Each node branches on its best marginal gain per
+    # minute (ties: the earlier candidate): include it first, then exclude it.
+    nodes = 0
+    exhausted = True
+    timed_out = False
+    deadline = t0 + time_limit_ms / 1000 if time_limit_ms > 0 else None
+    stack = [(everything, (), np.zeros(n_rows), 0)]
+    while stack:
+        candidates, picked, current, minutes = stack.pop()
+        nodes += 1
+        if nodes > max_nodes:
+            exhausted = False
+            break
+        if deadline is not None and nodes & 63 == 0 and time.perf_counter() > deadline:
+            exhausted = False
+            timed_out = True
+            EVENTS.inc(event="bundle_time_limit")
+            break
+        value = value_of(current, len(picked), minutes)
+        record(picked, value)
+        slots = max_products - len(picked)
+        if slots <= 0:
+            continue
+        idx, gains = useful(candidates, current, minutes)
+        if not len(idx):
+            continue
+        # Marginal gains only shrink as items are added, so their sum bounds the rest:
+        # at most `slots` items, at most the remaining minutes (fractional knapsack) ...
+        ratio = gains / np.maximum(dur[idx], 1)
+        top_slots = np.sort(gains)[::-1][:slots].sum()
+        by_ratio = np.argsort(-ratio, kind="stable")
+        spent = np.cumsum(dur[idx][by_ratio])
+        capacity = max_duration - minutes
+        whole = spent <= capacity
+        knapsack = gains[by_ratio][whole].sum()
+        if not whole.all():
+            k = int(np.argmin(whole))
+            knapsack += ratio[by_ratio][k] * (capacity - (spent[k - 1] if k else 0))
+        # ... and each construct improves at most once, by at least one more item's cost
+        per_row = np.maximum(row_values[idx] - current, 0.0).max(axis=0).sum() - item_cost[idx].min()
+        if value + min(top_slots, knapsack, per_row) <= threshold() + 1e-9:
+            continue
+        j = int(idx[by_ratio[0]])
+        rest = idx[idx != j]
+        stack.append((rest, picked, current, minutes))
+        stack.append((rest, picked + (j,), np.maximum(current, row_values[j]), minutes + int(dur[j])))
+
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    if not found:
+        return [BundleSolution([], {}, 0.0, 0, list(range(n_rows)), exhausted, nodes, elapsed_ms, n, timed_out)]
+
+    solutions = []
+    for value, items in found:
+        # Credit each row to the chosen item that covers it best (ties: catalogue order)
+        covers: Dict[int, List[int]] = {}
+        uncovered = []
+        for r in range(n_rows):
+            best_item = max(items, key=lambda i: (q[i, r], -pool[i]))
+            if q[best_item, r] <= 0:
+                uncovered.append(r)
+                continue
+            covers.setdefault(int(pool[best_item]), []).append(r)
+
+        # Products come in blueprint order of the first construct they are credited with
+        positions = sorted(covers, key=lambda pos: (covers[pos][0], pos))
+        solutions.append(BundleSolution(
+            positions=positions,
+            covers=covers,
+            value=value,
+            duration=int(durations[positions].sum()) if positions else 0,
+            uncovered=uncovered,
+            optimal=exhausted,
+            nodes=nodes,
+            elapsed_ms=elapsed_ms,
+            candidates=n,
+            timed_out=timed_out,
+        ))
+    return solutions
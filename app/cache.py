@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+import numpy as np
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "0"))  # seconds, 0 = no expiry
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")  # SQLite file for the on-disk tier
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU cache with optional TTL and hit/miss/eviction counters.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl or None
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    Query-embedding cache keyed on (model name, normalized query text).
+
+    In-memory LRU tier in front of an optional SQLite tier (`disk_path`) so hot
+    query embeddings survive restarts.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = EMBEDDING_CACHE_SIZE,
+        ttl: Optional[float] = EMBEDDING_CACHE_TTL,
+        disk_path: Optional[str] = EMBEDDING_CACHE_PATH or None,
+    ):
+        self.memory = LRUCache(maxsize, ttl)
+        self.disk_path = disk_path
+        self.disk_hits = 0
+        self._disk_lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings "
+                "(key TEXT PRIMARY KEY, created REAL NOT NULL, vector BLOB NOT NULL)"
+            )
+            self._disk.commit()
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        normalized = normalize_query(text)
+        return hashlib.sha1(f"{model_name}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model_name: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        out: List[Optional[np.ndarray]] = []
+        for text in texts:
+            k = self.key(model_name, text)
+            vec = self.memory.get(k)
+            if vec is None and self._disk is not None:
+                vec = self._disk_get(k)
+                if vec is not None:
+                    self.disk_hits += 1
+                    self.memory.set(k, vec)
+            out.append(vec)
+        return out
+
+    def put_many(self, model_name: str, texts: Sequence[str], vectors: np.ndarray):
+        rows = []
+        for text, vec in zip(texts, vectors):
+            k = self.key(model_name, text)
+            vec = np.array(vec, dtype=np.float32)
+            vec.setflags(write=False)
+            self.memory.set(k, vec)
+            rows.append((k, time.time(), vec.tobytes()))
+        if self._disk is not None and rows:
+            with self._disk_lock:
+                self._disk.executemany(
+                    "INSERT OR REPLACE INTO query_embeddings (key, created, vector) VALUES (?, ?, ?)", rows
+                )
+                self._disk.commit()
+
+    def _disk_get(self, k: str) -> Optional[np.ndarray]:
+        with self._disk_lock:
+            row = self._disk.execute(
+                "SELECT created, vector FROM query_embeddings WHERE key = ?", (k,)
+            ).fetchone()
+        if row is None:
+            return None
+        created, blob = row
+        if self.memory.ttl is not None and time.time() - created > self.memory.ttl:
+            return None
+        return np.frombuffer(blob, dtype=np.float32)
+
+    def clear(self):
+        self.memory.clear()
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM query_embeddings")
+                self._disk.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.memory.stats()
+        stats["disk_path"] = self.disk_path
+        stats["disk_hits"] = self.disk_hits
+        return stats
+
+
+class ResponseCache:
+    """
+    Memoizes full recommendation responses keyed on a canonical hash of the request
+    plus the catalogue version. Only the version last `publish`ed (the current
+    snapshot's) is cached: requests still holding an older snapshot after a reload
+    miss and their results are not stored, so they can neither evict nor outlive
+    fresh entries. Publishing a new version drops all cached entries.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.memory = LRUCache(maxsize)
+        self.catalogue_version: Optional[str] = None
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(payload: Dict[str, Any], catalogue_version: str) -> str:
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(f"{catalogue_version}\x00{canonical}".encode("utf-8")).hexdigest()
+
+    def publish(self, catalogue_version: str):
+        """
+        Make `catalogue_version` the one cached; called when a snapshot is published.
+        """
+        with self._lock:
+            if catalogue_version != self.catalogue_version:
+                if self.catalogue_version is not None:
+                    self.invalidations += 1
+                self.memory.clear()
+                self.catalogue_version = catalogue_version
+
+    def get(self, payload: Dict[str, Any], catalogue_version: str) -> Any:
+        if catalogue_version != self.catalogue_version:
+            self.memory.misses += 1
+            return None
+        return self.memory.get(self.key(payload, catalogue_version))
+
+    def set(self, payload: Dict[str, Any], catalogue_version: str, value: Any):
+        if catalogue_version == self.catalogue_version:
+            self.memory.set(self.key(payload, catalogue_version), value)
+
+    def clear(self):
+        self.memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.memory.stats()
+        stats["catalogue_version"] = self.catalogue_version
+        stats["invalidations"] = self.invalidations
+        return stats
@@ -1,9 +1,77 @@
+import os
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, inspect, select, text, update
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
-from .orm_models import ProductORM
+from .orm_models import CatalogueStateORM, ProductORM
+from .models import Product
+from .catalogue_index import CatalogueIndex
+from .catalogue_feed import CATALOGUE_POLL_SECONDS, changes_since, record_changes
+from .scoring import CatalogueFeatures
+from .metrics import span
+
+# Changed products fetched per IN (...) query during an incremental reload
+RELOAD_FETCH_CHUNK = int(os.getenv("RELOAD_FETCH_CHUNK", "500"))
+
+PRODUCTS = ProductORM.__table__
+# Exactly the columns a Product needs, read as plain rows (id only orders them)
+PRODUCT_COLUMNS = tuple(PRODUCTS.c[name] for name in Product.model_fields)
+
+
+def fetch_products(db: Session, product_ids: Optional[Sequence[str]] = None) -> List[Product]:
+    """
+    Products in insertion (id) order, all of them or those in `product_ids` (looked
+    up RELOAD_FETCH_CHUNK at a time). A column-projected Core query mapped straight
+    into `Product`: no ORM entities, identity map or change tracking for rows that
+    are only read.
+    """
+    query = select(PRODUCTS.c.id, *PRODUCT_COLUMNS).order_by(PRODUCTS.c.id)
+    with span("db_fetch"):
+        if product_ids is None:
+            rows = db.execute(query).mappings().all()
+        else:
+            product_ids = list(product_ids)
+            rows = []
+            for start in range(0, len(product_ids), RELOAD_FETCH_CHUNK):
+                chunk = product_ids[start:start + RELOAD_FETCH_CHUNK]
+                rows += db.execute(query.where(PRODUCTS.c.product_id.in_(chunk))).mappings().all()
+            rows.sort(key=lambda row: row["id"])
+    with span("orm_convert"):
+        return [Product.from_row(row) for row in rows]
+
+
+def upgrade_products_table(conn: Connection):
+    """
+    Bring a `products` table created by an older release up to date in place:
+    `create_all` skips tables that exist, so columns added since are added here.
+    Idempotent; run after `create_all` at startup.
+    """
+    column = PRODUCTS.c.updated_at
+    if column.name in {c["name"] for c in inspect(conn).get_columns(PRODUCTS.name)}:
+        return
+    print(f"Adding {PRODUCTS.name}.{column.name}")
+    ddl = f"{column.name} {column.type.compile(dialect=conn.dialect)}"
+    if conn.dialect.name == "postgresql":
+        # IF NOT EXISTS: several workers may start at once
+        conn.execute(text(f"ALTER TABLE {PRODUCTS.name} ADD COLUMN IF NOT EXISTS {ddl} DEFAULT now()"))
+    else:
+        # SQLite cannot add a column with a non-constant default: add it, then fill it
+        conn.execute(text(f"ALTER TABLE {PRODUCTS.name} ADD COLUMN {ddl}"))
+        conn.execute(update(PRODUCTS).values({column.name: func.now()}))
+    for index in PRODUCTS.indexes:
+        if column.name in index.columns:
+            index.create(conn, checkfirst=True)
 
 
 def seed_products_if_empty(db: Session):
-    count = db.query(ProductORM).count()
+    count = db.execute(select(func.count(PRODUCTS.c.id))).scalar()
     if count > 0:
         return
 
@@ -63,4 +131,232 @@ def seed_products_if_empty(db: Session):
     ]
 
     db.add_all(mock_products)
+    record_changes(db.connection(), upserted=[p.product_id for p in mock_products])
     db.commit()
+
+
+@dataclass(frozen=True)
+class CatalogueSnapshot:
+    """
+    Immutable, versioned view of the product catalogue shared by all requests.
+    """
+    version: str
+    products: Tuple[Product, ...]
+    by_id: Mapping[str, Product]
+    index: CatalogueIndex
+    features: CatalogueFeatures
+    # Change-feed version (catalogue_state) the snapshot is current with
+    feed_version: int = 0
+
+
+def _probe(db: Session) -> Tuple[int, int, str]:
+    """
+    (feed version, product count, version string) from one small query. The string
+    also covers count / max id / last update, so writes that bypass the change feed
+    are still noticed (and answered with a full reload).
+    """
+    feed = select(CatalogueStateORM.version).where(CatalogueStateORM.id == 1).scalar_subquery()
+    feed_version, count, max_id, last_update = db.query(
+        feed,
+        func.count(ProductORM.id),
+        func.max(ProductORM.id),
+        func.max(ProductORM.updated_at),
+    ).one()
+    stamp = last_update.isoformat() if last_update is not None else "-"
+    feed_version = feed_version or 0
+    return feed_version, count, f"{feed_version}:{count}:{max_id or 0}:{stamp}"
+
+
+def catalogue_version(db: Session) -> str:
+    """
+    Cheap version probe: changes whenever a product is added, edited or removed.
+    """
+    return _probe(db)[2]
+
+
+def _snapshot(products: Tuple[Product, ...], version: str, feed_version: int,
+              index: Optional[CatalogueIndex] = None) -> CatalogueSnapshot:
+    with span("catalogue_index"):
+        if index is None:
+            index = CatalogueIndex(products)
+        features = CatalogueFeatures(products, index)
+    return CatalogueSnapshot(
+        version=version,
+        products=products,
+        by_id=MappingProxyType({p.product_id: p for p in products}),
+        index=index,
+        features=features,
+        feed_version=feed_version,
+    )
+
+
+def load_snapshot(db: Session, version: Optional[str] = None, feed_version: Optional[int] = None) -> CatalogueSnapshot:
+    if version is None or feed_version is None:
+        feed_version, _, version = _probe(db)
+    return _snapshot(tuple(fetch_products(db)), version, feed_version)
+
+
+def apply_changes(
+    db: Session, snapshot: CatalogueSnapshot, version: str, feed_version: int, count: int
+) -> Optional[CatalogueSnapshot]:
+    """
+    The next snapshot built from `snapshot` plus the change feed: only products
+    written since `snapshot.feed_version` are fetched and converted. Edited
+    products keep their position and new ones are appended (the order a full load
+    gives), so the index is patched rather than rebuilt unless products were
+    removed. None when the feed cannot be trusted (pruned, or the result does not
+    add up to `count` because of writes outside the feed): reload everything.
+    """
+    with span("catalogue_changes"):
+        ops = changes_since(db, snapshot.feed_version, feed_version)
+    if ops is None:
+        return None
+    upserted = [pid for pid, op in ops.items() if op == "upsert"]
+    fresh = {p.product_id: p for p in fetch_products(db, upserted)}
+    gone = {pid for pid in ops if pid not in fresh}
+
+    previous = snapshot.products
+    if gone.intersection(snapshot.by_id):
+        products = tuple([fresh.pop(p.product_id, p) for p in previous if p.product_id not in gone])
+        products += tuple(fresh.values())
+        return _snapshot(products, version, feed_version) if len(products) == count else None
+
+    changed = [snapshot.index.position[pid] for pid in fresh if pid in snapshot.by_id]
+    merged = list(previous)
+    for i in changed:
+        merged[i] = fresh.pop(merged[i].product_id)
+    changed.sort()
+    changed += range(len(merged), len(merged) + len(fresh))
+    merged.extend(fresh.values())
+    if len(merged) != count:
+        return None
+    products = tuple(merged)
+    with span("catalogue_index"):
+        index = snapshot.index.updated(previous, products, changed)
+    return _snapshot(products, version, feed_version, index)
+
+
+def page_products(
+    snapshot: CatalogueSnapshot,
+    filters: Mapping[str, Sequence[str]],
+    after: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[Product], bool, int]:
+    """
+    One page of products in product_id order, served from the in-memory snapshot.
+    A product matches a filter when it has any of its values, and must match every
+    given filter. `after` is the last product_id of the previous page; it need not
+    still exist, so cursors survive catalogue changes. Returns (page, has_more, total).
+    """
+    features = snapshot.features
+    keep = np.ones(features.size, dtype=bool)
+    for name, values in filters.items():
+        if values:
+            keep &= features.any_of(name, values)
+    order = np.asarray(snapshot.index.id_order, dtype=np.int64)
+    ranks = np.flatnonzero(keep[order])
+    if after is not None:
+        ranks = ranks[ranks >= bisect_right(snapshot.index.sorted_ids, after)]
+    page = [snapshot.products[i] for i in order[ranks[:limit]]]
+    return page, len(ranks) > limit, int(keep.sum())
+
+
+class CatalogueStore:
+    """
+    Holds the current catalogue snapshot in process and swaps it only when the
+    DB version changes. Either requests check the version lazily (at most every
+    `poll_interval` seconds), or, once `watched` is set, a background
+    `CatalogueWatcher` calls `refresh` and requests never wait on the DB.
+    `on_publish(snapshot)` runs each time a new snapshot becomes current.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = CATALOGUE_POLL_SECONDS,
+        on_publish: Optional[Callable[[CatalogueSnapshot], None]] = None,
+    ):
+        self.poll_interval = poll_interval
+        self.on_publish = on_publish
+        self.watched = False
+        self._snapshot: Optional[CatalogueSnapshot] = None
+        self._checked_at = 0.0
+        self._stale = False
+        self._lock = threading.Lock()
+        self.full_reloads = 0
+        self.incremental_reloads = 0
+        self.last_reload_s: Optional[float] = None
+
+    @property
+    def snapshot(self) -> Optional[CatalogueSnapshot]:
+        return self._snapshot
+
+    def _due(self) -> bool:
+        if self._snapshot is None or self._stale:
+            return True
+        return not self.watched and time.monotonic() - self._checked_at >= self.poll_interval
+
+    def get(self, db: Session) -> CatalogueSnapshot:
+        if self._due():
+            self.refresh(db)
+        return self._snapshot
+
+    def current(self, session_factory: Callable[[], Session]) -> CatalogueSnapshot:
+        """
+        Like `get`, but only opens a DB session when a version check is actually due.
+        """
+        if not self._due():
+            return self._snapshot
+        with session_factory() as db:
+            return self.get(db)
+
+    def refresh(self, db: Session, prepare: Optional[Callable[[CatalogueSnapshot], None]] = None) -> bool:
+        """
+        Check the version now and, if it moved, build the next snapshot (from the
+        change feed when possible) and publish it. `prepare(next)` runs before the
+        swap, e.g. to build the matching vector store, so requests keep using the
+        complete previous snapshot until everything for the next one is ready.
+        Returns whether a new snapshot was published.
+        """
+        with self._lock:
+            with span("catalogue_version"):
+                feed_version, count, version = _probe(db)
+            self._checked_at = time.monotonic()
+            self._stale = False
+            current = self._snapshot
+            if current is not None and current.version == version:
+                return False
+
+            t0 = time.perf_counter()
+            snapshot = None
+            if current is not None and feed_version > current.feed_version:
+                snapshot = apply_changes(db, current, version, feed_version, count)
+            if snapshot is None:
+                snapshot = load_snapshot(db, version, feed_version)
+                self.full_reloads += 1
+            else:
+                self.incremental_reloads += 1
+            if prepare is not None:
+                prepare(snapshot)
+            self._snapshot = snapshot
+            if self.on_publish is not None:
+                self.on_publish(snapshot)
+            self.last_reload_s = round(time.perf_counter() - t0, 4)
+            return True
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "feed_version": snapshot.feed_version if snapshot else None,
+            "products": len(snapshot.products) if snapshot else 0,
+            "watched": self.watched,
+            "full_reloads": self.full_reloads,
+            "incremental_reloads": self.incremental_reloads,
+            "last_reload_s": self.last_reload_s,
+        }
+
+    def invalidate(self):
+        """
+        Notify hook for in-process catalogue writes: forces a version check on the next read.
+        """
+        self._stale = True
@@ -0,0 +1,222 @@
+import os
+import re
+import select
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy import delete, func, insert, text, update
+from sqlalchemy import select as sql_select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+
+from .db import engine
+from .orm_models import CatalogueChangeORM, CatalogueStateORM
+
+# listen: LISTEN/NOTIFY on Postgres (polling elsewhere and as a safety net);
+# poll: background polling only; off: requests check the version lazily
+CATALOGUE_FEED = os.getenv("CATALOGUE_FEED", "listen")
+CATALOGUE_CHANNEL = os.getenv("CATALOGUE_CHANNEL", "catalogue_changes")
+CATALOGUE_POLL_SECONDS = float(os.getenv("CATALOGUE_POLL_SECONDS", "5"))
+CATALOGUE_DEBOUNCE_MS = float(os.getenv("CATALOGUE_DEBOUNCE_MS", "200"))
+# Versions of change rows kept; a worker further behind reloads the whole catalogue
+CATALOGUE_CHANGES_KEEP = int(os.getenv("CATALOGUE_CHANGES_KEEP", "1000"))
+
+STATE = CatalogueStateORM.__table__
+CHANGES = CatalogueChangeORM.__table__
+
+
+def ensure_state(conn: Connection):
+    """
+    Create the version row if it is missing (idempotent, safe between workers).
+    """
+    if conn.dialect.name == "postgresql":
+        stmt = postgresql.insert(STATE).values(id=1, version=0).on_conflict_do_nothing()
+    elif conn.dialect.name == "sqlite":
+        stmt = sqlite.insert(STATE).values(id=1, version=0).on_conflict_do_nothing()
+    else:
+        if conn.execute(sql_select(STATE.c.id).where(STATE.c.id == 1)).first() is not None:
+            return
+        stmt = insert(STATE).values(id=1, version=0)
+    conn.execute(stmt)
+
+
+def record_changes(conn: Connection, upserted: Iterable[str] = (), deleted: Iterable[str] = ()) -> Optional[int]:
+    """
+    Bump the catalogue version and record the written / deleted product ids, in the
+    caller's transaction. The UPDATE holds the version row lock until commit, so
+    writers commit versions in order: a reader that sees version v also sees every
+    change up to v. On Postgres a NOTIFY carrying the version is sent at commit.
+    Returns the new version (None when nothing changed).
+    """
+    ops: Dict[str, str] = {pid: "upsert" for pid in upserted}
+    ops.update((pid, "delete") for pid in deleted)
+    if not ops:
+        return None
+    bump = update(STATE).where(STATE.c.id == 1).values(version=STATE.c.version + 1).returning(STATE.c.version)
+    version = conn.execute(bump).scalar()
+    if version is None:
+        ensure_state(conn)
+        version = conn.execute(bump).scalar()
+    conn.execute(insert(CHANGES), [{"version": version, "product_id": pid, "op": op} for pid, op in ops.items()])
+    if CATALOGUE_CHANGES_KEEP > 0:
+        conn.execute(delete(CHANGES).where(CHANGES.c.version <= version - CATALOGUE_CHANGES_KEEP))
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_notify(:channel, :version)"), {"channel": CATALOGUE_CHANNEL, "version": str(version)})
+    return version
+
+
+def changes_since(db, since: int, until: int) -> Optional[Dict[str, str]]:
+    """
+    product_id -> last operation ("upsert" / "delete") over versions (since, until].
+    None when part of that range was already pruned: the caller must reload everything.
+    `db` is a Session or Connection.
+    """
+    oldest = db.execute(sql_select(func.min(CHANGES.c.version))).scalar()
+    if oldest is None or oldest > since + 1:
+        return None
+    rows = db.execute(
+        sql_select(CHANGES.c.product_id, CHANGES.c.op)
+        .where(CHANGES.c.version > since, CHANGES.c.version <= until)
+        .order_by(CHANGES.c.version)
+    )
+    return {product_id: op for product_id, op in rows}
+
+
+class CatalogueWatcher:
+    """
+    Background thread that calls `on_change()` whenever the catalogue may have changed.
+
+    On Postgres it LISTENs on `channel` (see `record_changes`), so every worker on every
+    node hears about a write within `debounce_ms`; a burst of notifications (an
+    import's batches) triggers one check. It also calls `on_change()` every
+    `poll_interval` seconds, which is the whole mechanism on other databases, while
+    the listening connection is down, and for writes that bypass the feed.
+    `on_change` must be cheap when nothing changed (a version probe).
+    """
+
+    def __init__(
+        self,
+        on_change: Callable[[], None],
+        bind: Engine = engine,
+        mode: str = CATALOGUE_FEED,
+        poll_interval: float = CATALOGUE_POLL_SECONDS,
+        debounce_ms: float = CATALOGUE_DEBOUNCE_MS,
+        channel: str = CATALOGUE_CHANNEL,
+    ):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", channel):
+            raise ValueError(f"Invalid notification channel name {channel!r}")
+        self.on_change = on_change
+        self.bind = bind
+        self.mode = mode
+        self.poll_interval = max(poll_interval, 0.1)
+        self.debounce = max(debounce_ms, 0.0) / 1000
+        self.channel = channel
+        self._conn = None
+        self._retry_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.notifications = 0
+        self.checks = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.mode == "off" or self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="catalogue-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wait()
+            if self._stop.is_set():
+                return
+            try:
+                self.on_change()
+                self.checks += 1
+            except Exception as e:
+                self._error(e)
+
+    def _wait(self):
+        conn = self._listener()
+        if conn is None:
+            self._stop.wait(self.poll_interval)
+            return
+        try:
+            ready, _, _ = select.select([conn], [], [], self.poll_interval)
+            if ready and self._drain(conn):
+                self._stop.wait(self.debounce)  # coalesce the rest of a burst
+                self._drain(conn)
+        except Exception as e:
+            self._error(e)
+            self._close()
+
+    def _drain(self, conn) -> int:
+        conn.poll()
+        count = len(conn.notifies)
+        conn.notifies.clear()
+        self.notifications += count
+        return count
+
+    def _listener(self):
+        if self.mode != "listen" or self.bind.dialect.name != "postgresql":
+            return None
+        if self._conn is not None:
+            return self._conn
+        if time.monotonic() < self._retry_at:
+            return None
+        conn = None
+        try:
+            raw = self.bind.raw_connection()
+            raw.detach()  # held for the process lifetime, outside the pool
+            conn = raw.driver_connection
+            if not (hasattr(conn, "poll") and hasattr(conn, "notifies")):
+                raise RuntimeError(f"{type(conn).__module__} has no notification API; polling instead")
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{self.channel}"')
+        except Exception as e:
+            self._error(e)
+            self._retry_at = time.monotonic() + 6 * self.poll_interval
+            self._conn = conn
+            self._close()
+            return None
+        self._conn = conn
+        return conn
+
+    def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _error(self, e: Exception):
+        self.errors += 1
+        self.last_error = f"{type(e).__name__}: {e}"
+
+    def stats(self) -> dict:
+        mode = "off"
+        if self.running:
+            mode = "listen" if self.mode == "listen" and self.bind.dialect.name == "postgresql" else "poll"
+        return {
+            "mode": mode,
+            "listening": self._conn is not None,
+            "poll_seconds": self.poll_interval,
+            "notifications": self.notifications,
+            "checks": self.checks,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,138 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+import numpy as np
+
+from .models import Product
+
+# Product attributes that get an inverted index (Product field -> index name)
+INDEXED_FIELDS = {
+    "constructs": "construct",
+    "languages": "language",
+    "job_levels": "job_level",
+    "job_families": "job_family",
+    "use_cases": "use_case",
+    "tags": "tag",
+    "category": "category",
+}
+
+
+class CatalogueIndex:
+    """
+    Inverted indexes over a catalogue snapshot.
+
+    Every attribute value maps to a bitset (a Python int) whose bit `i` is set when
+    the product at position `i` of the snapshot carries that value, so filtering
+    becomes bitwise AND/OR instead of scanning lists.
+    """
+
+    def __init__(self, products: Sequence[Product]):
+        self.size = len(products)
+        self.all = (1 << self.size) - 1
+        self.position: Dict[str, int] = {p.product_id: i for i, p in enumerate(products)}
+        self._sort_ids(products)
+        # Collect positions first: OR-ing bits into growing ints one product at a time
+        # copies every int on each step (quadratic in the catalogue size)
+        self.bitsets: Dict[str, Dict[str, int]] = {
+            name: {value: _bitset(found) for value, found in positions.items()}
+            for name, positions in _positions(enumerate(products)).items()
+        }
+
+    def _sort_ids(self, products: Sequence[Product]):
+        # Positions in product_id order (stable listing order for cursor pagination)
+        self.id_order: List[int] = sorted(range(self.size), key=lambda i: products[i].product_id)
+        self.sorted_ids: List[str] = [products[i].product_id for i in self.id_order]
+
+    def updated(self, previous: Sequence[Product], products: Sequence[Product],
+                changed: Sequence[int]) -> "CatalogueIndex":
+        """
+        Index of `products`, which equal `previous` (the products of this index)
+        except at the `changed` positions: edited in place or appended at the end.
+        Each affected posting is patched with one mask; the rest are shared. Removals
+        shift positions, so they need a full rebuild.
+        """
+        index = CatalogueIndex.__new__(CatalogueIndex)
+        index.size = len(products)
+        index.all = (1 << index.size) - 1
+        index.position = self.position
+        index.id_order, index.sorted_ids = self.id_order, self.sorted_ids
+        appended = range(len(previous), len(products))
+        if any(products[i].product_id != previous[i].product_id for i in changed if i < len(previous)):
+            index.position = {p.product_id: i for i, p in enumerate(products)}
+            index._sort_ids(products)
+        elif appended:
+            index.position = dict(self.position)
+            index.position.update((products[i].product_id, i) for i in appended)
+            if len(appended) > 1024:
+                index._sort_ids(products)
+            else:
+                index.id_order, index.sorted_ids = list(self.id_order), list(self.sorted_ids)
+                for i in appended:
+                    k = bisect_left(index.sorted_ids, products[i].product_id)
+                    index.sorted_ids.insert(k, products[i].product_id)
+                    index.id_order.insert(k, i)
+
+        removed = _positions((i, previous[i]) for i in changed if i < len(previous))
+        added = _positions((i, products[i]) for i in changed)
+        index.bitsets = {}
+        for name, postings in self.bitsets.items():
+            drop, add = removed.get(name, {}), added.get(name, {})
+            if not drop and not add:
+                index.bitsets[name] = postings
+                continue
+            patched = dict(postings)
+            for value in set(drop) | set(add):
+                mask = patched.get(value, 0)
+                if value in drop:
+                    mask &= ~_bitset(drop[value])
+                if value in add:
+                    mask |= _bitset(add[value])
+                if mask:
+                    patched[value] = mask
+                else:
+                    patched.pop(value, None)
+            index.bitsets[name] = patched
+        return index
+
+    def get(self, name: str, value: str) -> int:
+        return self.bitsets[name].get(value, 0)
+
+    def any_of(self, name: str, values: Iterable[str]) -> int:
+        postings = self.bitsets[name]
+        mask = 0
+        for v in values:
+            mask |= postings.get(v, 0)
+        return mask
+
+    def values(self, name: str) -> List[str]:
+        return sorted(self.bitsets[name])
+
+    @staticmethod
+    def positions(mask: int) -> Iterator[int]:
+        """
+        Yield the set bit positions of `mask` in ascending (catalogue) order.
+        """
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+
+def _positions(items: Iterable) -> Dict[str, Dict[str, List[int]]]:
+    """
+    index name -> value -> ascending positions, for (position, product) pairs.
+    """
+    found: Dict[str, Dict[str, List[int]]] = {name: {} for name in INDEXED_FIELDS.values()}
+    for i, p in items:
+        for field, name in INDEXED_FIELDS.items():
+            values = getattr(p, field) or []
+            postings = found[name]
+            for value in {values} if isinstance(values, str) else set(values):
+                postings.setdefault(value, []).append(i)
+    return found
+
+
+def _bitset(positions: List[int]) -> int:
+    bits = np.zeros(max(positions) + 1, dtype=bool)
+    bits[positions] = True
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
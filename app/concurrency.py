@@ -0,0 +1,78 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "2"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+EMBED_MAX_PENDING = int(os.getenv("EMBED_MAX_PENDING", "64"))
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "1"))
+
+
+class Overloaded(Exception):
+    """
+    Raised when a bounded resource is saturated; the API maps it to 503 + Retry-After.
+    """
+
+    def __init__(self, detail: str, retry_after: int = RETRY_AFTER_SECONDS):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Dedicated thread pool for blocking work (model encode, FAISS search) with its own
+    concurrency limit. At most `max_concurrency` calls run at once and at most
+    `max_pending` more may wait; beyond that callers get `Overloaded` immediately.
+    Pass `executor` (e.g. a process pool) to apply the same limits to another pool.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_concurrency: int, max_pending: int,
+                 executor: Optional[Executor] = None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.inflight = 0
+        self.rejected = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.inflight >= self.max_concurrency + self.max_pending:
+            self.rejected += 1
+            raise Overloaded(f"{self.name} executor is saturated")
+        self.inflight += 1
+        try:
+            async with self._get_semaphore():
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.inflight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "inflight": self.inflight,
+            "max_concurrency": self.max_concurrency,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+embed_executor = BoundedExecutor(
+    "embed",
+    max_workers=EMBED_WORKERS,
+    max_concurrency=EMBED_MAX_CONCURRENCY,
+    max_pending=EMBED_MAX_PENDING,
+)
@@ -0,0 +1,103 @@
+import asyncio
+import os
+from collections import Counter, deque
+from typing import Callable, Deque, List, Optional, Set, Tuple
+import numpy as np
+
+from .concurrency import BoundedExecutor
+
+ENCODE_MAX_BATCH = int(os.getenv("ENCODE_MAX_BATCH", "32"))
+ENCODE_MAX_WAIT_MS = float(os.getenv("ENCODE_MAX_WAIT_MS", "2"))
+
+# Upper bounds of the batch-size histogram buckets
+_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class BatchingEncoder:
+    """
+    In-process encoder service that coalesces concurrent query encodes.
+
+    Callers await `encode(text)`; pending texts are collected for up to `max_wait_ms`
+    or until `max_batch` are queued, then encoded with one `encode_batch` call on the
+    executor, and each caller's future is resolved with its own row.
+    """
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], np.ndarray],
+        executor: BoundedExecutor,
+        max_batch: int = ENCODE_MAX_BATCH,
+        max_wait_ms: float = ENCODE_MAX_WAIT_MS,
+    ):
+        self.encode_batch = encode_batch
+        self.executor = executor
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes: Counter = Counter()
+        self.queue_delays_ms: Deque[float] = deque(maxlen=2048)
+        self.max_queue_delay_ms = 0.0
+
+    async def encode(self, text: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((text, fut, loop.time()))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        now = asyncio.get_running_loop().time()
+        for _, _, enqueued in batch:
+            delay_ms = (now - enqueued) * 1000
+            self.queue_delays_ms.append(delay_ms)
+            self.max_queue_delay_ms = max(self.max_queue_delay_ms, delay_ms)
+        self.batches += 1
+        self.items += len(batch)
+        self.batch_sizes[next((b for b in _BATCH_BUCKETS if len(batch) <= b), "inf")] += 1
+
+        try:
+            embeddings = await self.executor.run(self.encode_batch, [text for text, _, _ in batch])
+        except Exception as e:
+            for _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut, _), row in zip(batch, embeddings):
+            if not fut.done():
+                fut.set_result(row)
+
+    def stats(self) -> dict:
+        delays = np.array(self.queue_delays_ms) if self.queue_delays_ms else np.zeros(1)
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {
+                f"le_{b}": self.batch_sizes[b] for b in _BATCH_BUCKETS + ("inf",) if self.batch_sizes[b]
+            },
+            "queue_delay_ms": {
+                "p50": float(np.percentile(delays, 50)),
+                "p95": float(np.percentile(delays, 95)),
+                "max": self.max_queue_delay_ms,
+            },
+        }
@@ -0,0 +1,186 @@
+"""
+Text encoder backends for ProductVectorStore.
+
+    sentence-transformers  reference PyTorch model (default)
+    onnx                   exported model run with ONNX Runtime
+    onnx-int8              same export, dynamically quantized to int8 weights
+
+Export the ONNX models once (needs sentence-transformers, torch, onnx, onnxruntime):
+
+    python -m app.encoders export --out data/onnx
+"""
+import argparse
+import json
+import os
+from typing import List, Optional
+import numpy as np
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "data/onnx")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 = ONNX Runtime default
+
+BACKENDS = ("sentence-transformers", "onnx", "onnx-int8")
+
+_ONNX_FILES = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+
+
+def _l2_normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.where(norms == 0, 1.0, norms)
+
+
+class SentenceTransformerEncoder:
+    backend = "sentence-transformers"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        # Reference backend keeps the bare model name so existing persisted indexes stay valid
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, normalize_embeddings: bool = True, **kwargs):
+        return self.model.encode(
+            texts, convert_to_numpy=True, normalize_embeddings=normalize_embeddings, **kwargs
+        ).astype(np.float32, copy=False)
+
+
+class OnnxEncoder:
+    """
+    Mean-pooled transformer embeddings computed with ONNX Runtime on CPU.
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantized: bool = False, batch_size: int = 32):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError(
+                "The onnx embedding backends need `onnxruntime` and `tokenizers` "
+                "(pip install onnxruntime tokenizers)."
+            ) from e
+
+        self.backend = "onnx-int8" if quantized else "onnx"
+        path = os.path.join(model_dir, _ONNX_FILES[self.backend])
+        config_path = os.path.join(model_dir, "encoder_config.json")
+        if not os.path.exists(path) or not os.path.exists(config_path):
+            raise RuntimeError(
+                f"No exported ONNX model in {model_dir!r}; run `python -m app.encoders export --out {model_dir}`."
+            )
+        with open(config_path) as f:
+            config = json.load(f)
+
+        self.model_name = config["model_name"]
+        self.name = f"{self.model_name}:{self.backend}"
+        self.dim = int(config["dim"])
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(int(config["max_seq_length"]))
+        self.tokenizer.enable_padding(pad_id=int(config["pad_token_id"]), pad_token=config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        hidden = self.session.run(None, feeds)[0]
+
+        mask = attention_mask[:, :, None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, normalize_embeddings: bool = True, **kwargs):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        out = np.vstack([
+            self._encode_batch(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]).astype(np.float32)
+        return _l2_normalize(out) if normalize_embeddings else out
+
+
+def load_encoder(backend: str = EMBEDDING_BACKEND, model_name: str = EMBEDDING_MODEL, model_dir: str = ONNX_MODEL_DIR):
+    if backend == "sentence-transformers":
+        return SentenceTransformerEncoder(model_name)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEncoder(model_dir, quantized=backend == "onnx-int8")
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; expected one of {BACKENDS}")
+
+
+def export_onnx(model_name: str = EMBEDDING_MODEL, out_dir: str = ONNX_MODEL_DIR, quantize: bool = True, opset: int = 14):
+    """
+    Export the transformer of a sentence-transformers model to ONNX (+ int8 variant).
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(out_dir, exist_ok=True)
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer = st[0].auto_model.eval()
+    tokenizer = st.tokenizer
+
+    sample = tokenizer(["export sample text"], return_tensors="pt", padding=True)
+    input_names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in sample]
+    dynamic = {k: {0: "batch", 1: "sequence"} for k in input_names + ["last_hidden_state"]}
+    path = os.path.join(out_dir, _ONNX_FILES["onnx"])
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[k] for k in input_names),
+            path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=opset,
+        )
+
+    tokenizer.save_pretrained(out_dir)  # writes tokenizer.json for the fast tokenizer
+    with open(os.path.join(out_dir, "encoder_config.json"), "w") as f:
+        json.dump({
+            "model_name": model_name,
+            "dim": st.get_sentence_embedding_dimension(),
+            "max_seq_length": st.max_seq_length,
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id,
+            "pooling": "mean",
+        }, f, indent=2)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(path, os.path.join(out_dir, _ONNX_FILES["onnx-int8"]), weight_type=QuantType.QInt8)
+    print(f"Exported {model_name} to {out_dir}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Embedding encoder utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="export the model to ONNX (+ int8)")
+    export.add_argument("--model", default=EMBEDDING_MODEL)
+    export.add_argument("--out", default=ONNX_MODEL_DIR)
+    export.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_onnx(args.model, args.out, quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
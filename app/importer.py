@@ -0,0 +1,318 @@
+import csv
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+
+from .catalogue_feed import record_changes
+from .db import engine
+from .models import Product
+from .orm_models import ProductORM
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))  # kept in the report
+
+FORMATS = ("jsonl", "csv")
+PRODUCT_FIELDS = tuple(Product.__annotations__)
+# Product fields that are lists: CSV cells hold a JSON array or "a|b|c"
+LIST_FIELDS = ("constructs", "use_cases", "job_levels", "job_families", "languages", "tags")
+PRODUCTS = ProductORM.__table__
+
+Record = Tuple[int, Dict[str, Any]]  # (line number, raw row)
+Progress = Callable[["ImportReport"], None]
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    valid: int = 0
+    invalid: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    batches: int = 0
+    elapsed_s: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.elapsed_s if self.elapsed_s else 0.0
+
+    def as_dict(self) -> dict:
+        return dict(asdict(self), rows_per_s=round(self.rows_per_s, 1))
+
+
+def detect_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"Cannot tell the format of {path!r}; pass jsonl or csv")
+
+
+def open_text(path: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def iter_jsonl(stream: IO[str]) -> Iterator[Record]:
+    for line_no, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, {"__error__": f"invalid JSON: {e}"}
+
+
+def _csv_list(value: str) -> List[str]:
+    value = value.strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [v.strip() for v in value.split("|") if v.strip()]
+
+
+def iter_csv(stream: IO[str]) -> Iterator[Record]:
+    reader = csv.DictReader(stream)
+    for row in reader:
+        # Line of the row's last physical line (quoted cells may span several)
+        line_no = reader.line_num
+        try:
+            yield line_no, {
+                k: _csv_list(v) if k in LIST_FIELDS and v is not None else v
+                for k, v in row.items()
+                if k is not None and v not in (None, "")
+            }
+        except json.JSONDecodeError as e:
+            yield line_no, {"__error__": f"invalid list cell: {e}"}
+
+
+def iter_records(stream: IO[str], fmt: str) -> Iterator[Record]:
+    if fmt == "jsonl":
+        return iter_jsonl(stream)
+    if fmt == "csv":
+        return iter_csv(stream)
+    raise ValueError(f"Unsupported format {fmt!r} (expected one of {FORMATS})")
+
+
+def _stored(row) -> Optional[Dict[str, Any]]:
+    try:
+        return Product.from_row(row).dict()
+    except ValidationError:
+        return None  # invalid in the database: always overwritten
+
+
+def upsert_products(conn: Connection, products: List[Product], now: datetime) -> Tuple[int, int, int]:
+    """
+    Insert new products and update changed ones with one INSERT ... ON CONFLICT
+    (product_id) DO UPDATE; identical rows are not written, so they keep their
+    `updated_at` (and the vector store does not re-embed them). Written ids go to
+    the change feed in the same transaction, so workers reload just those. Returns
+    (inserted, updated, unchanged).
+    """
+    rows = {p.product_id: p.dict() for p in products}  # last occurrence of an id wins
+    cols = [PRODUCTS.c[f] for f in PRODUCT_FIELDS]
+    # Stored rows go through Product too, so both sides compare normalised (NULL tags == [])
+    existing = {
+        r.product_id: _stored(r._mapping)
+        for r in conn.execute(select(*cols).where(PRODUCTS.c.product_id.in_(list(rows))))
+    }
+    new = [pid for pid in rows if pid not in existing]
+    changed = [pid for pid in rows if pid in existing and existing[pid] != rows[pid]]
+    write = [dict(rows[pid], updated_at=now) for pid in new + changed]
+    if write:
+        if conn.dialect.name == "postgresql":
+            insert = postgresql.insert
+        elif conn.dialect.name == "sqlite":
+            insert = sqlite.insert
+        else:
+            raise NotImplementedError(f"product upserts are not supported on {conn.dialect.name}")
+        stmt = insert(PRODUCTS)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PRODUCTS.c.product_id],
+            set_={name: stmt.excluded[name] for name in PRODUCT_FIELDS + ("updated_at",) if name != "product_id"},
+        )
+        # executemany: one cached statement, batched by the driver (no huge VALUES compile)
+        conn.execute(stmt, write)
+        record_changes(conn, upserted=new + changed)
+    return len(new), len(changed), len(rows) - len(new) - len(changed)
+
+
+def import_products(
+    stream: IO[str],
+    fmt: str,
+    bind: Engine = engine,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    dry_run: bool = False,
+    progress: Optional[Progress] = None,
+    max_errors: int = IMPORT_MAX_ERRORS,
+) -> ImportReport:
+    """
+    Stream-parse `stream`, validate each row against `Product` and upsert valid rows
+    in batches of `batch_size`, one transaction per batch. Invalid rows are counted
+    and reported (up to `max_errors` messages) without stopping the import. Memory
+    use is bounded by one batch. `progress` is called after every batch.
+    """
+    report = ImportReport()
+    t0 = time.perf_counter()
+    # One timestamp for the whole import: the catalogue version changes once
+    now = datetime.now(timezone.utc)
+    batch: List[Product] = []
+
+    def flush():
+        if batch and not dry_run:
+            with bind.begin() as conn:
+                inserted, updated, unchanged = upsert_products(conn, batch, now)
+            report.inserted += inserted
+            report.updated += updated
+            report.unchanged += unchanged
+        report.batches += 1
+        report.elapsed_s = time.perf_counter() - t0
+        batch.clear()
+        if progress is not None:
+            progress(report)
+
+    for line_no, record in iter_records(stream, fmt):
+        report.rows += 1
+        try:
+            if "__error__" in record:
+                raise ValueError(record["__error__"])
+            batch.append(Product(**record))
+            report.valid += 1
+        except (ValidationError, ValueError, TypeError) as e:
+            report.invalid += 1
+            if len(report.errors) < max_errors:
+                report.errors.append(f"line {line_no}: {_error_message(e)}")
+        if len(batch) >= batch_size:
+            flush()
+    if batch or report.batches == 0:
+        flush()
+    report.elapsed_s = time.perf_counter() - t0
+    return report
+
+
+def _error_message(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(str(x) for x in err['loc'])}: {err['msg']}" for err in e.errors())
+    return str(e)
+
+
+def import_file(path: str, fmt: Optional[str] = None, **kwargs) -> ImportReport:
+    with open_text(path) as stream:
+        return import_products(stream, fmt or detect_format(path), **kwargs)
+
+
+class ImportJob:
+    """
+    One import run in a background thread, with progress readable while it runs.
+    """
+
+    def __init__(self, fmt: str, dry_run: bool = False, batch_size: int = IMPORT_BATCH_SIZE):
+        self.id = uuid.uuid4().hex[:12]
+        self.fmt = fmt
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.state = "pending"  # pending -> running -> done | failed
+        self.error: Optional[str] = None
+        # The import committed but the catalogue reload after it failed (state stays "done")
+        self.refresh_error: Optional[str] = None
+        self.report = ImportReport()
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+
+    def _progress(self, report: ImportReport):
+        self.report = report
+
+    def run(self, stream: IO[str], on_done: Optional[Callable[["ImportJob"], None]] = None):
+        self.state = "running"
+        try:
+            with stream:
+                self.report = import_products(
+                    stream, self.fmt, batch_size=self.batch_size, dry_run=self.dry_run, progress=self._progress
+                )
+        except Exception as e:
+            self.state = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+            self.finished_at = datetime.now(timezone.utc)
+            return
+        if on_done is not None:
+            try:
+                on_done(self)
+            except Exception as e:
+                self.refresh_error = f"{type(e).__name__}: {e}"
+        self.state = "done"
+        self.finished_at = datetime.now(timezone.utc)
+
+    def start(self, stream: IO[str], on_done: Optional[Callable[["ImportJob"], None]] = None):
+        threading.Thread(target=self.run, args=(stream, on_done), name=f"import-{self.id}", daemon=True).start()
+
+    def stats(self) -> dict:
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "format": self.fmt,
+            "dry_run": self.dry_run,
+            "error": self.error,
+            "refresh_error": self.refresh_error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "report": self.report.as_dict(),
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Bulk-import a product catalogue, then bring the persisted vector index up to date
+    (only new or changed products are embedded).
+
+        python -m app.importer products.jsonl[.gz] [--format csv] [--batch-size 1000]
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk-import products from JSON Lines or CSV.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="validate only, write nothing")
+    parser.add_argument("--no-reindex", action="store_true", help="skip the vector index update")
+    args = parser.parse_args(argv)
+
+    from .catalogue import upgrade_products_table
+    from .db import Base
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        upgrade_products_table(conn)
+
+    def progress(r: ImportReport):
+        print(
+            f"\r{r.rows} rows ({r.invalid} invalid): {r.inserted} inserted, {r.updated} updated, "
+            f"{r.unchanged} unchanged  {r.rows_per_s:,.0f} rows/s",
+            end="", flush=True,
+        )
+
+    report = import_file(args.path, args.format, batch_size=args.batch_size, dry_run=args.dry_run, progress=progress)
+    print()
+    for message in report.errors:
+        print(f"  {message}")
+    print(json.dumps({k: v for k, v in report.as_dict().items() if k != "errors"}))
+
+    if not (args.dry_run or args.no_reindex) and (report.inserted or report.updated):
+        from .vector_store import main as vector_store_main
+
+        vector_store_main(["build"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import os
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .models import Product
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Name tokens are repeated this many times: a cheap field boost (BM25F-style)
+BM25_NAME_BOOST = int(os.getenv("BM25_NAME_BOOST", "2"))
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or the to with "
+    "we you our your will who this that".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def product_tokens(p: Product, name_boost: int = BM25_NAME_BOOST) -> List[str]:
+    """
+    Indexed text of a product: product_id, name (boosted), description, constructs, tags.
+    """
+    return (
+        tokenize(p.product_id)
+        + tokenize(p.name) * name_boost
+        + tokenize(p.description)
+        + tokenize(" ".join(p.constructs))
+        + tokenize(" ".join(p.tags or []))
+    )
+
+
+class BM25Index:
+    """
+    In-process inverted index with Okapi BM25 scoring over a product list.
+
+    Postings are stored term-major in flat arrays (CSR layout): for term t,
+    `docs[offsets[t]:offsets[t+1]]` are product positions and `weights[...]` their
+    precomputed idf * tf-saturation, so a query is a few vector adds.
+    Positions match the product list it was built from (the vector store's rows).
+
+    Each product's term ids are kept too (`terms[starts[i]:starts[i] + lengths[i]]`):
+    built with `previous=`, products carried over as the same objects reuse them
+    instead of being tokenized again, so a small catalogue change only tokenizes the
+    changed products. Term ids are stable across such rebuilds; terms of removed
+    products keep an empty posting list until an index is built without `previous`.
+    """
+
+    def __init__(
+        self,
+        products: Sequence[Product],
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+        previous: Optional["BM25Index"] = None,
+    ):
+        self.products = list(products)
+        self.size = len(self.products)
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = dict(previous.vocab) if previous is not None else {}
+
+        reuse = np.full(self.size, -1, dtype=np.int64)
+        if previous is not None:
+            rows = {p.product_id: r for r, p in enumerate(previous.products)}
+            for i, p in enumerate(self.products):
+                r = rows.get(p.product_id)
+                if r is not None and previous.products[r] is p:
+                    reuse[i] = r
+        carried = np.flatnonzero(reuse >= 0)
+
+        self.lengths = np.zeros(self.size, dtype=np.int64)
+        self.starts = np.zeros(self.size, dtype=np.int64)
+        parts: List[np.ndarray] = []
+        doc_parts: List[np.ndarray] = []
+        if len(carried):
+            old = reuse[carried]
+            counts = previous.lengths[old]
+            first = np.zeros(len(carried), dtype=np.int64)
+            np.cumsum(counts[:-1], out=first[1:])
+            within = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(first, counts)
+            parts.append(previous.terms[np.repeat(previous.starts[old], counts) + within])
+            doc_parts.append(np.repeat(carried, counts))
+            self.lengths[carried] = counts
+            self.starts[carried] = first
+        base = sum(len(part) for part in parts)
+
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        vocab = self.vocab
+        for i in np.flatnonzero(reuse < 0).tolist():
+            tokens = product_tokens(self.products[i])
+            self.lengths[i] = len(tokens)
+            self.starts[i] = base + len(term_ids)
+            for t in tokens:
+                tid = vocab.get(t)
+                if tid is None:
+                    tid = vocab[t] = len(vocab)
+                term_ids.append(tid)
+            doc_ids.extend([i] * len(tokens))
+        parts.append(np.asarray(term_ids, dtype=np.int32))
+        doc_parts.append(np.asarray(doc_ids, dtype=np.int64))
+        self.terms = np.concatenate(parts)
+
+        n_terms = len(self.vocab)
+        if not len(self.terms):
+            self.offsets = np.zeros(n_terms + 1, dtype=np.int64)
+            self.docs = np.zeros(0, dtype=np.int32)
+            self.weights = np.zeros(0, dtype=np.float32)
+            return
+
+        # (term, doc) pairs -> term frequency, sorted term-major
+        keys = self.terms.astype(np.int64) * max(self.size, 1) + np.concatenate(doc_parts)
+        pairs, tf = np.unique(keys, return_counts=True)
+        terms = pairs // max(self.size, 1)
+        docs = pairs % max(self.size, 1)
+
+        df = np.bincount(terms, minlength=n_terms)
+        idf = np.log1p((self.size - df + 0.5) / (df + 0.5))
+        lengths = self.lengths.astype(np.float64)
+        avgdl = lengths.mean() if self.size else 0.0
+        norm = k1 * (1 - b + b * lengths[docs] / (avgdl or 1.0))
+        self.weights = (idf[terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+        self.docs = docs.astype(np.int32)
+        self.offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(df, out=self.offsets[1:])
+
+    def scores(self, text: str) -> np.ndarray:
+        """
+        BM25 score of every product for `text` (0 where no query term occurs).
+        """
+        out = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(text)):
+            tid = self.vocab.get(term)
+            if tid is not None:
+                lo, hi = self.offsets[tid], self.offsets[tid + 1]
+                out[self.docs[lo:hi]] += self.weights[lo:hi]
+        return out
+
+    def top(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Positions of the `k` best-scoring products with a positive score, best first.
+        """
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        return hits[np.argsort(-scores[hits], kind="stable")]
+
+
+def _ranks(values: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """
+    1-based rank of each entry by descending value; absent entries get rank inf.
+    """
+    ranks = np.full(len(values), np.inf)
+    idx = np.flatnonzero(present)
+    order = idx[np.argsort(-values[idx], kind="stable")]
+    ranks[order] = np.arange(1, len(order) + 1)
+    return ranks
+
+
+def fuse(
+    semantic: np.ndarray,
+    lexical: np.ndarray,
+    method: str = "rrf",
+    alpha: float = 0.7,
+    rrf_k: int = 60,
+) -> np.ndarray:
+    """
+    Fuse per-candidate semantic (cosine) and lexical (BM25) scores into one relevance
+    score in roughly [0, 1]:
+      * "weighted": alpha * cosine + (1 - alpha) * BM25 / max BM25
+      * "rrf": reciprocal-rank fusion, sum of 1 / (rrf_k + rank) over both rankings,
+        scaled so that ranking first in both gives 1
+    Candidates without a lexical match (BM25 = 0) get no lexical contribution.
+    """
+    if method == "weighted":
+        top = lexical.max() if len(lexical) else 0.0
+        lex = lexical / top if top > 0 else np.zeros_like(lexical)
+        return alpha * semantic + (1 - alpha) * lex
+    if method == "rrf":
+        everywhere = np.ones(len(semantic), dtype=bool)
+        fused = 1.0 / (rrf_k + _ranks(semantic, everywhere)) + 1.0 / (rrf_k + _ranks(lexical, lexical > 0))
+        return fused * (rrf_k + 1) / 2
+    raise ValueError(f"Unknown fusion method {method!r} (expected 'rrf' or 'weighted')")
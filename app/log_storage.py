@@ -0,0 +1,468 @@
+import csv
+import io
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, insert, text
+from sqlalchemy.engine import Engine
+
+from .analytics import backfill_rollups, expire_hourly_rollups, update_rollups
+from .db import engine
+from .orm_models import RecommendationLogORM, RecommendationRollupORM
+
+# "copy" streams batches through Postgres COPY; other databases (and "insert") use a bulk INSERT
+LOG_WRITE_METHOD = os.getenv("LOG_WRITE_METHOD", "copy")
+# Daily range partitions on `timestamp` (Postgres only)
+LOG_PARTITIONING = os.getenv("LOG_PARTITIONING", "1") == "1"
+LOG_PARTITION_PREMAKE_DAYS = int(os.getenv("LOG_PARTITION_PREMAKE_DAYS", "3"))
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "90"))  # 0 = keep forever
+# Rows the database rejected are appended here and replayed once it is back
+LOG_SPILL_PATH = os.getenv("LOG_SPILL_PATH", "data/log_spill.jsonl")
+LOG_REPLAY_CHUNK = int(os.getenv("LOG_REPLAY_CHUNK", "1000"))
+# Maintain the hourly/daily analytics rollups in the same transaction as each write
+LOG_ROLLUPS = os.getenv("LOG_ROLLUPS", "1") == "1"
+
+TABLE = RecommendationLogORM.__tablename__
+COLUMNS = [c.name for c in RecommendationLogORM.__table__.columns if c.name != "id"]
+_PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{8}})$")
+
+# The ORM model has a single-column primary key; a partitioned table needs the partition
+# key in every unique constraint, so Postgres gets its own DDL
+_PARTITIONED_DDL = f"""
+CREATE TABLE {TABLE} (
+    id BIGSERIAL,
+    timestamp TIMESTAMPTZ NOT NULL DEFAULT now(),
+    job_title VARCHAR(255),
+    job_family VARCHAR(100),
+    job_level VARCHAR(50),
+    use_case VARCHAR(50),
+    volume VARCHAR(50),
+    bundle_id VARCHAR(50),
+    total_duration_min INTEGER,
+    constructs_covered JSON,
+    request_json JSON,
+    products_json JSON,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp)
+"""
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def _encode_row(row: Dict[str, Any]) -> str:
+    return json.dumps(dict(row, timestamp=_utc(row["timestamp"]).isoformat()))
+
+
+def _decode_row(line: str) -> Dict[str, Any]:
+    row = json.loads(line)
+    row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    return row
+
+
+@contextmanager
+def _spill_lock(f, blocking: bool = True):
+    """
+    Exclusive lock on an open spill file, shared by every worker process: `flock`
+    on POSIX, a one-byte `msvcrt.locking` region on Windows, and no lock (only
+    safe for a single process) where neither exists. Yields False when
+    `blocking=False` and another process holds it.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    if fcntl is not None:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+        return
+
+    try:
+        import msvcrt
+    except ImportError:
+        yield True
+        return
+    # msvcrt locks the bytes from the current position; lock byte 0 whatever the mode
+    pos = f.tell()
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            break
+        except OSError:
+            if not blocking:
+                f.seek(pos)
+                yield False
+                return
+            # LK_LOCK gives up after ~10 s: keep waiting, like flock
+    f.seek(pos)
+    try:
+        yield True
+    finally:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        f.seek(pos)
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return _utc(value).isoformat()
+    return value
+
+
+class LogStorage:
+    """
+    Writes recommendation-log rows in bulk and manages their table.
+
+    On Postgres the table is range-partitioned by day on `timestamp` (an existing
+    unpartitioned table is migrated once), partitions are created ahead of time and
+    dropped whole once they fall out of `retention_days`. Elsewhere retention is a
+    DELETE. Each write also updates the analytics rollups in the same transaction. A
+    batch that cannot be written is appended to a local JSONL spill file and replayed,
+    at least once, after the next successful write or maintenance run.
+    """
+
+    def __init__(
+        self,
+        bind: Engine = engine,
+        method: str = LOG_WRITE_METHOD,
+        partitioning: bool = LOG_PARTITIONING,
+        premake_days: int = LOG_PARTITION_PREMAKE_DAYS,
+        retention_days: int = LOG_RETENTION_DAYS,
+        spill_path: str = LOG_SPILL_PATH,
+        replay_chunk: int = LOG_REPLAY_CHUNK,
+        rollups: bool = LOG_ROLLUPS,
+    ):
+        self.bind = bind
+        self.method = method
+        self.premake_days = premake_days
+        self.retention_days = retention_days
+        self.spill_path = spill_path
+        self.replay_chunk = replay_chunk
+        self.rollups = rollups
+        self.partitioned = partitioning and bind.dialect.name == "postgresql"
+        self._partitions: Set[date] = set()
+        self._lock = threading.Lock()
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.corrupt = 0
+        self.retention_removed = 0
+
+    # ------------------------------------------------------------------ schema
+
+    def prepare(self):
+        """
+        Create (or migrate to) the partitioned table, premake partitions, backfill the
+        rollups and replay any spilled rows. Runs before `create_all`, which then leaves
+        the tables alone.
+        """
+        if self.partitioned:
+            with self.bind.begin() as conn:
+                # Serialise schema changes between API workers starting together
+                conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:t))"), {"t": TABLE})
+                kind = conn.execute(
+                    text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": TABLE}
+                ).scalar()
+                if kind is None:
+                    conn.execute(text(_PARTITIONED_DDL))
+                    conn.execute(text(f"CREATE INDEX ix_{TABLE}_timestamp ON {TABLE} (timestamp)"))
+                elif kind != "p":
+                    self._migrate(conn)
+            self.ensure_partitions(self._premake_days())
+        else:
+            RecommendationLogORM.__table__.create(self.bind, checkfirst=True)
+        if self.rollups:
+            RecommendationRollupORM.__table__.create(self.bind, checkfirst=True)
+            with self.bind.begin() as conn:
+                if self.partitioned:
+                    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:t))"), {"t": TABLE})
+                # Logs written before rollups existed (no-op once the table has rows)
+                backfill_rollups(conn)
+        try:
+            self.replay_spill()
+        except Exception as e:
+            print(f"Warning: could not replay spilled recommendation logs: {e}")
+
+    def _migrate(self, conn):
+        legacy = f"{TABLE}_unpartitioned"
+        print(f"Migrating {TABLE} to daily partitions")
+        conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {legacy}"))
+        # Index, constraint and sequence names keep the old table name and would clash
+        for index in (f"{TABLE}_pkey", f"ix_{TABLE}_id", f"ix_{TABLE}_timestamp"):
+            renamed = index.replace(TABLE, legacy)
+            conn.execute(text(f"ALTER INDEX IF EXISTS {index} RENAME TO {renamed}"))
+        conn.execute(text(f"ALTER SEQUENCE IF EXISTS {TABLE}_id_seq RENAME TO {legacy}_id_seq"))
+        conn.execute(text(_PARTITIONED_DDL))
+        conn.execute(text(f"CREATE INDEX ix_{TABLE}_timestamp ON {TABLE} (timestamp)"))
+        cutoff = self._cutoff()
+        where = "WHERE COALESCE(timestamp, now()) >= :cutoff" if cutoff else ""
+        params = {"cutoff": cutoff} if cutoff else {}
+        lo, hi = conn.execute(
+            text(f"SELECT min(COALESCE(timestamp, now())), max(COALESCE(timestamp, now())) FROM {legacy} {where}"),
+            params,
+        ).one()
+        if lo is not None:
+            days = [_utc(lo).date() + timedelta(days=i) for i in range((_utc(hi).date() - _utc(lo).date()).days + 1)]
+            self._create_partitions(conn, days)
+        cols = ", ".join(["id"] + COLUMNS)
+        select = ", ".join(["id", "COALESCE(timestamp, now())"] + COLUMNS[1:])
+        conn.execute(text(f"INSERT INTO {TABLE} ({cols}) SELECT {select} FROM {legacy} {where}"), params)
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), COALESCE((SELECT max(id) FROM {TABLE}), 0) + 1, false)"
+        ))
+        conn.execute(text(f"DROP TABLE {legacy}"))
+
+    def _premake_days(self) -> List[date]:
+        today = datetime.now(timezone.utc).date()
+        return [today + timedelta(days=i) for i in range(self.premake_days + 1)]
+
+    def ensure_partitions(self, days: Iterable[date]):
+        if not self.partitioned:
+            return
+        with self._lock:
+            missing = sorted(set(days) - self._partitions)
+        if not missing:
+            return
+        with self.bind.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:t))"), {"t": TABLE})
+            self._create_partitions(conn, missing)
+
+    def _create_partitions(self, conn, days: Iterable[date]):
+        created = []
+        for day in days:
+            lo = datetime.combine(day, time(), timezone.utc)
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {TABLE}_p{day:%Y%m%d} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{(lo + timedelta(days=1)).isoformat()}')"
+            ))
+            created.append(day)
+        with self._lock:
+            self._partitions.update(created)
+
+    def partitions(self) -> List[date]:
+        if not self.partitioned:
+            return []
+        with self.bind.connect() as conn:
+            names = conn.execute(
+                text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                     "WHERE i.inhparent = to_regclass(:t)"),
+                {"t": TABLE},
+            ).scalars()
+            matches = [_PARTITION_NAME.match(n) for n in names]
+        return sorted(datetime.strptime(m.group(1), "%Y%m%d").date() for m in matches if m)
+
+    # --------------------------------------------------------------- retention
+
+    def _cutoff(self) -> Optional[datetime]:
+        if self.retention_days <= 0:
+            return None
+        today = datetime.combine(datetime.now(timezone.utc).date(), time(), timezone.utc)
+        return today - timedelta(days=self.retention_days)
+
+    def apply_retention(self) -> int:
+        """
+        Remove logs older than `retention_days`: whole partitions on Postgres, a DELETE
+        otherwise. Returns the number of partitions dropped or rows deleted.
+        """
+        cutoff = self._cutoff()
+        if cutoff is None:
+            return 0
+        if not self.partitioned:
+            with self.bind.begin() as conn:
+                removed = conn.execute(
+                    delete(RecommendationLogORM).where(RecommendationLogORM.timestamp < cutoff)
+                ).rowcount
+        else:
+            expired = [d for d in self.partitions() if d < cutoff.date()]
+            with self.bind.begin() as conn:
+                for day in expired:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}_p{day:%Y%m%d}"))
+            with self._lock:
+                self._partitions.difference_update(expired)
+            removed = len(expired)
+        self.retention_removed += removed
+        return removed
+
+    def maintain(self):
+        """
+        Periodic housekeeping: premake partitions, apply retention (logs and hourly
+        rollups), replay the spill file.
+        """
+        self.ensure_partitions(self._premake_days())
+        self.apply_retention()
+        if self.rollups:
+            with self.bind.begin() as conn:
+                expire_hourly_rollups(conn)
+        self.replay_spill()
+
+    # ------------------------------------------------------------------ writes
+
+    def write(self, rows: List[Dict[str, Any]]):
+        """
+        Write rows in one transaction; raises if the database rejects them.
+        """
+        if not rows:
+            return
+        self.ensure_partitions({_utc(r["timestamp"]).date() for r in rows})
+        with self.bind.begin() as conn:
+            if self.method == "copy" and self.bind.dialect.name == "postgresql":
+                self._copy(conn, rows)
+            else:
+                conn.execute(insert(RecommendationLogORM), rows)
+            # Same transaction: rollups never count rows that were not stored (or miss ones that were)
+            if self.rollups:
+                update_rollups(conn, rows)
+
+    def _copy(self, conn, rows: List[Dict[str, Any]]):
+        buf = io.StringIO()
+        # QUOTE_NONNUMERIC keeps "" distinct from NULL (None is written unquoted)
+        writer = csv.writer(buf, quoting=csv.QUOTE_NONNUMERIC)
+        for row in rows:
+            writer.writerow([_csv_value(row.get(c)) for c in COLUMNS])
+        sql = f"COPY {TABLE} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+        cur = conn.connection.driver_connection.cursor()
+        try:
+            if hasattr(cur, "copy_expert"):  # psycopg2
+                buf.seek(0)
+                cur.copy_expert(sql, buf)
+            else:  # psycopg 3
+                with cur.copy(sql) as copy:
+                    copy.write(buf.getvalue())
+        finally:
+            cur.close()
+
+    def write_or_spill(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Write rows, or append them to the spill file if the database is unavailable.
+        A successful write also replays anything spilled earlier.
+        """
+        try:
+            self.write(rows)
+        except Exception as e:
+            print(f"Warning: failed to write {len(rows)} recommendation logs ({e}); spilling to {self.spill_path}")
+            self.spill(rows)
+            return False
+        self.written += len(rows)
+        if self.spill_pending():
+            try:
+                self.replay_spill()
+            except Exception as e:
+                print(f"Warning: could not replay spilled recommendation logs: {e}")
+        return True
+
+    # ------------------------------------------------------------------- spill
+
+    def spill(self, rows: List[Dict[str, Any]]):
+        try:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            data = "".join(_encode_row(r) + "\n" for r in rows)
+            with open(self.spill_path, "a", encoding="utf-8") as f, _spill_lock(f):
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.spilled += len(rows)
+        except OSError as e:
+            self.dropped += len(rows)
+            print(f"Warning: dropped {len(rows)} recommendation logs, spill file unavailable: {e}")
+
+    def spill_pending(self) -> bool:
+        try:
+            return os.path.getsize(self.spill_path) > 0
+        except OSError:
+            return False
+
+    def replay_spill(self) -> int:
+        """
+        Write spilled rows back in chunks. Rows still unwritten when the database fails
+        again stay in the file. Another process already replaying means this one skips.
+        """
+        if not self.spill_pending():
+            return 0
+        done = replayed = 0
+        with open(self.spill_path, "r+", encoding="utf-8") as f, _spill_lock(f, blocking=False) as locked:
+            if not locked:
+                return 0
+            lines = [line for line in f.read().splitlines() if line.strip()]
+            try:
+                for start in range(0, len(lines), self.replay_chunk):
+                    chunk = lines[start:start + self.replay_chunk]
+                    rows = []
+                    for line in chunk:
+                        try:
+                            rows.append(_decode_row(line))
+                        except (ValueError, KeyError):
+                            self.corrupt += 1  # e.g. a line torn by a crash mid-append
+                    self.write(rows)
+                    done += len(chunk)
+                    replayed += len(rows)
+            finally:
+                rest = lines[done:]
+                f.seek(0)
+                f.truncate()
+                if rest:
+                    f.write("\n".join(rest) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self.replayed += replayed
+        return replayed
+
+    def stats(self) -> dict:
+        try:
+            spill_bytes = os.path.getsize(self.spill_path)
+        except OSError:
+            spill_bytes = 0
+        return {
+            "method": "copy" if self.method == "copy" and self.bind.dialect.name == "postgresql" else "insert",
+            "partitioned": self.partitioned,
+            "retention_days": self.retention_days,
+            "written": self.written,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+            "corrupt": self.corrupt,
+            "retention_removed": self.retention_removed,
+            "spill_bytes": spill_bytes,
+        }
+
+
+def main():
+    import argparse
+
+    from .db import Base
+
+    parser = argparse.ArgumentParser(description="Recommendation-log storage maintenance.")
+    parser.add_argument("command", choices=["prepare", "maintain", "rebuild-rollups", "stats"])
+    args = parser.parse_args()
+
+    storage = LogStorage()
+    if args.command == "prepare":
+        storage.prepare()
+        Base.metadata.create_all(bind=engine)
+    elif args.command == "maintain":
+        storage.maintain()
+    elif args.command == "rebuild-rollups":
+        # Stop the API first: rows logged during the rebuild could be counted twice
+        with engine.begin() as conn:
+            print(f"{backfill_rollups(conn, rebuild=True)} rollup rows")
+    print(json.dumps(dict(storage.stats(), partitions=[d.isoformat() for d in storage.partitions()]), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from .concurrency import Overloaded
+from .log_storage import LogStorage
+from .metrics import span
+from .models import RecommendationRequest, RecommendationResponse
+from .recommender import log_row
+
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_SECONDS = float(os.getenv("LOG_FLUSH_SECONDS", "1.0"))
+LOG_MAINTENANCE_SECONDS = float(os.getenv("LOG_MAINTENANCE_SECONDS", "3600"))
+
+LogItem = Tuple[RecommendationRequest, RecommendationResponse]
+# Queued entries carry the time of the recommendation, not of the flush
+_Entry = Tuple[datetime, RecommendationRequest, RecommendationResponse]
+
+
+class RecommendationLogWriter:
+    """
+    Background queue for recommendation logs. Requests enqueue and return immediately;
+    a single task drains the queue and flushes a batch once it reaches `batch_size` rows
+    or `flush_seconds` have passed, via `LogStorage` (COPY / bulk INSERT, spill file
+    when the database is down). A second task runs partition and retention maintenance.
+    A full queue raises `Overloaded` so the API can shed load with a 503.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = LOG_QUEUE_SIZE,
+        batch_size: int = LOG_BATCH_SIZE,
+        flush_seconds: float = LOG_FLUSH_SECONDS,
+        maintenance_seconds: float = LOG_MAINTENANCE_SECONDS,
+        storage: Optional[LogStorage] = None,
+    ):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.maintenance_seconds = maintenance_seconds
+        self.storage = storage or LogStorage()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._maintenance: Optional[asyncio.Task] = None
+        # Items taken off the queue but not yet handed to a flush
+        self._batch: List[_Entry] = []
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self):
+        if self._task is None:
+            loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._task = loop.create_task(self._run())
+            self._maintenance = loop.create_task(self._maintain())
+
+    async def stop(self):
+        """
+        Stop the writer after flushing everything still queued.
+        """
+        if self._task is None:
+            return
+        self._maintenance.cancel()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        remaining, self._batch = self._batch, []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        if remaining:
+            await self._flush(remaining)
+        self._task = None
+        self._maintenance = None
+        self._queue = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def ensure_capacity(self, n: int = 1):
+        if self._queue is not None and self._queue.maxsize - self._queue.qsize() < n:
+            raise Overloaded("Recommendation log queue is full")
+
+    def submit(self, req: RecommendationRequest, resp: RecommendationResponse):
+        self.submit_many([(req, resp)])
+
+    def submit_many(self, items: List[LogItem]):
+        if not items:
+            return
+        now = datetime.now(timezone.utc)
+        entries = [(now, req, resp) for req, resp in items]
+        if self._queue is None:
+            # Writer not running (e.g. outside the app lifecycle): write synchronously
+            self._write(entries)
+            return
+        self.ensure_capacity(len(items))
+        for entry in entries:
+            self._queue.put_nowait(entry)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch.append(await self._queue.get())
+            deadline = loop.time() + self.flush_seconds
+            while len(self._batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._batch = self._batch, []
+            await self._flush(batch)
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self.maintenance_seconds)
+            try:
+                await run_in_threadpool(self.storage.maintain)
+            except Exception as e:
+                print(f"Warning: recommendation log maintenance failed: {e}")
+
+    async def _flush(self, batch: List[_Entry]):
+        await run_in_threadpool(self._write, batch)
+
+    def _write(self, batch: List[_Entry]):
+        rows = [log_row(req, resp, ts) for ts, req, resp in batch]
+        self.batches += 1
+        with span("log_write"):
+            ok = self.storage.write_or_spill(rows)
+        if ok:
+            self.written += len(batch)
+        else:
+            self.failed += len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "maxsize": self.maxsize,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "storage": self.storage.stats(),
+        }
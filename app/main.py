@@ -1,16 +1,59 @@
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+import base64
+import hashlib
+import io
+import json
+import os
+import asyncio
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from starlette.concurrency import run_in_threadpool
 
-from .db import get_db, Base, engine
-from .orm_models import ProductORM, RecommendationLogORM
-from .models import RecommendationRequest, RecommendationResponse, Product
-from .catalogue import seed_products_if_empty
+from .db import Base, engine, SessionLocal, close_async_engine, get_async_engine, pool_stats
+from .models import (
+    RecommendationRequest,
+    RecommendationResponse,
+    Product,
+    BatchRecommendationRequest,
+    BatchRecommendationResponse,
+    BatchItemResult,
+)
+from .catalogue import (
+    seed_products_if_empty,
+    upgrade_products_table,
+    page_products,
+    CatalogueStore,
+    CatalogueSnapshot,
+)
+from .catalogue_feed import CatalogueWatcher, ensure_state
 from .vector_store import ProductVectorStore
-from .recommender import build_blueprint, match_products, build_bundle, log_recommendation
-from .pdf_utils import build_recommendation_pdf
+from .cache import EmbeddingCache, ResponseCache
+from .recommender import (
+    MAX_ALTERNATIVES,
+    iter_recommendation,
+    recommend_one,
+    recommend_many,
+    query_text,
+    semantic_top_k,
+)
+from .concurrency import Overloaded, embed_executor
+from . import pdf_service
+from .log_writer import RecommendationLogWriter
+from .analytics import HourlyResolutionUnavailable, query_analytics
+from .importer import ImportJob
+from .encoder_service import BatchingEncoder
+from .warmup import STARTUP_WARMUP, Warmup
+from .metrics import REGISTRY, MetricsMiddleware, stage_summary
+from .profiler import PROFILE_MAX_SECONDS, PROFILING_ENABLED, ProfilingMiddleware, profiler
 
 # Create tables at startup (safe): attempt to create tables but do not crash on import
 
@@ -26,89 +69,639 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id"],
 )
+app.add_middleware(MetricsMiddleware)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "500"))
+ADMIN_MAX_PAGE_SIZE = int(os.getenv("ADMIN_MAX_PAGE_SIZE", "500"))
+# How long a replaced vector store keeps serving requests that hold the previous snapshot
+CATALOGUE_RETIRE_SECONDS = float(os.getenv("CATALOGUE_RETIRE_SECONDS", "30"))
+PRODUCT_FIELDS = tuple(Product.__annotations__)
 
-# Global in-memory vector store (rebuilt on startup)
+# Global in-memory catalogue snapshot + vector store built from it
+query_embedding_cache = EmbeddingCache()
+response_cache = ResponseCache()
+catalogue_store = CatalogueStore(on_publish=lambda snapshot: response_cache.publish(snapshot.version))
+log_writer = RecommendationLogWriter()
+warmup = Warmup()
 vector_store: ProductVectorStore | None = None
+_previous_store: ProductVectorStore | None = None
+_swapped_at = 0.0
+_vector_store_lock = threading.Lock()
+# Recent bulk-import jobs started in this worker, oldest first
+import_jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+_import_jobs_lock = threading.Lock()
+MAX_IMPORT_JOBS = 20
 
 
-@app.on_event("startup")
-def startup_event():
-    global vector_store
+def _encode_queries(texts):
+    # The encoder is shared by every store copy, so the current store is fine to use
+    return vector_store.encode_queries(texts)
+
+
+query_encoder = BatchingEncoder(_encode_queries, embed_executor)
+
+
+def _caches():
+    return (("responses", response_cache.stats()), ("query_embeddings", query_embedding_cache.stats()))
+
+
+def _collect_cache_lookups():
+    for name, stats in _caches():
+        yield {"cache": name, "result": "hit"}, stats["hits"]
+        yield {"cache": name, "result": "miss"}, stats["misses"]
+
+
+def _collect_cache_sizes():
+    for name, stats in _caches():
+        yield {"cache": name}, stats["size"]
+
+
+def _collect_catalogue():
+    snapshot = catalogue_store.snapshot
+    if snapshot is not None:
+        yield {"what": "products"}, len(snapshot.products)
+    store = vector_store
+    if store is not None and store.index is not None:
+        yield {"what": "vectors"}, store.index.ntotal
+        if store.lexical is not None:
+            yield {"what": "lexical_terms"}, len(store.lexical.vocab)
+
+
+def _collect_pipeline():
+    executor = embed_executor.stats()
+    encoder = query_encoder.stats()
+    writer = log_writer.stats()
+    yield {"what": "embed_inflight"}, executor["inflight"]
+    yield {"what": "pdf_inflight"}, pdf_service.pdf_executor.inflight
+    yield {"what": "log_queue"}, writer["queued"]
+    yield {"what": "log_spill_bytes"}, writer["storage"]["spill_bytes"]
+    yield {"what": "encode_mean_batch"}, encoder["mean_batch_size"]
+    pool = pool_stats()
+    if "checkedout" in pool:
+        yield {"what": "db_connections_in_use"}, pool["checkedout"]
+
+
+def _collect_pipeline_totals():
+    yield {"what": "embed_rejected"}, embed_executor.rejected
+    yield {"what": "pdf_rejected"}, pdf_service.pdf_executor.rejected
+    yield {"what": "encode_batches"}, query_encoder.batches
+    yield {"what": "logs_written"}, log_writer.written
+    yield {"what": "logs_failed"}, log_writer.failed
+    yield {"what": "catalogue_full_reloads"}, catalogue_store.full_reloads
+    yield {"what": "catalogue_incremental_reloads"}, catalogue_store.incremental_reloads
+
+
+REGISTRY.collector("cache_lookups_total", "Cache lookups by cache and result.", _collect_cache_lookups, "counter")
+REGISTRY.collector("cache_entries", "Entries held by each cache.", _collect_cache_sizes)
+REGISTRY.collector("catalogue_size", "Products in the snapshot, vectors and BM25 terms indexed.", _collect_catalogue)
+REGISTRY.collector("pipeline", "Executor, encoder and log-writer gauges.", _collect_pipeline)
+REGISTRY.collector("pipeline_total", "Executor, encoder and log-writer counters.", _collect_pipeline_totals, "counter")
+
+
+def _install_store(snapshot: CatalogueSnapshot) -> ProductVectorStore:
+    """
+    Make the vector store for `snapshot` current. Copy-on-write: the serving store
+    is cloned, only new or changed products are re-embedded into the clone, and the
+    reference is swapped once it is complete. The replaced store keeps answering
+    requests that hold the previous snapshot until it is retired.
+    """
+    global vector_store, _previous_store, _swapped_at
+    with _vector_store_lock:
+        current = vector_store
+        if current is not None and current.catalogue_version == snapshot.version:
+            return current
+        if current is None:
+            store = ProductVectorStore(list(snapshot.products), query_cache=query_embedding_cache)
+        else:
+            store = current.copy()
+            if store.sync(snapshot.products):
+                store.save()
+        store.catalogue_version = snapshot.version
+        _previous_store, vector_store = current, store
+        _swapped_at = time.monotonic()
+        return store
+
+
+def _vector_store_for(snapshot: CatalogueSnapshot) -> ProductVectorStore:
+    for store in (vector_store, _previous_store):
+        if store is not None and store.catalogue_version == snapshot.version:
+            return store
+    if vector_store is not None and snapshot is not catalogue_store.snapshot:
+        # A request that outlived the previous store: search the closest store still
+        # held rather than rewinding the shared one or cloning it per request. Hits
+        # are matched to the request's snapshot by product_id, so products added
+        # since are ignored and removed ones just miss their semantic score.
+        return _previous_store or vector_store
+    return _install_store(snapshot)
+
+
+def _retire_previous_store():
+    global _previous_store
+    if _previous_store is not None and time.monotonic() - _swapped_at >= CATALOGUE_RETIRE_SECONDS:
+        _previous_store = None
+
+
+def _on_catalogue_change():
+    # Runs on the watcher thread: the next snapshot and its vector store are built
+    # here, off the request path, and published together
+    _retire_previous_store()
+    if catalogue_store.snapshot is None or vector_store is None:
+        return  # the warm-up loads the first snapshot and store
+    with SessionLocal() as db:
+        catalogue_store.refresh(db, prepare=_install_store)
+
+
+catalogue_watcher = CatalogueWatcher(_on_catalogue_change)
+
+
+def _prepare_database():
     # ensure DB is reachable and create tables if possible
     try:
         conn = engine.connect()
         conn.close()
+        # Partitioned log table first (Postgres); create_all skips tables that exist
+        log_writer.storage.prepare()
         Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            upgrade_products_table(conn)
+            ensure_state(conn)
     except Exception:
         # DB not available (e.g. running locally without Postgres). Don't crash here;
         # operations that require the DB will fail later with clearer errors.
         print("Warning: could not connect to database at startup; continuing without creating tables.")
-    # use a real Session for seeding + reading
-    from .db import SessionLocal
-    s = SessionLocal()
-    try:
+    with SessionLocal() as s:
         seed_products_if_empty(s)
-        products_orm = s.query(ProductORM).all()
-        products = [Product.from_orm_model(o) for o in products_orm]
-        vector_store = ProductVectorStore(products)
-    finally:
-        s.close()
+
+
+def _load_vector_store():
+    with SessionLocal() as s:
+        catalogue_store.invalidate()
+        _vector_store_for(catalogue_store.get(s))
+
+
+def _warm_encoder():
+    # The first encode + search pay one-off costs (allocator, mapped index pages)
+    store = vector_store
+    q_emb = store.model.encode(["warm-up"], convert_to_numpy=True, normalize_embeddings=True)
+    store.search_vectors(q_emb, 1)
+
+
+WARMUP_STEPS = [
+    ("database", _prepare_database),
+    ("vector_store", _load_vector_store),
+    ("encoder", _warm_encoder),
+    ("pdf", pdf_service.warm),
+]
+
+
+@app.on_event("startup")
+def startup_event():
+    if STARTUP_WARMUP == "blocking":
+        warmup.run(WARMUP_STEPS)
+    else:
+        # Serve liveness right away; recommendation routes answer 503 until warm
+        warmup.start(WARMUP_STEPS)
+
+
+@app.on_event("startup")
+async def start_log_writer():
+    log_writer.start()
+
+
+@app.on_event("startup")
+async def start_catalogue_watcher():
+    catalogue_watcher.start()
+    catalogue_store.watched = catalogue_watcher.running
+
+
+@app.on_event("shutdown")
+async def stop_log_writer():
+    await log_writer.stop()
+    pdf_service.pdf_executor.shutdown()
+    catalogue_watcher.stop()
+    await close_async_engine()
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    # Every pooled connection stayed busy for DB_POOL_TIMEOUT: shed load like Overloaded
+    return await overloaded_handler(request, Overloaded("Database connection pool exhausted"))
 
 
 @app.get("/health")
+@app.get("/health/live")
 def health():
     return {"status": "ok"}
 
 
+@app.get("/health/ready")
+def readiness():
+    stats = warmup.stats()
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content=stats)
+    return stats
+
+
+async def _semantic_results(req: RecommendationRequest, snapshot: CatalogueSnapshot):
+    store = await run_in_threadpool(_vector_store_for, snapshot)
+    top_k = semantic_top_k(len(snapshot.products))
+    text = query_text(req)
+    sem_results = []
+    if text.strip():
+        # Concurrent requests share one batched encode; retrieval stays per request
+        q_emb = await query_encoder.encode(text)
+        sem_results = (await embed_executor.run(store.retrieve, q_emb[None, :], [text], top_k))[0]
+    return store, sem_results
+
+
+def _cacheable(resp: RecommendationResponse) -> bool:
+    # A bundle cut short by the wall-clock backstop depends on load: don't memoise it
+    optimizer = (resp.debug or {}).get("optimizer") or {}
+    return not optimizer.get("timed_out", False)
+
+
+async def _recommend_cached(req: RecommendationRequest, alternatives: int = 0) -> RecommendationResponse:
+    warmup.require()
+    snapshot = await run_in_threadpool(catalogue_store.current, SessionLocal)
+    payload = req.dict()
+    if alternatives:
+        payload["_alternatives"] = alternatives
+    resp = response_cache.get(payload, snapshot.version)
+    if resp is not None:
+        return resp
+
+    store, sem_results = await _semantic_results(req, snapshot)
+    resp = await run_in_threadpool(
+        recommend_one, req, snapshot.products, store, snapshot.features, sem_results, alternatives
+    )
+    if _cacheable(resp):
+        response_cache.set(payload, snapshot.version, resp)
+    return resp
+
+
 @app.post("/recommend", response_model=RecommendationResponse)
-def recommend(req: RecommendationRequest, db: Session = Depends(get_db)):
-    global vector_store
-    if vector_store is None:
-        # rebuild if needed
-        products_orm = db.query(ProductORM).all()
-        products = [Product.from_orm_model(o) for o in products_orm]
-        vector_store = ProductVectorStore(products)
-
-    products_orm = db.query(ProductORM).all()
-    products = [Product.from_orm_model(o) for o in products_orm]
-
-    blueprint = build_blueprint(req)
-    recs = match_products(blueprint, req, products, vector_store)
-    resp = build_bundle(recs, req, products)
-
-    log_recommendation(db, req, resp)
+async def recommend(req: RecommendationRequest, alternatives: int = Query(0, ge=0, le=MAX_ALTERNATIVES)):
+    log_writer.ensure_capacity()
+    resp = await _recommend_cached(req, alternatives)
+    log_writer.submit(req, resp)
     return resp
 
 
+def _stream_event(event: str, data, fmt: str) -> str:
+    body = data.json() if isinstance(data, BaseModel) else json.dumps(data)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {body}\n\n"
+    return f'{{"event":"{event}","data":{body}}}\n'
+
+
+@app.post("/recommend/stream")
+async def recommend_stream(
+    req: RecommendationRequest,
+    alternatives: int = Query(3, ge=0, le=MAX_ALTERNATIVES),
+    fmt: Literal["ndjson", "sse"] = Query("ndjson", alias="format"),
+):
+    """
+    The best bundle as soon as it is solved, then each alternative as it is found,
+    as NDJSON lines or server-sent events (`bundle`, `alternative`..., `done`).
+    """
+    warmup.require()
+    log_writer.ensure_capacity()
+    snapshot = await run_in_threadpool(catalogue_store.current, SessionLocal)
+    store, sem_results = await _semantic_results(req, snapshot)
+    results = iter_recommendation(req, snapshot.products, store, snapshot.features, sem_results, alternatives)
+    primary = await run_in_threadpool(next, results)
+    if _cacheable(primary):
+        response_cache.set(req.dict(), snapshot.version, primary)
+    log_writer.submit(req, primary)
+
+    def events():
+        # Sync generator: StreamingResponse pulls it from a worker thread
+        yield _stream_event("bundle", primary, fmt)
+        count = 0
+        for alternative in results:
+            count += 1
+            yield _stream_event("alternative", alternative, fmt)
+        yield _stream_event("done", {"alternatives": count}, fmt)
+
+    media_type = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
+
+
+async def _recommend_batch(batch: BatchRecommendationRequest) -> list:
+    """
+    One (request, response or exception) pair per item, from the response cache or
+    one batched retrieval + recommend_many pass. Items are validated one by one: an
+    invalid item's request is None and its outcome the ValidationError. Successful
+    responses are logged.
+    """
+    if len(batch.requests) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_SIZE} requests)")
+    warmup.require()
+
+    reqs: List[Optional[RecommendationRequest]] = []
+    outcomes: list = []
+    for item in batch.requests:
+        try:
+            reqs.append(RecommendationRequest.parse_obj(item))
+            outcomes.append(None)
+        except ValidationError as e:
+            reqs.append(None)
+            outcomes.append(e)
+    log_writer.ensure_capacity(sum(1 for req in reqs if req is not None))
+
+    snapshot = await run_in_threadpool(catalogue_store.current, SessionLocal)
+    payloads = [req.dict() if req is not None else None for req in reqs]
+    for i, payload in enumerate(payloads):
+        if payload is not None:
+            outcomes[i] = response_cache.get(payload, snapshot.version)
+    pending = [i for i, outcome in enumerate(outcomes) if outcome is None]
+    if pending:
+        store = await run_in_threadpool(_vector_store_for, snapshot)
+        pending_reqs = [reqs[i] for i in pending]
+        sem_batches = await embed_executor.run(
+            store.search_batch,
+            [query_text(r) for r in pending_reqs],
+            semantic_top_k(len(snapshot.products)),
+        )
+        fresh = await run_in_threadpool(
+            recommend_many, pending_reqs, snapshot.products, store, snapshot.features, sem_batches
+        )
+        for i, outcome in zip(pending, fresh):
+            outcomes[i] = outcome
+            if not isinstance(outcome, Exception) and _cacheable(outcome):
+                response_cache.set(payloads[i], snapshot.version, outcome)
+
+    pairs = list(zip(reqs, outcomes))
+    log_writer.submit_many([(req, outcome) for req, outcome in pairs if not isinstance(outcome, Exception)])
+    return pairs
+
+
+def _error_text(outcome: Exception) -> str:
+    return f"{type(outcome).__name__}: {outcome}"
+
+
+@app.post("/recommend/batch", response_model=BatchRecommendationResponse)
+async def recommend_batch(batch: BatchRecommendationRequest):
+    results = [
+        BatchItemResult(index=i, error=_error_text(outcome)) if isinstance(outcome, Exception)
+        else BatchItemResult(index=i, response=outcome)
+        for i, (_, outcome) in enumerate(await _recommend_batch(batch))
+    ]
+    succeeded = sum(1 for r in results if r.error is None)
+    return BatchRecommendationResponse(
+        results=results,
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+    )
+
+
 @app.post("/recommend/pdf")
-def recommend_pdf(req: RecommendationRequest, db: Session = Depends(get_db)):
-    resp: RecommendationResponse = recommend(req, db)  # reuse logic
-    pdf_buffer = build_recommendation_pdf(req, resp)
-    return StreamingResponse(
-        pdf_buffer,
+async def recommend_pdf(req: RecommendationRequest):
+    log_writer.ensure_capacity()
+    resp = await _recommend_cached(req)  # same cache entry as /recommend for identical payloads
+    log_writer.submit(req, resp)
+    pdf = await pdf_service.render_pdf(req, resp)
+    return Response(
+        pdf,
         media_type="application/pdf",
         headers={"Content-Disposition": 'attachment; filename="recommendation.pdf"'},
     )
 
 
+@app.post("/recommend/pdf/bulk")
+async def recommend_pdf_bulk(
+    batch: BatchRecommendationRequest,
+    fmt: Literal["zip", "combined"] = Query("zip", alias="format"),
+):
+    """
+    PDFs for a whole batch of requisitions: a ZIP with one PDF each (streamed entry
+    by entry as the render pool finishes them, failures listed in errors.txt), or
+    one combined report with a summary page. Rendering runs in the PDF process pool.
+    """
+    rows = [
+        (i, None, _error_text(outcome)) if isinstance(outcome, Exception) else (i, (req, outcome), None)
+        for i, (req, outcome) in enumerate(await _recommend_batch(batch))
+    ]
+    if fmt == "combined":
+        pdf = await pdf_service.render_report(rows)
+        return Response(
+            pdf,
+            media_type="application/pdf",
+            headers={"Content-Disposition": 'attachment; filename="recommendations.pdf"'},
+        )
+    return StreamingResponse(
+        pdf_service.zip_stream(rows),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="recommendations.zip"'},
+    )
+
+
 # --- Simple admin: list products & logs (no auth for now) ---
 
-@app.get("/admin/products", response_model=list[Product])
-def list_products(db: Session = Depends(get_db)):
-    products_orm = db.query(ProductORM).all()
-    return [Product.from_orm_model(o) for o in products_orm]
+def _encode_cursor(product_id: str) -> str:
+    return base64.urlsafe_b64encode(product_id.encode()).decode().rstrip("=")
 
 
-@app.get("/admin/analytics")
-def analytics(db: Session = Depends(get_db)):
-    total = db.query(RecommendationLogORM).count()
-    by_family = (
-        db.query(RecommendationLogORM.job_family, func.count(RecommendationLogORM.id))
-        .group_by(RecommendationLogORM.job_family)
-        .all()
+def _decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/admin/products")
+def list_products(
+    request: Request,
+    category: Optional[List[str]] = Query(None),
+    construct: Optional[List[str]] = Query(None),
+    language: Optional[List[str]] = Query(None),
+    job_family: Optional[List[str]] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated Product fields to return"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=ADMIN_MAX_PAGE_SIZE),
+):
+    """
+    Products in product_id order, one page at a time (`next_cursor` fetches the next).
+    Repeated filter parameters match any of their values; different filters must all
+    match. The ETag covers the catalogue version and the query, so a client revalidating
+    with If-None-Match gets a 304 without the page being rebuilt.
+    """
+    snapshot = catalogue_store.current(SessionLocal)
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    etag = '"' + hashlib.sha1(f"{snapshot.version}?{query}".encode()).hexdigest()[:20] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    include = None
+    if fields:
+        include = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = include.difference(PRODUCT_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown fields: {sorted(unknown)}")
+    after = _decode_cursor(cursor) if cursor else None
+    filters = {"category": category, "construct": construct, "language": language, "job_family": job_family}
+    page, has_more, total = page_products(snapshot, filters, after, limit)
+    return JSONResponse(
+        {
+            "items": [p.dict(include=include) for p in page],
+            "next_cursor": _encode_cursor(page[-1].product_id) if has_more else None,
+            "total": total,
+            "catalogue_version": snapshot.version,
+        },
+        headers=headers,
     )
+
+
+@app.post("/admin/import", status_code=202)
+async def import_catalogue(
+    request: Request,
+    fmt: Literal["jsonl", "csv"] = Query(..., alias="format"),
+    dry_run: bool = False,
+):
+    """
+    Bulk-import products from the raw request body (JSON Lines or CSV). The body is
+    streamed to a temporary file and imported in the background; poll the returned
+    status URL for progress. Only new or changed products are re-embedded.
+    """
+    spool = tempfile.TemporaryFile()
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+
+    job = ImportJob(fmt, dry_run=dry_run)
+    with _import_jobs_lock:
+        import_jobs[job.id] = job
+        while len(import_jobs) > MAX_IMPORT_JOBS:
+            import_jobs.popitem(last=False)
+    job.start(io.TextIOWrapper(spool, encoding="utf-8", newline=""), on_done=_after_import)
+    return {"job_id": job.id, "status_url": f"/admin/import/{job.id}"}
+
+
+def _after_import(job: ImportJob):
+    if job.report.inserted or job.report.updated:
+        # Apply the change here now; other workers hear about it from the change feed
+        with SessionLocal() as db:
+            catalogue_store.refresh(db, prepare=_install_store)
+
+
+@app.get("/admin/import/{job_id}")
+def import_status(job_id: str):
+    job = import_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown import job (jobs live in the worker that ran them)")
+    return job.stats()
+
+
+@app.get("/admin/cache")
+def cache_stats():
+    return {
+        "query_embeddings": query_embedding_cache.stats(),
+        "responses": response_cache.stats(),
+    }
+
+
+@app.get("/admin/pipeline")
+def pipeline_stats():
     return {
-        "total_requests": total,
-        "by_job_family": {k: v for k, v in by_family},
+        "catalogue": {**catalogue_store.stats(), "watcher": catalogue_watcher.stats()},
+        "db_pool": pool_stats(),
+        "embed_executor": embed_executor.stats(),
+        "pdf_executor": pdf_service.stats(),
+        "query_encoder": query_encoder.stats(),
+        "log_writer": log_writer.stats(),
+        "stages_seconds": stage_summary(),
     }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus text exposition: per-stage and per-route latency histograms, candidate
+    counts, cache hit/miss counters and pipeline gauges.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def _require_profiling():
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set PROFILING_ENABLED=1)")
+
+
+@app.get("/admin/profiles")
+def list_profiles():
+    _require_profiling()
+    return profiler.recent()
+
+
+@app.post("/admin/profiles")
+async def capture_profile(seconds: float = Query(5.0, gt=0)):
+    """
+    Sample every thread for `seconds` (capped at PROFILE_MAX_SECONDS) and return the
+    collapsed stacks, ready for flamegraph.pl or speedscope.
+    """
+    _require_profiling()
+    capture = profiler.start(f"window {seconds:g}s")
+    try:
+        await asyncio.sleep(min(seconds, PROFILE_MAX_SECONDS))
+    finally:
+        profiler.stop(capture)
+    return PlainTextResponse(capture.folded(), headers={"X-Profile-Id": capture.id})
+
+
+@app.get("/admin/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    _require_profiling()
+    capture = profiler.get(profile_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Unknown profile (only the most recent ones are kept)")
+    return PlainTextResponse(capture.folded())
+
+
+@app.get("/admin/analytics")
+async def analytics(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: Literal["hour", "day"] = "day",
+):
+    """
+    Recommendation counts in [start, end) (hour resolution, UTC) by job family, level,
+    use case, volume and product, plus a per-`interval` series. Served from the rollup
+    tables, so the cost does not grow with the number of logged recommendations.
+    Runs on the asyncio engine with `DB_ASYNC=1`, otherwise on a worker thread.
+
+    Hourly buckets are kept for ROLLUP_HOURLY_RETENTION_DAYS (the response's
+    `hourly_from`). Before that, a partial first or last day is counted as the whole
+    day: `start` / `end` in the response are the range actually counted and
+    `snapped_to_days` is true. `interval=hour` needs a `start` on or after
+    `hourly_from`, otherwise 400.
+    """
+    if start and end and start >= end:
+        raise HTTPException(status_code=422, detail="start must be before end")
+    try:
+        async_engine = get_async_engine()
+        if async_engine is not None:
+            async with async_engine.connect() as conn:
+                return await conn.run_sync(query_analytics, start, end, interval)
+        return await run_in_threadpool(_query_analytics, start, end, interval)
+    except HourlyResolutionUnavailable as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _query_analytics(start: Optional[datetime], end: Optional[datetime], interval: str) -> dict:
+    with engine.connect() as conn:
+        return query_analytics(conn, start, end, interval)
@@ -0,0 +1,275 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# Recent observations kept per histogram series for exact p50/p95/p99
+METRICS_RESERVOIR = int(os.getenv("METRICS_RESERVOIR", "1024"))
+
+# Prometheus `le` bounds: latencies in seconds, and sizes (candidate counts etc.)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (0, 1, 4, 16, 64, 256, 1024, 4096, 16384, 65536)
+QUANTILES = (0.5, 0.95, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+# (labels, value) pairs reported by a collector at scrape time
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """
+    Monotonic count per label set.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        if not METRICS_ENABLED:
+            return
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_labels(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(Metric):
+    """
+    Cumulative-bucket histogram per label set (Prometheus exposition), plus a
+    bounded reservoir of recent observations for exact recent percentiles.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, list] = {}  # labels -> [bucket counts, sum, count, reservoir]
+
+    def observe(self, value: float, **labels: str):
+        if not METRICS_ENABLED:
+            return
+        key = _labels(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, deque(maxlen=METRICS_RESERVOIR)]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+            series[2] += 1
+            series[3].append(value)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def summary(self) -> List[dict]:
+        """
+        Count, mean and recent p50/p95/p99 of every series.
+        """
+        with self._lock:
+            items = [(k, s[1], s[2], list(s[3])) for k, s in sorted(self._series.items())]
+        out = []
+        for key, total, count, recent in items:
+            row = dict(key)
+            row.update(count=count, mean=total / count if count else 0.0)
+            if recent:
+                for q, v in zip(QUANTILES, np.percentile(recent, [q * 100 for q in QUANTILES])):
+                    row[f"p{int(q * 100)}"] = float(v)
+            out.append(row)
+        return out
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(s[0]), s[1], s[2]) for k, s in sorted(self._series.items())]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Metrics of this process plus collectors that report gauges read at scrape time
+    (cache sizes, queue depths...), rendered in the Prometheus text format.
+    """
+
+    def __init__(self, prefix: str = "shl_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Tuple[str, str, str, Callable[[], Samples]]] = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._register(Counter(self.prefix + name, help))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self.prefix + name, help, buckets))
+
+    def _register(self, metric: Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def collector(self, name: str, help: str, collect: Callable[[], Samples], kind: str = "gauge"):
+        self._collectors.append((self.prefix + name, kind, help, collect))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            body = metric.render()
+            if body:
+                lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.kind}"] + body
+        for name, kind, help, collect in self._collectors:
+            try:
+                samples = list(collect())
+            except Exception:
+                continue  # a broken collector must not take the endpoint down
+            if samples:
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_format_labels(_labels(labels))} {_format_value(v)}" for labels, v in samples]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram("stage_seconds", "Time spent in each recommendation pipeline stage.")
+HTTP_SECONDS = REGISTRY.histogram("http_request_seconds", "HTTP request latency by route, method and status.")
+CANDIDATES = REGISTRY.histogram(
+    "candidates", "Products considered per query, by step (shortlist, retrieval, bundle).", SIZE_BUCKETS
+)
+EVENTS = REGISTRY.counter("events_total", "Pipeline events (cache hits/misses, fallbacks...).")
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Time a pipeline stage into `shl_stage_seconds{stage=...}`.
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, stage=stage)
+
+
+def _route_of(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording `shl_http_request_seconds{route,method,status}` until the
+    last body chunk is sent (so streamed responses count their full duration). Routes
+    are labelled by their template, never the raw path, to bound cardinality.
+    """
+
+    def __init__(self, app, skip: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.skip = tuple(skip)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED or scope["path"] in self.skip:
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_SECONDS.observe(
+                time.perf_counter() - t0, route=_route_of(scope), method=scope["method"], status=str(status["code"])
+            )
+
+
+def stage_summary() -> Dict[str, dict]:
+    """
+    Recent p50/p95/p99 (seconds) and counts per pipeline stage, for /admin/pipeline.
+    """
+    return {row.pop("stage"): row for row in STAGE_SECONDS.summary()}
+
+
+def _stage_quantiles() -> Samples:
+    for stage, row in stage_summary().items():
+        for q in QUANTILES:
+            key = f"p{int(q * 100)}"
+            if key in row:
+                yield {"stage": stage, "quantile": str(q)}, row[key]
+
+
+# Histogram buckets give aggregatable quantiles; these are exact over recent requests
+REGISTRY.collector(
+    "stage_recent_seconds",
+    f"p50/p95/p99 of the last {METRICS_RESERVOIR} observations of each pipeline stage.",
+    _stage_quantiles,
+)
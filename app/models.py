@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Literal, Optional
+from typing import Any, List, Literal, Mapping, Optional
 from .orm_models import ProductORM
 
 
@@ -32,6 +32,25 @@ class Product(BaseModel):
             tags=o.tags or [],
         )
 
+    @staticmethod
+    def from_row(row: Mapping[str, Any]) -> "Product":
+        """
+        From a Core row (mapping) of the product columns; no ORM entity in between.
+        """
+        return Product(
+            product_id=row["product_id"],
+            name=row["name"],
+            description=row["description"],
+            category=row["category"],
+            constructs=row["constructs"],
+            use_cases=row["use_cases"],
+            job_levels=row["job_levels"],
+            job_families=row["job_families"],
+            max_duration_min=row["max_duration_min"],
+            languages=row["languages"],
+            tags=row["tags"] or [],
+        )
+
 
 class RecommendationRequest(BaseModel):
     job_title: str
@@ -55,10 +74,37 @@ class RecommendedProduct(BaseModel):
     max_duration_min: int
 
 
+class AlternativeBundle(BaseModel):
+    bundle_id: str
+    strategy: str
+    label: str
+    products: List[RecommendedProduct]
+    total_duration_min: int
+    constructs_covered: List[str]
+    uncovered_constructs: List[str] = []
+
+
 class RecommendationResponse(BaseModel):
     bundle_id: str
     products: List[RecommendedProduct]
     total_duration_min: int
     constructs_covered: List[str]
     debug: Optional[dict] = None
- 
\ No newline at end of file
+    alternatives: List[AlternativeBundle] = []
+
+
+class BatchRecommendationRequest(BaseModel):
+    # Items stay raw so one invalid requisition fails on its own, not the whole batch
+    requests: List[dict]
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    response: Optional[RecommendationResponse] = None
+    error: Optional[str] = None
+
+
+class BatchRecommendationResponse(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
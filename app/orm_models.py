@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, DateTime
 from sqlalchemy import Boolean
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.sql import func
@@ -21,6 +21,7 @@ class ProductORM(Base):
     max_duration_min = Column(Integer, nullable=False)
     languages = Column(JSON, nullable=False)
     tags = Column(JSON, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
 
 
 class RecommendationLogORM(Base):
@@ -38,3 +39,39 @@ class RecommendationLogORM(Base):
     constructs_covered = Column(JSON)
     request_json = Column(JSON)
     products_json = Column(JSON)
+
+
+class RecommendationRollupORM(Base):
+    """
+    Pre-aggregated recommendation counts per hour/day bucket and dimension value,
+    maintained alongside the log writes (see `app/analytics.py`).
+    """
+    __tablename__ = "recommendation_rollups"
+
+    granularity = Column(String(8), primary_key=True)  # "hour" | "day"
+    dimension = Column(String(32), primary_key=True)  # "total", "job_family", ..., "product"
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    value = Column(String(255), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+class CatalogueStateORM(Base):
+    """
+    Single row (id=1) holding the catalogue version, bumped by every catalogue write
+    (see `app/catalogue_feed.py`).
+    """
+    __tablename__ = "catalogue_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+class CatalogueChangeORM(Base):
+    """
+    Change feed: the products written or deleted by each catalogue version.
+    """
+    __tablename__ = "catalogue_changes"
+
+    version = Column(BigInteger, primary_key=True)
+    product_id = Column(String(50), primary_key=True)
+    op = Column(String(8), nullable=False)  # "upsert" | "delete"
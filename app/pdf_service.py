@@ -0,0 +1,154 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Deque, List, Optional, Sequence, Tuple
+
+from .concurrency import BoundedExecutor
+from .metrics import span
+from .models import RecommendationRequest, RecommendationResponse
+
+# Render processes; 0 renders on a thread pool in the API process instead
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_MAX_CONCURRENCY = int(os.getenv("PDF_MAX_CONCURRENCY", str(max(PDF_WORKERS, 1) * 2)))
+PDF_MAX_PENDING = int(os.getenv("PDF_MAX_PENDING", "64"))
+PDF_CHUNK_SIZE = int(os.getenv("PDF_CHUNK_SIZE", "8"))  # PDFs per worker task in bulk exports
+
+Pair = Tuple[RecommendationRequest, RecommendationResponse]
+# (index, pair or None, error) per requisition of a bulk export
+Row = Tuple[int, Optional[Pair], Optional[str]]
+
+
+def _make_pool() -> Optional[ProcessPoolExecutor]:
+    if PDF_WORKERS <= 0:
+        return None
+    # spawn, not fork: the API process runs threads (log writer, executors, FAISS)
+    # whose locks a forked child could inherit mid-acquire
+    return ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+_pool = _make_pool()
+pdf_executor = BoundedExecutor(
+    "pdf",
+    max_workers=2,
+    max_concurrency=PDF_MAX_CONCURRENCY,
+    max_pending=PDF_MAX_PENDING,
+    executor=_pool,
+)
+
+
+def warm():
+    """
+    Start the render processes (interpreter + reportlab import, fonts) before the
+    first request pays for it. Processes are started lazily by the pool otherwise.
+    """
+    from . import pdf_utils  # reportlab is only imported on first use
+
+    if _pool is None:
+        pdf_utils.fonts()
+        return
+    for future in [_pool.submit(pdf_utils.fonts) for _ in range(PDF_WORKERS)]:
+        future.result()
+
+
+def stats() -> dict:
+    return {"workers": PDF_WORKERS, "mode": "process" if _pool else "thread", **pdf_executor.stats()}
+
+
+async def render_pdf(req: RecommendationRequest, resp: RecommendationResponse) -> bytes:
+    from .pdf_utils import render_pdf as render
+
+    with span("pdf_render"):
+        return await pdf_executor.run(render, req, resp)
+
+
+async def render_report(rows: Sequence[Row]) -> bytes:
+    from .pdf_utils import render_report as render
+
+    with span("pdf_render"):
+        return await pdf_executor.run(render, list(rows))
+
+
+async def iter_pdfs(pairs: Sequence[Pair], chunk_size: int = PDF_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    One PDF per pair, in order. Pairs go to the pool in chunks (one pickle round
+    trip per chunk) and at most `max_concurrency` chunks of one export are in
+    flight, so a large export keeps every worker busy without monopolising the
+    queue or holding all documents in memory.
+    """
+    from .pdf_utils import render_pdfs
+
+    size = max(1, chunk_size)
+    chunks = [list(pairs[i:i + size]) for i in range(0, len(pairs), size)]
+    window: Deque[asyncio.Future] = deque()
+    submitted = 0
+    try:
+        while submitted < len(chunks) or window:
+            while submitted < len(chunks) and len(window) < pdf_executor.max_concurrency:
+                window.append(asyncio.ensure_future(_render_chunk(render_pdfs, chunks[submitted])))
+                submitted += 1
+            for pdf in await window.popleft():
+                yield pdf
+    finally:
+        for future in window:
+            future.cancel()
+
+
+async def _render_chunk(render_pdfs, chunk: List[Pair]) -> List[bytes]:
+    with span("pdf_render"):
+        return await pdf_executor.run(render_pdfs, chunk)
+
+
+def pdf_filename(index: int, req: RecommendationRequest) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", req.job_title).strip("-").lower()[:60] or "requisition"
+    return f"{index + 1:04d}-{slug}.pdf"
+
+
+class _Sink(io.RawIOBase):
+    """
+    Write-only, unseekable file for ZipFile that hands out what was written so far.
+    ZipFile falls back to data descriptors, so entries never need rewriting.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def zip_stream(rows: Sequence[Row]) -> AsyncIterator[bytes]:
+    """
+    A ZIP of one PDF per successful requisition (plus errors.txt for the failed
+    ones), yielded entry by entry as the pool finishes them. PDFs are already
+    deflated, so entries are stored uncompressed.
+    """
+    ok = [(index, pair) for index, pair, _ in rows if pair is not None]
+    errors = [f"{index + 1}\t{error}\n" for index, pair, error in rows if pair is None]
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        names = (pdf_filename(index, req) for index, (req, _) in ok)
+        async for pdf in iter_pdfs([pair for _, pair in ok]):
+            archive.writestr(next(names), pdf)
+            yield sink.drain()
+        if errors:
+            archive.writestr("errors.txt", "".join(errors))
+    yield sink.drain()
@@ -1,66 +1,207 @@
+"""
+PDF reports for recommendation bundles.
+
+Everything here is plain, picklable functions of (request, response) pairs, so the
+same code runs in the API process or in the render process pool (app.pdf_service).
+Per-process state is cached once: the fonts (and optional TTF registration), glyph
+widths of words, wrapped reason lines and the page template, whose PDF operators
+are built once and appended verbatim to every page.
+"""
+import os
+from functools import lru_cache
 from io import BytesIO
+from typing import List, Optional, Sequence, Tuple
+
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
+from reportlab.lib.rl_accel import fp_str
+from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfgen import canvas
+
 from .models import RecommendationResponse, RecommendationRequest
 
+PDF_FONT_PATH = os.getenv("PDF_FONT_PATH", "")  # optional TTF (e.g. DejaVuSans.ttf) for non-Latin text
+PDF_FONT_BOLD_PATH = os.getenv("PDF_FONT_BOLD_PATH", "")
+PDF_COMPRESS = os.getenv("PDF_COMPRESS", "1") == "1"
 
-def build_recommendation_pdf(req: RecommendationRequest, resp: RecommendationResponse) -> BytesIO:
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    y = height - 50
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(40, y, "Assessment Recommendation Bundle")
-    y -= 30
-
-    c.setFont("Helvetica", 10)
-    c.drawString(40, y, f"Job Title: {req.job_title}")
-    y -= 15
-    c.drawString(40, y, f"Job Family: {req.job_family}  |  Level: {req.job_level}")
-    y -= 15
-    c.drawString(40, y, f"Use Case: {req.use_case}  |  Volume: {req.volume}")
-    y -= 25
-
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(40, y, f"Total Duration: {resp.total_duration_min} minutes")
-    y -= 20
-    c.setFont("Helvetica", 10)
-    c.drawString(40, y, "Constructs Covered: " + ", ".join(resp.constructs_covered))
-    y -= 25
-
-    for p in resp.products:
-        if y < 100:
-            c.showPage()
-            y = height - 50
-        c.setFont("Helvetica-Bold", 11)
-        c.drawString(40, y, f"{p.name} ({p.product_id}) - {p.max_duration_min} min")
-        y -= 15
-        c.setFont("Helvetica", 9)
-        for line in _wrap_text(p.reason, 90):
-            c.drawString(50, y, line)
-            y -= 12
-        y -= 10
-
-    c.showPage()
-    c.save()
-    buffer.seek(0)
-    return buffer
-
-
-def _wrap_text(text: str, width: int):
-    words = text.split()
-    lines = []
-    current = []
-    count = 0
-    for w in words:
-        if count + len(w) + 1 > width:
+# Deflated streams are written as binary: the ASCII85 pass reportlab adds by default
+# only serves 7-bit transports, costs ~25% more bytes and, without the C
+# accelerator, a large share of render time
+rl_config.useA85 = 0
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+LEFT = 40
+INDENT = 50
+TOP = PAGE_HEIGHT - 50
+BOTTOM = 100  # start a new page below this
+TEXT_WIDTH = PAGE_WIDTH - 2 * LEFT
+REASON_WIDTH = PAGE_WIDTH - INDENT - LEFT
+FOOTER = "SHL Assessment Recommendation Engine"
+
+Pair = Tuple[RecommendationRequest, RecommendationResponse]
+
+
+@lru_cache(maxsize=None)
+def fonts() -> Tuple[str, str]:
+    """
+    (regular, bold) font names. A configured TTF is parsed and registered once per
+    process; the built-in Helvetica needs neither.
+    """
+    if not PDF_FONT_PATH:
+        return "Helvetica", "Helvetica-Bold"
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    pdfmetrics.registerFont(TTFont("ReportFont", PDF_FONT_PATH))
+    bold = "ReportFont"
+    if PDF_FONT_BOLD_PATH:
+        pdfmetrics.registerFont(TTFont("ReportFont-Bold", PDF_FONT_BOLD_PATH))
+        bold = "ReportFont-Bold"
+    return "ReportFont", bold
+
+
+@lru_cache(maxsize=None)
+def page_template() -> str:
+    """
+    Operators for the static page furniture (header and footer rules). A literal is
+    cheaper than a form XObject for the typical one-page bundle, which would pay
+    for an extra stream and resource dictionary per document.
+    """
+    top = PAGE_HEIGHT - 35
+    rule = "{} m {} l S"
+    return " ".join((
+        "q 0.5 w",
+        rule.format(fp_str(LEFT, top), fp_str(PAGE_WIDTH - LEFT, top)),
+        rule.format(fp_str(LEFT, 50), fp_str(PAGE_WIDTH - LEFT, 50)),
+        "Q",
+    ))
+
+
+@lru_cache(maxsize=65536)
+def _width(word: str, font: str, size: float) -> float:
+    return pdfmetrics.stringWidth(word, font, size)
+
+
+@lru_cache(maxsize=8192)
+def wrap_text(text: str, font: str, size: float, max_width: float) -> Tuple[str, ...]:
+    """
+    Greedy word wrap on measured glyph widths. Reasons repeat across bundles, so
+    whole results are cached as well as word widths.
+    """
+    space = _width(" ", font, size)
+    lines: List[str] = []
+    current: List[str] = []
+    used = 0.0
+    for word in text.split():
+        w = _width(word, font, size)
+        if current and used + space + w > max_width:
             lines.append(" ".join(current))
-            current = [w]
-            count = len(w)
-        else:
-            current.append(w)
-            count += len(w) + 1
+            current, used = [], 0.0
+        current.append(word)
+        used += w + (space if len(current) > 1 else 0.0)
     if current:
         lines.append(" ".join(current))
-    return lines
+    return tuple(lines)
+
+
+class _Report:
+    """
+    One PDF document being drawn: a canvas and a cursor.
+    """
+
+    def __init__(self, buffer, title: str):
+        self.regular, self.bold = fonts()
+        self.c = canvas.Canvas(buffer, pagesize=A4, pageCompression=int(PDF_COMPRESS))
+        self.c.setTitle(title)
+        self.page = 0
+        self.y = TOP
+        self._font: Tuple[str, float] = ("", 0)
+        self._start_page()
+
+    def _start_page(self):
+        self.page += 1
+        self.c.addLiteral(page_template())
+        self._set_font(self.regular, 8)
+        self.c.drawString(LEFT, 38, FOOTER)
+        self.c.drawRightString(PAGE_WIDTH - LEFT, 38, f"Page {self.page}")
+        self.y = TOP
+
+    def new_page(self):
+        self.c.showPage()  # resets the graphics state, fonts included
+        self._font = ("", 0)
+        self._start_page()
+
+    def _set_font(self, font: str, size: float):
+        # Every setFont writes operators to the page; most lines reuse the last font
+        if self._font != (font, size):
+            self.c.setFont(font, size)
+            self._font = (font, size)
+
+    def line(self, text: str, font: str, size: float, advance: float, x: float = LEFT):
+        if self.y < BOTTOM:
+            self.new_page()
+        self._set_font(font, size)
+        self.c.drawString(x, self.y, text)
+        self.y -= advance
+
+    def bundle(self, req: RecommendationRequest, resp: RecommendationResponse):
+        self.line("Assessment Recommendation Bundle", self.bold, 16, 30)
+        self.line(f"Job Title: {req.job_title}", self.regular, 10, 15)
+        self.line(f"Job Family: {req.job_family}  |  Level: {req.job_level}", self.regular, 10, 15)
+        self.line(f"Use Case: {req.use_case}  |  Volume: {req.volume}", self.regular, 10, 25)
+        self.line(f"Total Duration: {resp.total_duration_min} minutes", self.bold, 12, 20)
+        covered = wrap_text("Constructs Covered: " + ", ".join(resp.constructs_covered), self.regular, 10, TEXT_WIDTH)
+        for i, text in enumerate(covered):
+            self.line(text, self.regular, 10, 25 if i == len(covered) - 1 else 12)
+        for p in resp.products:
+            self.line(f"{p.name} ({p.product_id}) - {p.max_duration_min} min", self.bold, 11, 15)
+            for text in wrap_text(p.reason, self.regular, 9, REASON_WIDTH):
+                self.line(text, self.regular, 9, 12, x=INDENT)
+            self.y -= 10
+
+    def summary(self, rows: Sequence[Tuple[int, Optional[Pair], Optional[str]]]):
+        ok = sum(1 for _, pair, _ in rows if pair is not None)
+        self.line("Assessment Recommendation Report", self.bold, 16, 30)
+        self.line(f"Requisitions: {len(rows)}  |  Bundles: {ok}  |  Failed: {len(rows) - ok}", self.regular, 10, 25)
+        for index, pair, error in rows:
+            if pair is None:
+                text = f"{index + 1}. FAILED: {error}"
+            else:
+                req, resp = pair
+                text = f"{index + 1}. {req.job_title} - {len(resp.products)} products, {resp.total_duration_min} min"
+            for part in wrap_text(text, self.regular, 10, TEXT_WIDTH):
+                self.line(part, self.regular, 10, 14)
+
+    def finish(self):
+        self.c.showPage()
+        self.c.save()
+
+
+def render_pdf(req: RecommendationRequest, resp: RecommendationResponse) -> bytes:
+    buffer = BytesIO()
+    report = _Report(buffer, f"Assessment bundle - {req.job_title}")
+    report.bundle(req, resp)
+    report.finish()
+    return buffer.getvalue()
+
+
+def render_pdfs(pairs: Sequence[Pair]) -> List[bytes]:
+    """
+    One PDF per pair; a chunk of a bulk export, sent to a pool worker as one task.
+    """
+    return [render_pdf(req, resp) for req, resp in pairs]
+
+
+def render_report(rows: Sequence[Tuple[int, Optional[Pair], Optional[str]]]) -> bytes:
+    """
+    One combined PDF: a summary page listing every requisition (index, pair or
+    None, error), then each bundle starting on its own page.
+    """
+    buffer = BytesIO()
+    report = _Report(buffer, "Assessment recommendation report")
+    report.summary(rows)
+    for _, pair, _ in rows:
+        if pair is not None:
+            report.new_page()
+            report.bundle(*pair)
+    report.finish()
+    return buffer.getvalue()
@@ -0,0 +1,159 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Set
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))  # finished captures kept for download
+PROFILE_HEADER = "x-profile"
+
+# A sample whose innermost frame is in one of these files is a thread waiting
+# (idle pool worker, event-loop select, lock wait), not doing work
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", os.path.join("concurrent", "futures", "thread.py"))
+
+
+class Capture:
+    """
+    Stack samples collected while the capture was active, as collapsed stacks
+    ("thread;module:function;... count"), the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, label: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.started_at = time.time()
+        self.duration_s: Optional[float] = None
+        self.samples: Counter = Counter()
+        self.ticks = 0
+
+    def folded(self) -> str:
+        samples = Counter(dict.copy(self.samples))  # the sampler may still be adding its last tick
+        return "".join(f"{stack} {n}\n" for stack, n in samples.most_common())
+
+    def stats(self) -> dict:
+        samples = dict.copy(self.samples)
+        return {
+            "profile_id": self.id,
+            "label": self.label,
+            "duration_s": self.duration_s,
+            "ticks": self.ticks,
+            "samples": sum(samples.values()),
+            "stacks": len(samples),
+        }
+
+
+def _stack(frame) -> str:
+    names: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Opt-in statistical profiler. While at least one capture is active, a daemon
+    thread reads every thread's current stack (`sys._current_frames`) each
+    `interval_ms` and counts it in all active captures; idle waits are skipped.
+    With no active capture no thread runs, so leaving it enabled costs nothing
+    until a profile is requested, and a capture costs one stack walk per tick.
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, keep: int = PROFILE_KEEP):
+        self.interval = max(interval_ms, 1.0) / 1000
+        self.keep = keep
+        self._active: Set[Capture] = set()
+        self._finished: "OrderedDict[str, Capture]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, label: str = "") -> Capture:
+        capture = Capture(label)
+        with self._lock:
+            self._active.add(capture)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        return capture
+
+    def stop(self, capture: Capture) -> Capture:
+        with self._lock:
+            self._active.discard(capture)
+            capture.duration_s = time.time() - capture.started_at
+            self._finished[capture.id] = capture
+            while len(self._finished) > self.keep:
+                self._finished.popitem(last=False)
+        return capture
+
+    def get(self, profile_id: str) -> Optional[Capture]:
+        return self._finished.get(profile_id)
+
+    def recent(self) -> List[dict]:
+        return [c.stats() for c in reversed(self._finished.values())]
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                active = list(self._active)
+                if not active:
+                    self._thread = None
+                    return
+            names: Dict[int, str] = {t.ident: t.name for t in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                stacks.append(f"{names.get(ident, ident)};{_stack(frame)}")
+            for capture in active:
+                capture.ticks += 1
+                capture.samples.update(stacks)
+            time.sleep(self.interval)
+
+
+profiler = SamplingProfiler()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware: a request sent with `X-Profile: 1` is sampled from start to the
+    last body chunk, and the response carries `X-Profile-Id` for
+    GET /admin/profiles/{id}. Concurrent requests share the process, so their
+    stacks can appear in each other's captures; profile under light traffic for a
+    clean picture.
+    """
+
+    def __init__(self, app, profiler: SamplingProfiler = profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        capture = self.profiler.start(f"{scope['method']} {scope['path']}")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", capture.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.profiler.stop(capture)
+
+
+def _wants_profile(scope) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == PROFILE_HEADER.encode():
+            return value.strip().lower() in (b"1", b"true", b"yes")
+    return False
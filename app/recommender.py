@@ -1,8 +1,58 @@
+import os
+from datetime import datetime, timezone
+import numpy as np
 from sqlalchemy.orm import Session
-from typing import List, Set, Dict, Any
-from .models import RecommendationRequest, RecommendedProduct, RecommendationResponse, Product
+from typing import List, Set, Dict, Any, Iterator, Optional, Sequence, Tuple, Union
+from sqlalchemy import insert
+from .models import (
+    AlternativeBundle,
+    RecommendationRequest,
+    RecommendedProduct,
+    RecommendationResponse,
+    Product,
+)
+from .scoring import BlueprintScores, CatalogueFeatures, score_blueprint
+from .bundle_optimizer import BEST_FIT, MOST_COVERAGE, SHORTEST, BundleSolution, solve_bundle, solve_bundles
 from .vector_store import ProductVectorStore
 from .orm_models import RecommendationLogORM
+from .metrics import CANDIDATES, span
+
+# Number of semantic neighbours fetched per request (0 = whole catalogue). Products
+# outside the top-k get the lowest retrieved similarity as a fallback score.
+SEMANTIC_TOP_K = int(os.getenv("SEMANTIC_TOP_K", "256"))
+
+# Upper bound on alternative bundles per request
+MAX_ALTERNATIVES = int(os.getenv("MAX_ALTERNATIVES", "5"))
+# Labelled alternatives tried before falling back to runner-up best-fit bundles
+ALTERNATIVE_OBJECTIVES = (SHORTEST, MOST_COVERAGE)
+
+
+def query_text(req: RecommendationRequest) -> str:
+    return f"{req.job_title}. {req.job_description}"
+
+
+def semantic_top_k(n_products: int) -> int:
+    return min(n_products, SEMANTIC_TOP_K) if SEMANTIC_TOP_K > 0 else n_products
+
+
+def semantic_vector(
+    features: CatalogueFeatures,
+    semantic_results: List[Tuple[Product, float]],
+    top_k: int,
+) -> np.ndarray:
+    """
+    Per-product similarity aligned with the catalogue. When the search was bounded
+    (fewer than all products retrieved), unretrieved products get the lowest
+    retrieved score instead of 0.
+    """
+    fallback = 0.0
+    if semantic_results and top_k < features.size:
+        fallback = min(score for _, score in semantic_results)
+    semantic = np.full(features.size, fallback, dtype=np.float64)
+    for p, score in semantic_results:
+        semantic[features.index.position[p.product_id]] = score
+    return semantic
+
 
 def build_blueprint(req: RecommendationRequest) -> List[dict]:
     """
@@ -38,93 +88,115 @@ def build_blueprint(req: RecommendationRequest) -> List[dict]:
     return unique_blueprint
 
 
-def rank_candidates(
-    candidates: List[Product],
+def candidate_score(
+    p: Product,
     construct: str,
     req: RecommendationRequest,
     semantic_scores: Dict[str, float],
-) -> List[Product]:
+) -> float:
     """
-    Rank candidate products using a simple scoring heuristic + semantic similarity from FAISS.
+    Heuristic score of one product for one construct (the per-product reference
+    for the vectorized scoring.score_blueprint).
     """
-    scored = []
-
-    for p in candidates:
-        score = 0.0
+    score = 0.0
 
-        # Construct match
-        if construct in p.constructs:
-            score += 5.0
+    # Construct match
+    if construct in p.constructs:
+        score += 5.0
 
-        # Job level / family alignment
-        if req.job_level in p.job_levels:
-            score += 3.0
+    # Job level / family alignment
+    if req.job_level in p.job_levels:
+        score += 3.0
 
-        if req.job_family in p.job_families:
-            score += 3.0
+    if req.job_family in p.job_families:
+        score += 3.0
 
-        # Use case match
-        if req.use_case in p.use_cases:
-            score += 2.0
+    # Use case match
+    if req.use_case in p.use_cases:
+        score += 2.0
 
-        # Language compatibility
-        if any(lang in p.languages for lang in req.languages):
-            score += 2.0
+    # Language compatibility
+    if any(lang in p.languages for lang in req.languages):
+        score += 2.0
 
-        # Volume suitability
-        if req.volume == "high" and "high_volume" in p.tags:
-            score += 2.0
+    # Volume suitability
+    if req.volume == "high" and "high_volume" in p.tags:
+        score += 2.0
 
-        # Duration check
-        if p.max_duration_min <= req.max_total_duration_min:
-            score += 1.0
+    # Duration check
+    if p.max_duration_min <= req.max_total_duration_min:
+        score += 1.0
 
-        # Semantic similarity from FAISS
-        sem = semantic_scores.get(p.product_id, 0.0)
-        score += 4.0 * sem  # weight semantic similarity
+    # Semantic similarity from FAISS
+    sem = semantic_scores.get(p.product_id, 0.0)
+    score += 4.0 * sem  # weight semantic similarity
+    return score
 
-        scored.append((score, p))
 
+def rank_candidates(
+    candidates: List[Product],
+    construct: str,
+    req: RecommendationRequest,
+    semantic_scores: Dict[str, float],
+) -> List[Product]:
+    """
+    Rank candidate products using a simple scoring heuristic + semantic similarity from FAISS.
+    """
+    scored = [(candidate_score(p, construct, req, semantic_scores), p) for p in candidates]
     scored.sort(key=lambda x: x[0], reverse=True)
     return [p for score, p in scored if score > 0]
 
 
-def match_products(
+def score_request(
     blueprint: List[dict],
     req: RecommendationRequest,
-    products: List[Product],
+    products: Sequence[Product],
     vector_store: ProductVectorStore,
-) -> List[RecommendedProduct]:
+    features: Optional[CatalogueFeatures] = None,
+    semantic_results: Optional[List[Tuple[Product, float]]] = None,
+) -> BlueprintScores:
     """
-    Use blueprint + FAISS semantic search to pick best products per construct.
+    Score every product for every blueprint construct in one vectorized pass (see
+    scoring.score_blueprint). `features` must be built over the same `products`
+    sequence (the snapshot's features); `semantic_results` skips the vector store
+    search when the caller already ran it.
     """
-    recommendations: List[RecommendedProduct] = []
+    if features is None:
+        features = CatalogueFeatures(products)
 
     # Get semantic similarity of all products against the job description
-    sem_results = vector_store.search(
-        f"{req.job_title}. {req.job_description}",
-        top_k=len(products)
-    )
-    semantic_scores = {p.product_id: score for p, score in sem_results}
+    top_k = semantic_top_k(len(products))
+    if semantic_results is None:
+        semantic_results = vector_store.search(query_text(req), top_k=top_k)
+    semantic = semantic_vector(features, semantic_results, top_k)
 
-    for element in blueprint:
-        construct = element["construct"]
+    constructs = [element["construct"] for element in blueprint]
+    with span("score"):
+        return score_blueprint(features, constructs, req, semantic)
 
-        # Filter catalogue by construct & language
-        candidates = [
-            p for p in products
-            if construct in p.constructs
-            and any(lang in p.languages for lang in req.languages)
-        ]
 
-        ranked = rank_candidates(candidates, construct, req, semantic_scores)
+def match_products(
+    blueprint: List[dict],
+    req: RecommendationRequest,
+    products: Sequence[Product],
+    vector_store: ProductVectorStore,
+    features: Optional[CatalogueFeatures] = None,
+    semantic_results: Optional[List[Tuple[Product, float]]] = None,
+) -> List[RecommendedProduct]:
+    """
+    Use blueprint + FAISS semantic search to pick best products per construct.
+    """
+    scored = score_request(blueprint, req, products, vector_store, features, semantic_results)
+    recommendations: List[RecommendedProduct] = []
 
-        if ranked:
-            p = ranked[0]
+    for row, construct in enumerate(scored.constructs):
+        best = scored.best(row)
+        if best is not None:
+            p = products[best]
             reason = (
                 f"Best match for construct '{construct}' "
                 f"for {req.job_family}/{req.job_level} ({req.use_case}); "
-                f"semantic_fit={semantic_scores.get(p.product_id, 0.0):.2f}."
+                f"semantic_fit={scored.semantic[best]:.2f}."
             )
             recommendations.append(
                 RecommendedProduct(
@@ -138,49 +210,215 @@ def match_products(
     return recommendations
 
 
-def build_bundle(
-    recs: List[RecommendedProduct],
+def _bundle_products(
+    solution: BundleSolution,
     req: RecommendationRequest,
-    products: List[Product],
-) -> RecommendationResponse:
-    """
-    Compose bundle while respecting time limit.
-    """
+    products: Sequence[Product],
+    scored: BlueprintScores,
+) -> Tuple[List[RecommendedProduct], List[str]]:
     chosen: List[RecommendedProduct] = []
-    total_duration = 0
     constructs_covered: Set[str] = set()
+    for pos in solution.positions:
+        p = products[pos]
+        rows = solution.covers[pos]
+        names = ", ".join(f"'{scored.constructs[r]}'" for r in rows)
+        reason = (
+            f"Best match for construct{'s' if len(rows) > 1 else ''} {names} "
+            f"for {req.job_family}/{req.job_level} ({req.use_case}); "
+            f"semantic_fit={scored.semantic[pos]:.2f}."
+        )
+        chosen.append(
+            RecommendedProduct(
+                product_id=p.product_id,
+                name=p.name,
+                reason=reason,
+                max_duration_min=p.max_duration_min,
+            )
+        )
+        constructs_covered.update(p.constructs)
+    return chosen, sorted(constructs_covered)
 
-    for r in recs:
-        if total_duration + r.max_duration_min <= req.max_total_duration_min:
-            chosen.append(r)
-            total_duration += r.max_duration_min
 
-            prod = next((p for p in products if p.product_id == r.product_id), None)
-            if prod:
-                constructs_covered.update(prod.constructs)
+def build_bundle(
+    blueprint: List[dict],
+    req: RecommendationRequest,
+    products: Sequence[Product],
+    scored: BlueprintScores,
+    features: CatalogueFeatures,
+) -> RecommendationResponse:
+    """
+    Compose the bundle with the bundle optimizer: a weighted set cover of the
+    blueprint constructs (must/should/nice) under the duration budget and the
+    assessment_budget level (see bundle_optimizer.solve_bundle).
+    """
+    solution = solve_bundle(
+        scored,
+        [element["priority"] for element in blueprint],
+        features.durations,
+        req.max_total_duration_min,
+        req.assessment_budget,
+    )
+    CANDIDATES.observe(solution.candidates, step="bundle")
+    chosen, constructs_covered = _bundle_products(solution, req, products, scored)
 
     debug: Dict[str, Any] = {
         "requested_job_family": req.job_family,
         "requested_job_level": req.job_level,
         "use_case": req.use_case,
+        "optimizer": {
+            "objective": round(solution.value, 6),
+            "optimal": solution.optimal,
+            "timed_out": solution.timed_out,
+            "nodes": solution.nodes,
+            "candidates": solution.candidates,
+            "uncovered": [scored.constructs[r] for r in solution.uncovered],
+        },
     }
 
     return RecommendationResponse(
         bundle_id="AUTO_BUNDLE_V1",
         products=chosen,
-        total_duration_min=total_duration,
-        constructs_covered=sorted(list(constructs_covered)),
+        total_duration_min=solution.duration,
+        constructs_covered=constructs_covered,
         debug=debug,
     )
 
 
+def iter_alternatives(
+    blueprint: List[dict],
+    req: RecommendationRequest,
+    products: Sequence[Product],
+    scored: BlueprintScores,
+    features: CatalogueFeatures,
+    primary: RecommendationResponse,
+    n: int,
+) -> Iterator[AlternativeBundle]:
+    """
+    Up to `n` bundles that differ from `primary` and from each other, reusing the
+    same score matrix: first the labelled objectives (shortest, most coverage), then
+    the runner-up best-fit bundles. Yields each one as soon as it is solved.
+    """
+    n = min(n, MAX_ALTERNATIVES)
+    if n <= 0:
+        return
+    priorities = [element["priority"] for element in blueprint]
+    seen = {frozenset(features.index.position[r.product_id] for r in primary.products)}
+
+    def alternative(solution, bundle_id, strategy, label):
+        chosen, constructs_covered = _bundle_products(solution, req, products, scored)
+        return AlternativeBundle(
+            bundle_id=bundle_id,
+            strategy=strategy,
+            label=label,
+            products=chosen,
+            total_duration_min=solution.duration,
+            constructs_covered=constructs_covered,
+            uncovered_constructs=[scored.constructs[r] for r in solution.uncovered],
+        )
+
+    emitted = 0
+    for objective in ALTERNATIVE_OBJECTIVES:
+        solution = solve_bundle(
+            scored, priorities, features.durations, req.max_total_duration_min, req.assessment_budget, objective
+        )
+        key = frozenset(solution.positions)
+        if solution.positions and key not in seen:
+            seen.add(key)
+            emitted += 1
+            yield alternative(solution, f"ALT_{objective.name.upper()}", objective.name, objective.label)
+            if emitted >= n:
+                return
+
+    runners_up = solve_bundles(
+        scored, priorities, features.durations, req.max_total_duration_min, req.assessment_budget,
+        BEST_FIT, top_n=n - emitted + len(seen),
+    )
+    rank = 1
+    for solution in runners_up:
+        key = frozenset(solution.positions)
+        if not solution.positions or key in seen:
+            continue
+        seen.add(key)
+        rank += 1
+        emitted += 1
+        yield alternative(solution, f"ALT_BEST_FIT_{rank}", BEST_FIT.name, f"Runner-up fit #{rank}")
+        if emitted >= n:
+            return
+
+
+def iter_recommendation(
+    req: RecommendationRequest,
+    products: Sequence[Product],
+    vector_store: ProductVectorStore,
+    features: Optional[CatalogueFeatures] = None,
+    semantic_results: Optional[List[Tuple[Product, float]]] = None,
+    alternatives: int = 0,
+) -> Iterator[Union[RecommendationResponse, AlternativeBundle]]:
+    """
+    Score once, yield the best bundle, then up to `alternatives` alternative bundles.
+    """
+    if features is None:
+        features = CatalogueFeatures(products)
+    with span("blueprint"):
+        blueprint = build_blueprint(req)
+    scored = score_request(blueprint, req, products, vector_store, features, semantic_results)
+    with span("bundle"):
+        primary = build_bundle(blueprint, req, products, scored, features)
+    yield primary
+    yield from iter_alternatives(blueprint, req, products, scored, features, primary, alternatives)
+
+
+def recommend_one(
+    req: RecommendationRequest,
+    products: Sequence[Product],
+    vector_store: ProductVectorStore,
+    features: Optional[CatalogueFeatures] = None,
+    semantic_results: Optional[List[Tuple[Product, float]]] = None,
+    alternatives: int = 0,
+) -> RecommendationResponse:
+    results = iter_recommendation(req, products, vector_store, features, semantic_results, alternatives)
+    primary = next(results)
+    if alternatives:
+        with span("alternatives"):
+            primary.alternatives = list(results)
+    return primary
 
-def log_recommendation(
-    db: Session,
+
+def recommend_many(
+    reqs: List[RecommendationRequest],
+    products: Sequence[Product],
+    vector_store: ProductVectorStore,
+    features: Optional[CatalogueFeatures] = None,
+    semantic_batches: Optional[List[List[Tuple[Product, float]]]] = None,
+) -> List[Union[RecommendationResponse, Exception]]:
+    """
+    Recommend for many requests against one catalogue snapshot: all job texts are
+    encoded in one forward pass and searched with one multi-row FAISS query
+    (unless the caller passes the `semantic_batches` it already ran).
+    Failures are returned per item instead of aborting the batch.
+    """
+    if features is None:
+        features = CatalogueFeatures(products)
+    sem_batches = semantic_batches
+    if sem_batches is None:
+        sem_batches = vector_store.search_batch([query_text(r) for r in reqs], top_k=semantic_top_k(len(products)))
+
+    results: List[Union[RecommendationResponse, Exception]] = []
+    for req, sem_results in zip(reqs, sem_batches):
+        try:
+            results.append(recommend_one(req, products, vector_store, features, sem_results))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def log_row(
     req: RecommendationRequest,
-    resp: RecommendationResponse
-):
-    log = RecommendationLogORM(
+    resp: RecommendationResponse,
+    timestamp: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    return dict(
+        timestamp=timestamp or datetime.now(timezone.utc),
         job_title=req.job_title,
         job_family=req.job_family,
         job_level=req.job_level,
@@ -192,5 +430,26 @@ def log_recommendation(
         request_json=req.dict(),
         products_json=[p.dict() for p in resp.products],
     )
+
+
+def log_recommendation(
+    db: Session,
+    req: RecommendationRequest,
+    resp: RecommendationResponse
+):
+    log = RecommendationLogORM(**log_row(req, resp))
     db.add(log)
     db.commit()
+
+
+def log_recommendations(
+    db: Session,
+    items: List[Tuple[RecommendationRequest, RecommendationResponse]],
+):
+    """
+    Write many log rows with a single bulk INSERT and one commit.
+    """
+    if not items:
+        return
+    db.execute(insert(RecommendationLogORM), [log_row(req, resp) for req, resp in items])
+    db.commit()
@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from .models import Product, RecommendationRequest
+from .catalogue_index import CatalogueIndex
+
+# Heuristic weights (same as the per-product loop in recommender.rank_candidates)
+W_CONSTRUCT = 5.0
+W_JOB_LEVEL = 3.0
+W_JOB_FAMILY = 3.0
+W_USE_CASE = 2.0
+W_LANGUAGE = 2.0
+W_HIGH_VOLUME = 2.0
+W_DURATION = 1.0
+W_SEMANTIC = 4.0
+
+
+def _bits_to_bool(mask: int, size: int) -> np.ndarray:
+    if size == 0:
+        return np.zeros(0, dtype=bool)
+    raw = np.frombuffer(mask.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:size].astype(bool)
+
+
+class CatalogueFeatures:
+    """
+    Dense feature encoding of a catalogue snapshot: one boolean matrix per indexed
+    attribute (products x attribute values) plus a duration vector.
+    """
+
+    def __init__(self, products: Sequence[Product], index: Optional[CatalogueIndex] = None):
+        if index is None:
+            index = CatalogueIndex(products)
+        self.index = index
+        self.size = len(products)
+        self.product_ids: List[str] = [p.product_id for p in products]
+        self.durations = np.array([p.max_duration_min for p in products], dtype=np.int64)
+
+        self.vocab: Dict[str, Dict[str, int]] = {}
+        self.matrices: Dict[str, np.ndarray] = {}
+        for name, postings in index.bitsets.items():
+            values = sorted(postings)
+            self.vocab[name] = {v: j for j, v in enumerate(values)}
+            matrix = np.zeros((self.size, len(values)), dtype=bool)
+            for j, v in enumerate(values):
+                matrix[:, j] = _bits_to_bool(postings[v], self.size)
+            self.matrices[name] = matrix
+
+    def column(self, name: str, value: str) -> np.ndarray:
+        j = self.vocab[name].get(value)
+        if j is None:
+            return np.zeros(self.size, dtype=bool)
+        return self.matrices[name][:, j]
+
+    def any_of(self, name: str, values: Sequence[str]) -> np.ndarray:
+        cols = [self.vocab[name][v] for v in values if v in self.vocab[name]]
+        if not cols:
+            return np.zeros(self.size, dtype=bool)
+        return self.matrices[name][:, cols].any(axis=1)
+
+    def columns(self, name: str, values: Sequence[str]) -> np.ndarray:
+        """
+        Boolean matrix (len(values) x products); unknown values give an all-False row.
+        """
+        out = np.zeros((len(values), self.size), dtype=bool)
+        vocab = self.vocab[name]
+        for i, v in enumerate(values):
+            j = vocab.get(v)
+            if j is not None:
+                out[i] = self.matrices[name][:, j]
+        return out
+
+    def semantic_vector(self, semantic_scores: Dict[str, float]) -> np.ndarray:
+        return np.array([semantic_scores.get(pid, 0.0) for pid in self.product_ids], dtype=np.float64)
+
+
+@dataclass
+class BlueprintScores:
+    """
+    Scores of every product for every blueprint construct from one batched pass.
+    `valid[c, i]` is True when product i is a candidate for construct c with score > 0
+    (the same products `rank_candidates` would keep).
+    """
+    constructs: List[str]
+    scores: np.ndarray
+    valid: np.ndarray
+    semantic: np.ndarray
+
+    def top_k(self, row: int, k: Optional[int] = None) -> np.ndarray:
+        """
+        Positions of the best `k` products for blueprint row `row`, best first.
+        Ties keep catalogue order, matching the stable sort of `rank_candidates`.
+        """
+        idx = np.flatnonzero(self.valid[row])
+        if k is None or k >= len(idx):
+            selected = idx
+        elif k <= 0:
+            return idx[:0]
+        else:
+            vals = self.scores[row, idx]
+            part = np.argpartition(-vals, k - 1)[:k]
+            kth = vals[part].min()
+            above = idx[vals > kth]
+            ties = idx[vals == kth][: k - len(above)]
+            selected = np.concatenate([above, ties])
+        order = np.lexsort((selected, -self.scores[row, selected]))
+        return selected[order]
+
+    def best(self, row: int) -> Optional[int]:
+        top = self.top_k(row, 1)
+        return int(top[0]) if len(top) else None
+
+
+def score_blueprint(
+    features: CatalogueFeatures,
+    constructs: Sequence[str],
+    req: RecommendationRequest,
+    semantic: np.ndarray,
+) -> BlueprintScores:
+    """
+    Score all products for all blueprint constructs in one matrix operation.
+    `semantic` is the per-product similarity vector aligned with the catalogue.
+    """
+    constructs = list(constructs)
+    construct_match = features.columns("construct", constructs)
+    language_match = features.any_of("language", req.languages)
+
+    base = (
+        W_JOB_LEVEL * features.column("job_level", req.job_level)
+        + W_JOB_FAMILY * features.column("job_family", req.job_family)
+        + W_USE_CASE * features.column("use_case", req.use_case)
+        + W_LANGUAGE * language_match
+        + W_DURATION * (features.durations <= req.max_total_duration_min)
+    )
+    if req.volume == "high":
+        base = base + W_HIGH_VOLUME * features.column("tag", "high_volume")
+
+    semantic = np.asarray(semantic, dtype=np.float64)
+    scores = (W_CONSTRUCT * construct_match + base[None, :]) + W_SEMANTIC * semantic[None, :]
+    valid = construct_match & language_match[None, :] & (scores > 0)
+
+    return BlueprintScores(constructs=constructs, scores=scores, valid=valid, semantic=semantic)
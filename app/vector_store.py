@@ -1,17 +1,158 @@
-from typing import List, Tuple
+import hashlib
+import json
+import os
+import re
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 import numpy as np
-import faiss
-from sentence_transformers import SentenceTransformer
 from .models import Product
+from .cache import EmbeddingCache
+from .encoders import EMBEDDING_MODEL, load_encoder
+from .lexical import BM25Index, fuse
+from .metrics import CANDIDATES, span
+
+if TYPE_CHECKING:  # faiss is imported lazily so importing the app stays cheap
+    import faiss
+
+# Directory for the persisted index (<model>.faiss + <model>.npy + <model>.json); empty disables it
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "data/vector_index")
+
+# Index backend: flat (exact), ivf (IVF-Flat), ivfpq (PQ-compressed IVF) or hnsw
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat")
+# Catalogues smaller than this always use the exact flat index
+ANN_MIN_PRODUCTS = int(os.getenv("ANN_MIN_PRODUCTS", "2000"))
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # 0 = 4 * sqrt(n)
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+PQ_M = int(os.getenv("PQ_M", "48"))  # sub-quantizers (largest divisor of the dim <= PQ_M is used)
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+
+# Map persisted embeddings/index read-only instead of copying them into each worker
+VECTOR_INDEX_MMAP = os.getenv("VECTOR_INDEX_MMAP", "1") == "1"
+
+# semantic (FAISS only), lexical (BM25 only) or hybrid (BM25 shortlist + cosine, fused)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# weighted keeps the fused score on the cosine scale the blueprint scoring was tuned for
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "weighted")  # weighted | rrf
+HYBRID_ALPHA = float(os.getenv("HYBRID_ALPHA", "0.7"))  # semantic share in weighted fusion
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+# BM25 candidates scored semantically; below HYBRID_MIN_SHORTLIST lexical hits the
+# FAISS top-k is added so vague queries still get semantic neighbours
+HYBRID_SHORTLIST = int(os.getenv("HYBRID_SHORTLIST", "512"))
+HYBRID_MIN_SHORTLIST = int(os.getenv("HYBRID_MIN_SHORTLIST", "64"))
+
+RETRIEVAL_MODES = ("semantic", "lexical", "hybrid")
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def resolve_index_type(index_type: str, n: int) -> str:
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown VECTOR_INDEX_TYPE {index_type!r}; expected one of {INDEX_TYPES}")
+    return "flat" if n < ANN_MIN_PRODUCTS else index_type
+
+
+def make_index(embeddings: np.ndarray, ids: np.ndarray, index_type: str = "flat"):
+    """
+    Build an inner-product index holding `embeddings` under `ids`. Every type supports
+    add_with_ids; all but hnsw also support remove_ids.
+    """
+    import faiss
+
+    n, dim = embeddings.shape
+    if index_type == "flat":
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+    elif index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index = faiss.IndexIDMap2(hnsw)
+    elif index_type in ("ivf", "ivfpq"):
+        nlist = IVF_NLIST or max(1, int(4 * np.sqrt(n)))
+        nlist = min(nlist, max(1, n // 39))  # faiss wants ~39 training points per centroid
+        pq_m = next(m for m in range(min(PQ_M, dim), 0, -1) if dim % m == 0)
+        spec = f"IVF{nlist},Flat" if index_type == "ivf" else f"IVF{nlist},PQ{pq_m}"
+        index = faiss.index_factory(dim, spec, faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+    else:
+        raise ValueError(f"Unknown index type {index_type!r}")
+    set_search_params(index, index_type)
+    if n:
+        index.add_with_ids(embeddings, ids)
+    return index
+
+
+def _owned_copy(index: "faiss.Index") -> "faiss.Index":
+    import faiss
+
+    # clone_index would keep viewing mmapped storage; a serialize round-trip owns its data
+    return faiss.deserialize_index(faiss.serialize_index(index))
+
+
+def set_search_params(index, index_type: str):
+    import faiss
+
+    params = faiss.ParameterSpace()
+    if index_type in ("ivf", "ivfpq"):
+        params.set_index_parameter(index, "nprobe", IVF_NPROBE)
+    elif index_type == "hnsw":
+        params.set_index_parameter(index, "efSearch", HNSW_EF_SEARCH)
 
 
 class ProductVectorStore:
-    def __init__(self, products: List[Product], model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        self.products = products
-        self.model = SentenceTransformer(model_name)
-        self.embeddings = None
+    """
+    FAISS index over product embeddings, keyed by product_id through an ID-mapped index.
+
+    Rows of `embeddings`, `ids` and `text_hashes` are aligned with `products`. When
+    `index_dir` is set the embeddings and index are persisted, and on startup only
+    products whose text changed (or that are new) are re-embedded.
+    """
+
+    def __init__(
+        self,
+        products: List[Product],
+        model_name: str = EMBEDDING_MODEL,
+        model=None,
+        query_cache: Optional[EmbeddingCache] = None,
+        index_dir: Optional[str] = VECTOR_INDEX_DIR or None,
+        build: bool = True,
+        index_type: str = VECTOR_INDEX_TYPE,
+        mmap: bool = VECTOR_INDEX_MMAP,
+        retrieval_mode: str = RETRIEVAL_MODE,
+    ):
+        # `model` lets callers share an already-loaded encoder (anything with `.encode`);
+        # otherwise the configured backend (EMBEDDING_BACKEND) is loaded
+        self.model = model if model is not None else load_encoder(model_name=model_name)
+        # Backend-qualified name keys the persisted index and the query cache
+        self.model_name = getattr(self.model, "name", model_name)
+        self.query_cache = query_cache
+        self.index_dir = index_dir
+        self.requested_index_type = index_type
+        self.index_type = "flat"
+        self.mmap = mmap
+        self.retrieval_mode = retrieval_mode
+        # BM25 over the same rows as `embeddings`, rebuilt whenever the products change
+        self.lexical: Optional[BM25Index] = None
+        # True while `index` is a read-only mapping of the persisted file
+        self._mapped = False
+        # Version of the catalogue snapshot these products came from (set by the caller)
+        self.catalogue_version: str | None = None
+
+        self.products: List[Product] = []
+        self.embeddings: Optional[np.ndarray] = None
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.text_hashes: List[str] = []
         self.index = None
-        self._build_index()
+        self._product_ids: List[str] = []
+        self._id_to_row: Dict[int, int] = {}
+        self._next_id = 0
+        self.last_reembedded = 0
+
+        if build:
+            self._build_index(list(products))
 
     def _product_text(self, p: Product) -> str:
         return " ".join([
@@ -23,27 +164,391 @@ class ProductVectorStore:
             " ".join(p.use_cases),
         ])
 
-    def _build_index(self):
-        if not self.products:
+    def _build_index(self, products: List[Product]):
+        loaded = self.index_dir is not None and self.load()
+        changed = self.sync(products)
+        if self.index_dir is not None and (changed or not loaded):
+            self.save()
+
+    def _encode_products(self, texts: List[str]) -> np.ndarray:
+        emb = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        return np.ascontiguousarray(emb, dtype=np.float32)
+
+    def _rebuild_index(self, embeddings: np.ndarray, ids: np.ndarray):
+        self.index_type = resolve_index_type(self.requested_index_type, len(ids))
+        self.index = make_index(np.ascontiguousarray(embeddings), ids, self.index_type)
+        self._mapped = False
+
+    # --- incremental updates ---
+
+    def sync(self, products: Iterable[Product]) -> int:
+        """
+        Make the store match `products`, re-embedding only new or changed products
+        and removing stale ones from the index by id. Returns the number of index
+        entries added or removed (0 when nothing changed).
+        """
+        products = list(products)
+        texts = [self._product_text(p) for p in products]
+        hashes = [_text_hash(t) for t in texts]
+        old_rows = {pid: r for r, pid in enumerate(self._product_ids)}
+        old_products = self.products
+
+        keep_rows = np.full(len(products), -1, dtype=np.int64)
+        ids = np.empty(len(products), dtype=np.int64)
+        for i, (p, h) in enumerate(zip(products, hashes)):
+            r = old_rows.get(p.product_id)
+            if r is None:
+                ids[i] = self._next_id
+                self._next_id += 1
+            else:
+                ids[i] = self.ids[r]
+                if self.text_hashes[r] == h:
+                    keep_rows[i] = r
+
+        to_encode = np.flatnonzero(keep_rows < 0)
+        kept = keep_rows[keep_rows >= 0]
+        stale = np.setdiff1d(self.ids, ids[keep_rows >= 0], assume_unique=True)
+        if len(stale) == 0 and len(to_encode) == 0 and len(products) == len(self.products):
+            # Same embeddings; just refresh the Product objects and their order
+            order = keep_rows
+            self.products = products
+            if not np.array_equal(order, np.arange(len(order))):
+                self.embeddings = self.embeddings[order]
+                self.ids = ids
+                self.text_hashes = hashes
+                self._product_ids = [p.product_id for p in products]
+                self._id_to_row = {int(fid): r for r, fid in enumerate(ids)}
+            if self.lexical is None or products != old_products:
+                self._rebuild_lexical()
+            self.last_reembedded = 0
+            return 0
+
+        fresh = self._encode_products([texts[i] for i in to_encode]) if len(to_encode) else None
+        dim = fresh.shape[1] if fresh is not None else (
+            self.embeddings.shape[1] if self.embeddings is not None else None
+        )
+
+        if dim is None:
+            embeddings = None
+        else:
+            embeddings = np.empty((len(products), dim), dtype=np.float32)
+            if len(kept):
+                embeddings[keep_rows >= 0] = self.embeddings[kept]
+            if fresh is not None:
+                embeddings[to_encode] = fresh
+
+        if embeddings is not None:
+            wanted_type = resolve_index_type(self.requested_index_type, len(products))
+            if (
+                self.index is None
+                or wanted_type != self.index_type
+                or (len(stale) and self.index_type == "hnsw")  # HNSW cannot remove ids
+            ):
+                self._rebuild_index(embeddings, ids)
+            else:
+                if self._mapped:
+                    # Mapped pages are read-only and shared: mutate a private copy
+                    self.index = _owned_copy(self.index)
+                    self._mapped = False
+                if len(stale):
+                    self.index.remove_ids(stale)
+                if len(to_encode):
+                    self.index.add_with_ids(embeddings[to_encode], ids[to_encode])
+
+        self.products = products
+        self.embeddings = embeddings
+        self.ids = ids
+        self.text_hashes = hashes
+        self._product_ids = [p.product_id for p in products]
+        self._id_to_row = {int(fid): r for r, fid in enumerate(ids)}
+        self._rebuild_lexical()
+        self.last_reembedded = len(to_encode)
+        return len(to_encode) + len(stale)
+
+    def _rebuild_lexical(self, force: bool = False):
+        # Tags and product ids are indexed lexically but not embedded, so this follows
+        # the Product objects rather than the text hashes; unchanged objects keep their
+        # tokens from the previous index
+        if force or self.retrieval_mode != "semantic":
+            self.lexical = BM25Index(self.products, previous=self.lexical)
+
+    def copy(self) -> "ProductVectorStore":
+        """
+        Independent copy (cloned FAISS index) that can be synced while the original
+        keeps serving searches; swap the reference once the copy is ready.
+        """
+        clone = ProductVectorStore.__new__(ProductVectorStore)
+        clone.__dict__.update(self.__dict__)
+        clone.index = _owned_copy(self.index) if self.index is not None else None
+        clone._mapped = False
+        clone.products = list(self.products)
+        clone.text_hashes = list(self.text_hashes)
+        clone._product_ids = list(self._product_ids)
+        clone._id_to_row = dict(self._id_to_row)
+        clone.catalogue_version = None
+        return clone
+
+    def upsert(self, products: Iterable[Product]) -> int:
+        """
+        Add or replace products by product_id without rebuilding the index.
+        """
+        updates = {p.product_id: p for p in products}
+        merged = [updates.pop(p.product_id, p) for p in self.products]
+        merged.extend(updates.values())
+        return self.sync(merged)
+
+    def remove(self, product_ids: Iterable[str]) -> int:
+        drop = set(product_ids)
+        return self.sync([p for p in self.products if p.product_id not in drop])
+
+    # --- persistence ---
+
+    def _paths(self) -> Dict[str, str]:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", self.model_name).strip("_")
+        base = os.path.join(self.index_dir, slug)
+        return {"index": base + ".faiss", "embeddings": base + ".npy", "manifest": base + ".json"}
+
+    def save(self):
+        """
+        Persist embeddings, index and manifest. Files are written to temp names and
+        renamed so concurrent readers never see a partially written file.
+        """
+        if self.index_dir is None or self.index is None:
             return
-        texts = [self._product_text(p) for p in self.products]
-        self.embeddings = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
-        dim = self.embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dim)
-        self.index.add(self.embeddings)
+        import faiss
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        paths = self._paths()
+        manifest = {
+            "model_name": self.model_name,
+            "dim": int(self.embeddings.shape[1]),
+            "index_type": self.index_type,
+            "next_id": self._next_id,
+            "products": [
+                {"product_id": pid, "id": int(fid), "text_hash": h}
+                for pid, fid, h in zip(self._product_ids, self.ids, self.text_hashes)
+            ],
+        }
+        suffix = f".tmp{os.getpid()}"
+        with open(paths["embeddings"] + suffix, "wb") as f:
+            np.save(f, self.embeddings)
+        faiss.write_index(self.index, paths["index"] + suffix)
+        with open(paths["manifest"] + suffix, "w") as f:
+            json.dump(manifest, f)
+        for key in ("embeddings", "index", "manifest"):
+            os.replace(paths[key] + suffix, paths[key])
+
+    def load(self) -> bool:
+        """
+        Load a persisted index for this model. Returns False (leaving the store empty)
+        if nothing usable is on disk. With `mmap`, embeddings and index are mapped
+        read-only so every worker shares the same page-cache pages.
+        """
+        import faiss
+
+        paths = self._paths()
+        if not all(os.path.exists(p) for p in paths.values()):
+            return False
+        # IFC maps flat storage zero-copy; older faiss only has the copying IO_FLAG_MMAP
+        mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+        try:
+            with open(paths["manifest"]) as f:
+                manifest = json.load(f)
+            embeddings = np.load(paths["embeddings"], mmap_mode="r" if self.mmap else None)
+            index = faiss.read_index(paths["index"], mmap_flag if self.mmap else 0)
+        except Exception as e:
+            print(f"Warning: could not load vector index from {self.index_dir}: {e}")
+            return False
+
+        rows = manifest.get("products", [])
+        if (
+            manifest.get("model_name") != self.model_name
+            or embeddings.shape[0] != len(rows)
+            or index.ntotal != len(rows)
+        ):
+            print(f"Warning: stale or inconsistent vector index in {self.index_dir}; rebuilding.")
+            return False
+
+        self.embeddings = embeddings if embeddings.dtype == np.float32 else embeddings.astype(np.float32)
+        self.ids = np.array([r["id"] for r in rows], dtype=np.int64)
+        if manifest.get("index_type", "flat") == resolve_index_type(self.requested_index_type, len(rows)):
+            self.index_type = manifest.get("index_type", "flat")
+            self.index = index
+            self._mapped = self.mmap
+            set_search_params(self.index, self.index_type)
+        else:
+            # Index backend changed: rebuild from the stored embeddings, no re-encoding
+            self._rebuild_index(self.embeddings, self.ids)
+        self.text_hashes = [r["text_hash"] for r in rows]
+        self._product_ids = [r["product_id"] for r in rows]
+        self._id_to_row = {int(fid): i for i, fid in enumerate(self.ids)}
+        self._next_id = int(manifest.get("next_id", len(rows)))
+        # Product objects are supplied by the next sync(); until then rows are id-only
+        self.products = [None] * len(rows)
+        return True
+
+    # --- queries ---
+
+    def encode_queries(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode query texts, serving repeats from the query cache and encoding
+        all misses in one forward pass.
+        """
+        if self.query_cache is None:
+            with span("encode"):
+                return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+        cached = self.query_cache.get_many(self.model_name, texts)
+        missing = [i for i, vec in enumerate(cached) if vec is None]
+        if missing:
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            with span("encode"):
+                fresh = self.model.encode(unique, convert_to_numpy=True, normalize_embeddings=True)
+            self.query_cache.put_many(self.model_name, unique, fresh)
+            by_text = dict(zip(unique, fresh))
+            for i in missing:
+                cached[i] = by_text[texts[i]]
+        return np.vstack(cached).astype(np.float32, copy=False)
 
     def search(self, query_text: str, top_k: int = 10) -> List[Tuple[Product, float]]:
-        if not query_text.strip() or self.index is None:
-            return []
-        q_emb = self.model.encode([query_text], convert_to_numpy=True, normalize_embeddings=True)
-        scores, indices = self.index.search(q_emb, top_k)
-        scores = scores[0]
-        indices = indices[0]
-
-        results = []
-        for idx, score in zip(indices, scores):
-            if idx == -1:
+        return self.search_batch([query_text], top_k)[0]
+
+    def search_batch(self, query_texts: List[str], top_k: int = 10) -> List[List[Tuple[Product, float]]]:
+        """
+        Search many queries with one encoder forward pass and one retrieval call.
+        """
+        results: List[List[Tuple[Product, float]]] = [[] for _ in query_texts]
+        rows = [i for i, q in enumerate(query_texts) if q.strip()]
+        if not rows or self.index is None or self.index.ntotal == 0 or top_k <= 0:
+            return results
+        q_emb = self.encode_queries([query_texts[i] for i in rows])
+        for row, found in zip(rows, self.retrieve(q_emb, [query_texts[i] for i in rows], top_k)):
+            results[row] = found
+        return results
+
+    def retrieve(
+        self,
+        q_emb: np.ndarray,
+        query_texts: List[str],
+        top_k: int = 10,
+        mode: Optional[str] = None,
+    ) -> List[List[Tuple[Product, float]]]:
+        """
+        Candidate retrieval for already-encoded queries (rows of `q_emb` match
+        `query_texts`), best first, by `mode` (default: the store's retrieval_mode):
+          * "semantic": FAISS nearest neighbours, scored by cosine
+          * "lexical": BM25 top-k, scored by BM25 / best BM25
+          * "hybrid": the BM25 shortlist (HYBRID_SHORTLIST) plus, when it is small,
+            the FAISS top-k; only these candidates get an exact cosine, and the two
+            scores are fused (HYBRID_FUSION)
+        """
+        mode = mode or self.retrieval_mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode {mode!r} (expected one of {RETRIEVAL_MODES})")
+        with span("retrieve"):
+            if mode == "semantic":
+                results = self.search_vectors(q_emb, top_k)
+            else:
+                results = self._retrieve(q_emb, query_texts, top_k, mode)
+        for row in results:
+            CANDIDATES.observe(len(row), step="retrieval")
+        return results
+
+    def _retrieve(self, q_emb: np.ndarray, query_texts: List[str], top_k: int, mode: str):
+        results: List[List[Tuple[Product, float]]] = [[] for _ in range(len(q_emb))]
+        if self.embeddings is None or len(self.products) == 0 or top_k <= 0 or len(q_emb) == 0:
+            return results
+        if self.lexical is None:
+            self._rebuild_lexical(force=True)
+        q_emb = np.ascontiguousarray(q_emb, dtype=np.float32)
+        with span("bm25"):
+            bm25 = [self.lexical.scores(text) for text in query_texts]
+        if mode == "lexical":
+            for row, scores in zip(results, bm25):
+                top = self.lexical.top(scores, top_k)
+                if len(top):
+                    best = float(scores[top[0]])
+                    row.extend((self.products[r], float(scores[r]) / best) for r in top)
+            return results
+
+        shortlists = [self.lexical.top(scores, HYBRID_SHORTLIST) for scores in bm25]
+        # Only queries with too few lexical matches pay for a FAISS search
+        sparse = [i for i, rows in enumerate(shortlists) if len(rows) < HYBRID_MIN_SHORTLIST]
+        if sparse and self.index is not None and self.index.ntotal:
+            with span("faiss_search"):
+                _, neighbours = self.index.search(q_emb[sparse], top_k)
+            for i, fids in zip(sparse, neighbours):
+                extra = np.asarray([self._id_to_row[int(fid)] for fid in fids if fid != -1], dtype=np.int64)
+                shortlists[i] = np.union1d(shortlists[i], extra)
+
+        for row, emb, scores, candidates in zip(results, q_emb, bm25, shortlists):
+            CANDIDATES.observe(len(candidates), step="shortlist")
+            if len(candidates) == 0:
                 continue
-            p = self.products[idx]
-            results.append((p, float(score)))
+            cosine = np.asarray(self.embeddings[candidates] @ emb, dtype=np.float32)
+            fused = fuse(cosine, scores[candidates], HYBRID_FUSION, HYBRID_ALPHA, HYBRID_RRF_K)
+            k = min(top_k, len(candidates))
+            best = np.argpartition(-fused, k - 1)[:k]
+            best = best[np.argsort(-fused[best], kind="stable")]
+            row.extend((self.products[candidates[j]], float(fused[j])) for j in best)
         return results
+
+    def search_vectors(self, q_emb: np.ndarray, top_k: int = 10) -> List[List[Tuple[Product, float]]]:
+        """
+        FAISS search for already-encoded (normalized) query vectors, one row per query.
+        """
+        results: List[List[Tuple[Product, float]]] = [[] for _ in range(len(q_emb))]
+        if self.index is None or self.index.ntotal == 0 or top_k <= 0 or len(q_emb) == 0:
+            return results
+        q_emb = np.ascontiguousarray(q_emb, dtype=np.float32)
+        with span("faiss_search"):
+            scores, indices = self.index.search(q_emb, top_k)
+
+        for row, row_scores, row_ids in zip(results, scores, indices):
+            for fid, score in zip(row_ids, row_scores):
+                if fid == -1:
+                    continue
+                p = self.products[self._id_to_row[int(fid)]]
+                row.append((p, float(score)))
+        return results
+
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Preload/build step: create tables, seed, and build + persist the index once so
+    uvicorn workers only map the files at startup.
+
+        python -m app.vector_store build
+    """
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Vector index utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build and persist the product index")
+    build.add_argument("--index-dir", default=VECTOR_INDEX_DIR)
+    build.add_argument("--index-type", default=VECTOR_INDEX_TYPE, choices=INDEX_TYPES)
+    args = parser.parse_args(argv)
+
+    from .db import Base, SessionLocal, engine
+    from .catalogue import load_snapshot, seed_products_if_empty, upgrade_products_table
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        upgrade_products_table(conn)
+    with SessionLocal() as db:
+        seed_products_if_empty(db)
+        snapshot = load_snapshot(db)
+
+    t0 = time.perf_counter()
+    store = ProductVectorStore(
+        list(snapshot.products), index_dir=args.index_dir, index_type=args.index_type, mmap=False
+    )
+    print(
+        f"Indexed {len(store.products)} products ({store.last_reembedded} embedded, "
+        f"index={store.index_type}) into {args.index_dir} in {time.perf_counter() - t0:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .concurrency import Overloaded
+
+# "background" serves liveness immediately and warms up in a thread; "blocking" finishes
+# warm-up inside the startup hook (the previous behaviour)
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background")
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+
+Step = Tuple[str, Callable[[], None]]
+
+
+class Warmup:
+    """
+    Runs the startup steps (DB, catalogue, model + index, ...) and tracks their state
+    for the readiness probe. In the background a failed attempt is retried every
+    `retry_seconds` until it succeeds, e.g. while the database is still starting.
+    """
+
+    def __init__(self, retry_seconds: float = WARMUP_RETRY_SECONDS):
+        self.retry_seconds = retry_seconds
+        self.state = "pending"  # pending -> warming -> ready, or failed (retrying)
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.step_seconds: Dict[str, float] = {}
+        self.started_at: Optional[float] = None
+        self.ready_after: Optional[float] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def run(self, steps: List[Step]):
+        """
+        Run every step once in the calling thread; exceptions propagate.
+        """
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        self.state = "warming"
+        self.attempts += 1
+        for name, fn in steps:
+            t0 = time.perf_counter()
+            fn()
+            self.step_seconds[name] = time.perf_counter() - t0
+        self.state = "ready"
+        self.error = None
+        self.ready_after = time.perf_counter() - self.started_at
+        self._ready.set()
+
+    def start(self, steps: List[Step]):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_until_ready, args=(steps,), name="warmup", daemon=True)
+            self._thread.start()
+
+    def _run_until_ready(self, steps: List[Step]):
+        while not self.ready:
+            try:
+                self.run(steps)
+            except Exception as e:
+                self.state = "failed"
+                self.error = f"{type(e).__name__}: {e}"
+                print(f"Warning: warm-up failed ({self.error}); retrying in {self.retry_seconds}s")
+                time.sleep(self.retry_seconds)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def require(self):
+        if not self.ready:
+            raise Overloaded(f"Service is warming up ({self.state})")
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "error": self.error,
+            "attempts": self.attempts,
+            "ready_after_s": self.ready_after,
+            "step_seconds": self.step_seconds,
+        }
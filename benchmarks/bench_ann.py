@@ -0,0 +1,74 @@
+"""
+Latency / memory / recall@k of the ANN index backends against the exact flat index.
+
+    python -m benchmarks.bench_ann --products 50000 --dim 384 --queries 500 --k 50
+
+Vectors are synthetic (a Gaussian mixture, L2-normalised) so the script runs offline.
+Memory is the serialized index size; recall@k is measured against IndexFlatIP.
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from app.vector_store import INDEX_TYPES, make_index
+
+
+def make_vectors(n: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    x = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    return x
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(t) & set(f[f >= 0])) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--types", default=",".join(INDEX_TYPES))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = make_vectors(args.products, args.dim, clusters=max(8, args.products // 500), rng=rng)
+    queries = make_vectors(args.queries, args.dim, clusters=max(8, args.products // 500), rng=rng)
+    ids = np.arange(args.products, dtype=np.int64)
+
+    truth = None
+    print(f"products={args.products} dim={args.dim} queries={args.queries} k={args.k}")
+    print(f"{'index':>6} {'build_s':>8} {'mem_MB':>8} {'p50_ms':>8} {'p95_ms':>8} {'batch_ms/q':>10} {'recall@k':>9}")
+    for index_type in args.types.split(","):
+        t0 = time.perf_counter()
+        index = make_index(base, ids, index_type)
+        build_s = time.perf_counter() - t0
+        mem_mb = faiss.serialize_index(index).nbytes / 1e6
+
+        latencies = []
+        for q in queries:
+            t0 = time.perf_counter()
+            index.search(q[None, :], args.k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        _, found = index.search(queries, args.k)
+        batch_ms = (time.perf_counter() - t0) * 1000 / args.queries
+
+        if index_type == "flat":
+            truth = found
+        recall = recall_at_k(truth, found) if truth is not None else float("nan")
+        print(
+            f"{index_type:>6} {build_s:8.2f} {mem_mb:8.1f} {np.percentile(latencies, 50):8.3f} "
+            f"{np.percentile(latencies, 95):8.3f} {batch_ms:10.3f} {recall:9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Throughput of `recommend_many` (one encode, one FAISS search, one bulk INSERT)
+vs. handling the same requisitions one call at a time.
+
+    python -m benchmarks.bench_batch --products 2000 --requests 200 --call-overhead-ms 5
+
+Uses the hashing stub encoder unless `--model` names a sentence-transformers model,
+and a throwaway SQLite database for the log writes.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.orm_models import RecommendationLogORM
+from app.recommender import (
+    recommend_one,
+    recommend_many,
+    log_recommendation,
+    log_recommendations,
+)
+from app.scoring import CatalogueFeatures
+from app.vector_store import ProductVectorStore
+from .synthetic import HashingEncoder, make_products, make_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--call-overhead-ms", type=float, default=5.0,
+                        help="simulated fixed cost per encode() call for the stub encoder")
+    parser.add_argument("--model", default=None, help="real sentence-transformers model name")
+    args = parser.parse_args()
+
+    products = make_products(args.products)
+    requests = make_requests(args.requests, seed=1)
+    model = None if args.model else HashingEncoder(call_overhead_ms=args.call_overhead_ms)
+    store = ProductVectorStore(products, model_name=args.model or "stub", model=model)
+    features = CatalogueFeatures(products)
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_batch.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    RecommendationLogORM.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        t0 = time.perf_counter()
+        for req in requests:
+            resp = recommend_one(req, products, store, features)
+            log_recommendation(db, req, resp)
+        single_s = time.perf_counter() - t0
+
+    with Session() as db:
+        t0 = time.perf_counter()
+        outcomes = recommend_many(requests, products, store, features)
+        log_recommendations(db, [(r, o) for r, o in zip(requests, outcomes) if not isinstance(o, Exception)])
+        batch_s = time.perf_counter() - t0
+
+    n = len(requests)
+    print(f"products={args.products} requests={n} encoder={args.model or 'stub'}")
+    print(f"one-by-one: {single_s * 1000:9.1f} ms  {n / single_s:8.1f} req/s")
+    print(f"batched:    {batch_s * 1000:9.1f} ms  {n / batch_s:8.1f} req/s  ({single_s / batch_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Bundle optimizer vs the previous greedy bundling, plus an optimality check.
+
+    python -m benchmarks.bench_bundle --sizes 1000,5000 --requests 200
+
+For every synthetic request the blueprint is scored once, then bundled by
+  * greedy: best product per construct in blueprint order, added while it fits
+    (the pre-optimizer `build_bundle`)
+  * optimizer: `bundle_optimizer.solve_bundle` (branch and bound)
+Reports must-have coverage, objective and solver latency. The first --verify
+requests are also solved with a small candidate pool (2 per construct) both by the
+optimizer and by brute force over that pool; the script exits non-zero if the
+optimizer's objective is ever worse.
+"""
+import argparse
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from app.bundle_optimizer import (
+    BUDGET_LEVELS,
+    COVERAGE_SHARE,
+    DURATION_PENALTY,
+    candidate_pool,
+    priority_weights,
+    quality_matrix,
+    solve_bundle,
+)
+from app.recommender import build_blueprint
+from app.scoring import CatalogueFeatures, score_blueprint
+from .synthetic import make_products, make_requests, make_semantic_scores
+
+
+def objective(positions, quality, weights, durations, budget):
+    _, cost = BUDGET_LEVELS[budget]
+    if not positions:
+        return 0.0
+    best = quality[:, positions].max(axis=1)
+    rows = np.where(best > 0, COVERAGE_SHARE + (1 - COVERAGE_SHARE) * best, 0.0)
+    return float((weights * rows).sum() - cost * len(positions) - DURATION_PENALTY * durations[positions].sum())
+
+
+def greedy(scored, durations, max_duration):
+    chosen, total = [], 0
+    for row in range(len(scored.constructs)):
+        best = scored.best(row)
+        if best is not None and total + durations[best] <= max_duration:
+            chosen.append(best)
+            total += durations[best]
+    return sorted(set(chosen))
+
+
+def brute_force(quality, weights, durations, max_duration, budget, k):
+    max_products, _ = BUDGET_LEVELS[budget]
+    pool = candidate_pool(quality, weights, durations, max_duration, k).tolist()
+    best = 0.0
+    for size in range(1, min(max_products, len(pool)) + 1):
+        for combo in itertools.combinations(pool, size):
+            if durations[list(combo)].sum() <= max_duration:
+                best = max(best, objective(list(combo), quality, weights, durations, budget))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,5000")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--verify", type=int, default=10, help="requests per size checked by brute force")
+    args = parser.parse_args()
+
+    worse = 0
+    for size in [int(s) for s in args.sizes.split(",")]:
+        products = make_products(size)
+        features = CatalogueFeatures(products)
+        semantic = features.semantic_vector(make_semantic_scores(products))
+        requests = make_requests(args.requests, seed=5)
+
+        stats = {"greedy_must": [], "opt_must": [], "greedy_obj": [], "opt_obj": [], "ms": [], "optimal": 0}
+        for i, req in enumerate(requests):
+            blueprint = build_blueprint(req)
+            priorities = [b["priority"] for b in blueprint]
+            scored = score_blueprint(features, [b["construct"] for b in blueprint], req, semantic)
+            weights = priority_weights(priorities, req.max_total_duration_min, req.assessment_budget)
+            quality = quality_matrix(scored)
+            must_rows = [r for r, p in enumerate(priorities) if p == "must"]
+
+            t0 = time.perf_counter()
+            solution = solve_bundle(scored, priorities, features.durations, req.max_total_duration_min, req.assessment_budget)
+            stats["ms"].append((time.perf_counter() - t0) * 1000)
+            stats["optimal"] += solution.optimal
+            greedy_pos = greedy(scored, features.durations, req.max_total_duration_min)
+
+            for key, positions in (("greedy", greedy_pos), ("opt", sorted(solution.positions))):
+                stats[f"{key}_obj"].append(objective(positions, quality, weights, features.durations, req.assessment_budget))
+                if must_rows:
+                    covered = quality[np.ix_(must_rows, positions)].max(axis=1) > 0 if positions else np.zeros(len(must_rows))
+                    stats[f"{key}_must"].append(float(np.mean(covered)))
+
+            if i < args.verify:
+                # Small candidate pools keep exhaustive enumeration tractable
+                small = solve_bundle(scored, priorities, features.durations, req.max_total_duration_min,
+                                     req.assessment_budget, candidates_per_construct=2)
+                found = objective(sorted(small.positions), quality, weights, features.durations, req.assessment_budget)
+                exact = brute_force(quality, weights, features.durations, req.max_total_duration_min,
+                                    req.assessment_budget, 2)
+                if found < exact - 1e-6:
+                    worse += 1
+                    print(f"  size={size} request={i}: optimizer {found:.4f} < brute force {exact:.4f}")
+
+        ms = np.array(stats["ms"])
+        print(
+            f"products={size:6d}  must-have coverage greedy={np.mean(stats['greedy_must']):.3f} "
+            f"optimizer={np.mean(stats['opt_must']):.3f}  objective greedy={np.mean(stats['greedy_obj']):.2f} "
+            f"optimizer={np.mean(stats['opt_obj']):.2f}  solve p50={np.percentile(ms, 50):.2f}ms "
+            f"p95={np.percentile(ms, 95):.2f}ms max={ms.max():.2f}ms  proven optimal={stats['optimal']}/{len(requests)}"
+        )
+
+    if worse:
+        print(f"optimizer worse than brute force on {worse} instances")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Catalogue reads: ORM entities vs column-projected Core rows, and pool checkout cost, as JSON.
+
+    python -m benchmarks.bench_db --sizes 1000,10000,100000 --out benchmarks/results/db.json
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_db --sizes 100000
+
+For each catalogue size (written once into a throwaway SQLite file unless
+DATABASE_URL is set; the products table must then be empty or hold only these rows):
+  * fetch (mode=orm): `Session.query(ProductORM)` + `Product.from_orm_model`, the
+    previous snapshot load
+  * fetch (mode=core): `app.catalogue.fetch_products`, the Core select of the
+    product columns mapped straight into `Product`
+  * fetch (mode=rows): the same Core select without building `Product`s, i.e. the
+    driver + JSON decoding floor
+  * fetch_changed (mode=orm / core): --changed of the products by product_id, what
+    an incremental reload reads
+  * checkout (mode=pre_ping / plain): pool checkout + `SELECT 1`, with and without
+    the liveness ping
+"""
+import argparse
+import os
+import tempfile
+
+from sqlalchemy import create_engine, delete, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.catalogue import PRODUCT_COLUMNS, PRODUCTS, fetch_products
+from app.db import Base, engine_options
+from app.models import Product
+from app.orm_models import ProductORM
+from .report import measure, write_results
+from .synthetic import make_products
+
+
+def _fill(bind, n: int):
+    with bind.begin() as conn:
+        conn.execute(delete(PRODUCTS))
+        products = make_products(n, seed=n)
+        for start in range(0, n, 5000):
+            conn.execute(insert(PRODUCTS), [p.model_dump() for p in products[start:start + 5000]])
+    return [p.product_id for p in products]
+
+
+def orm_fetch(db, product_ids=None):
+    query = db.query(ProductORM).order_by(ProductORM.id)
+    if product_ids is not None:
+        query = query.filter(ProductORM.product_id.in_(product_ids))
+    products = [Product.from_orm_model(o) for o in query.all()]
+    db.expunge_all()
+    return products
+
+
+def bench_size(n: int, bind, Session, changed: float, min_time: float, min_calls: int) -> list:
+    ids = _fill(bind, n)
+    subset = ids[::max(1, int(1 / changed))] if changed > 0 else []
+    results = []
+
+    def run(name, mode, fn, **extra):
+        with Session() as db:
+            stats = measure(lambda i: fn(db), min_time=min_time, min_calls=min_calls)
+        results.append({"name": name, "mode": mode, "products": n, **extra, **stats})
+
+    run("fetch", "orm", orm_fetch)
+    run("fetch", "core", fetch_products)
+    run("fetch", "rows", lambda db: db.execute(select(*PRODUCT_COLUMNS).order_by(PRODUCTS.c.id)).all())
+    if subset:
+        # ORM `IN` lists are chunked like fetch_products does
+        chunk = 500
+        run("fetch_changed", "orm", lambda db: [
+            p for s in range(0, len(subset), chunk) for p in orm_fetch(db, subset[s:s + chunk])
+        ], changed=len(subset))
+        run("fetch_changed", "core", lambda db: fetch_products(db, subset), changed=len(subset))
+    return results
+
+
+def bench_checkout(url: str, min_time: float) -> list:
+    results = []
+    for mode, pre_ping in (("pre_ping", True), ("plain", False)):
+        bind = create_engine(url, **{**engine_options(url), "pool_pre_ping": pre_ping})
+
+        def checkout(i):
+            with bind.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        results.append({"name": "checkout", "mode": mode, **measure(checkout, min_time=min_time)})
+        bind.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--changed", type=float, default=0.01, help="fraction read by fetch_changed")
+    parser.add_argument("--min-time", type=float, default=2.0, help="seconds per benchmark")
+    parser.add_argument("--min-calls", type=int, default=3)
+    parser.add_argument("--out", default=None, help="JSON result file ('-' prints it instead)")
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL") or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_db.db')}"
+    bind = create_engine(url, **engine_options(url))
+    Base.metadata.create_all(bind=bind)
+    Session = sessionmaker(bind=bind)
+
+    results = []
+    for n in (int(s) for s in args.sizes.split(",")):
+        results += bench_size(n, bind, Session, args.changed, args.min_time, args.min_calls)
+    results += bench_checkout(url, args.min_time)
+    write_results(results, args.out, benchmark="db", database=bind.dialect.name, changed=args.changed)
+
+
+if __name__ == "__main__":
+    main()
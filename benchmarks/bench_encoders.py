@@ -0,0 +1,140 @@
+"""
+Parity + performance of the embedding backends (sentence-transformers, onnx, onnx-int8).
+
+    python -m app.encoders export --out data/onnx        # once
+    python -m benchmarks.bench_encoders --texts 512 --max-drift 0.02
+
+Each backend runs in its own subprocess so load time and RSS are measured in isolation.
+Drift is 1 - cosine(backend, reference) per text; the script exits non-zero when the
+worst drift of any backend exceeds --max-drift, or when a backend could not be loaded
+(no ONNX export, onnxruntime missing) and so was not compared. --allow-missing
+checks only the backends that ran; it still fails unless the reference and at least
+one other backend were compared.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.encoders import BACKENDS, ONNX_MODEL_DIR, load_encoder
+from .synthetic import make_products, make_requests
+
+MAX_DRIFT = 0.02  # worst 1 - cosine against sentence-transformers; tests/test_encoder_drift.py uses it too
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def sample_texts(n: int):
+    products = make_products(n // 2, seed=7)
+    requests = make_requests(n - len(products), seed=7)
+    texts = [f"{p.name} {p.description} {' '.join(p.constructs)}" for p in products]
+    texts += [f"{r.job_title}. {r.job_description}" for r in requests]
+    return texts
+
+
+def worker(backend: str, n_texts: int, out_path: str, model_dir: str):
+    texts = sample_texts(n_texts)
+    rss_before = _rss_mb()
+    t0 = time.perf_counter()
+    encoder = load_encoder(backend, model_dir=model_dir)
+    encoder.encode(texts[:2])  # warm-up
+    load_s = time.perf_counter() - t0
+
+    latencies = []
+    for text in texts[:100]:
+        t0 = time.perf_counter()
+        encoder.encode([text])
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    emb = encoder.encode(texts)
+    batch_s = time.perf_counter() - t0
+    np.save(out_path, emb)
+
+    print(json.dumps({
+        "backend": backend,
+        "load_s": load_s,
+        "rss_mb": _rss_mb(),
+        "rss_model_mb": _rss_mb() - rss_before,
+        "p50_single_ms": float(np.percentile(latencies, 50)),
+        "p95_single_ms": float(np.percentile(latencies, 95)),
+        "throughput_texts_per_s": len(texts) / batch_s,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--max-drift", type=float, default=MAX_DRIFT)
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="do not fail when some (not all) backends cannot be loaded")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.texts, args.out, args.model_dir)
+        return
+
+    tmp = tempfile.mkdtemp()
+    results, embeddings, skipped = [], {}, []
+    for backend in args.backends.split(","):
+        out = os.path.join(tmp, f"{backend}.npy")
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_encoders", "--worker", backend,
+             "--texts", str(args.texts), "--out", out, "--model-dir", args.model_dir],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{backend}: skipped ({proc.stderr.strip().splitlines()[-1] if proc.stderr else 'failed'})")
+            skipped.append(backend)
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        embeddings[backend] = np.load(out)
+
+    reference = embeddings.get("sentence-transformers")
+    compared = [b for b in embeddings if b != "sentence-transformers"] if reference is not None else []
+    ok = True
+    print(
+        f"{'backend':>22} {'load_s':>7} {'rss_MB':>7} {'p50_ms':>7} {'p95_ms':>7} "
+        f"{'texts/s':>8} {'mean_drift':>10} {'max_drift':>9}"
+    )
+    for r in results:
+        mean_drift = max_drift = float("nan")
+        if reference is not None:
+            cos = (embeddings[r["backend"]] * reference).sum(axis=1)
+            mean_drift, max_drift = float(np.mean(1 - cos)), float(np.max(1 - cos))
+            ok = ok and max_drift <= args.max_drift
+        print(
+            f"{r['backend']:>22} {r['load_s']:7.2f} {r['rss_mb']:7.0f} {r['p50_single_ms']:7.2f} "
+            f"{r['p95_single_ms']:7.2f} {r['throughput_texts_per_s']:8.0f} {mean_drift:10.5f} {max_drift:9.5f}"
+        )
+    if reference is None:
+        print("FAILED: no reference (sentence-transformers) embeddings; drift not checked.")
+        ok = False
+    elif not compared:
+        print("FAILED: no backend was compared against the reference.")
+        ok = False
+    if skipped:
+        print(f"SKIPPED: {', '.join(skipped)} (not compared)")
+        if not args.allow_missing:
+            print("FAILED: pass --allow-missing to check only the backends that loaded.")
+            ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Bulk catalogue import: throughput of `app.importer` and of the incremental re-index.
+
+    python -m benchmarks.bench_import --products 100000 --changed 0.01
+
+Steps, on a throwaway SQLite database unless DATABASE_URL is set:
+  * write N synthetic products to a JSONL (or --format csv) file
+  * import it into an empty catalogue (all inserts), then build the vector index
+  * re-import with --changed of the products edited: only those are updated, and the
+    vector store re-embeds only them
+  * reload the catalogue snapshot from the change feed (what every API worker does
+    after an import) against a full reload, and the copy-on-write vector store sync
+Embeddings use the hashing stub encoder, so index times measure the pipeline, not a model.
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine
+
+from app.catalogue import CatalogueStore, load_snapshot
+from app.db import Base
+from app.importer import LIST_FIELDS, PRODUCT_FIELDS, import_file
+from app.vector_store import ProductVectorStore
+from sqlalchemy.orm import Session
+from .synthetic import HashingEncoder, make_products
+
+
+def write_catalogue(path: str, products, fmt: str):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "jsonl":
+            for p in products:
+                f.write(json.dumps(p.dict()) + "\n")
+        else:
+            writer = csv.writer(f)
+            writer.writerow(PRODUCT_FIELDS)
+            for p in products:
+                row = p.dict()
+                writer.writerow(["|".join(row[k]) if k in LIST_FIELDS else row[k] for k in PRODUCT_FIELDS])
+
+
+def timed_import(path: str, bind, batch_size: int, trace: bool):
+    if trace:
+        tracemalloc.start()
+    report = import_file(path, bind=bind, batch_size=batch_size)
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if trace else None
+    if trace:
+        tracemalloc.stop()
+    return report, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--changed", type=float, default=0.01, help="fraction edited before the re-import")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--trace-memory", action="store_true", help="report the importer's peak Python allocations")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    url = os.getenv("DATABASE_URL") or f"sqlite:///{os.path.join(tmp, 'bench_import.db')}"
+    bind = create_engine(url)
+    Base.metadata.create_all(bind=bind)
+    path = os.path.join(tmp, f"catalogue.{args.format}")
+
+    products = make_products(args.products, seed=11)
+    write_catalogue(path, products, args.format)
+    size_mb = os.path.getsize(path) / 2 ** 20
+
+    report, peak = timed_import(path, bind, args.batch_size, args.trace_memory)
+    print(f"file={args.format} {size_mb:.1f} MB  products={args.products}  batch_size={args.batch_size}")
+    print(f"initial import: {report.elapsed_s:7.2f}s  {report.rows_per_s:9,.0f} rows/s  "
+          f"inserted={report.inserted}" + (f"  peak={peak:.1f} MB" if peak is not None else ""))
+
+    encoder = HashingEncoder()
+    index_dir = os.path.join(tmp, "vector_index")
+    catalogue = CatalogueStore()
+    with Session(bind) as db:
+        catalogue.refresh(db)
+    snapshot = catalogue.snapshot
+    t0 = time.perf_counter()
+    serving = ProductVectorStore(
+        list(snapshot.products), model_name="stub", model=encoder, index_dir=index_dir, mmap=False
+    )
+    print(f"initial index:  {time.perf_counter() - t0:7.2f}s  embedded={len(snapshot.products)}")
+
+    n_changed = int(args.products * args.changed)
+    step = max(1, args.products // max(1, n_changed))
+    for p in products[::step][:n_changed]:
+        p.description += " revised"
+    write_catalogue(path, products, args.format)
+
+    report, peak = timed_import(path, bind, args.batch_size, args.trace_memory)
+    print(f"re-import:      {report.elapsed_s:7.2f}s  {report.rows_per_s:9,.0f} rows/s  "
+          f"updated={report.updated} unchanged={report.unchanged}" + (f"  peak={peak:.1f} MB" if peak is not None else ""))
+
+    with Session(bind) as db:
+        t0 = time.perf_counter()
+        catalogue.refresh(db)
+        incremental_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        load_snapshot(db)
+        full_s = time.perf_counter() - t0
+    snapshot = catalogue.snapshot
+    print(f"reload:         {incremental_s:7.2f}s  from the change feed "
+          f"(incremental={catalogue.incremental_reloads}; full reload {full_s:.2f}s)")
+
+    t0 = time.perf_counter()
+    store = serving.copy()
+    store.sync(snapshot.products)
+    print(f"store swap:     {time.perf_counter() - t0:7.2f}s  copy-on-write, embedded={store.last_reembedded}")
+
+    t0 = time.perf_counter()
+    store = ProductVectorStore(list(snapshot.products), model_name="stub", model=encoder, index_dir=index_dir, mmap=False)
+    print(f"re-index:       {time.perf_counter() - t0:7.2f}s  embedded={store.last_reembedded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Recommendation-log ingestion throughput: commit per row (the old in-request write)
+vs. `LogStorage` batches (bulk INSERT, or COPY on Postgres).
+
+    python -m benchmarks.bench_logs --rows 20000 --batch-size 200
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_logs --methods row,insert,copy
+
+Without DATABASE_URL a throwaway SQLite file is used (COPY is then skipped). On
+Postgres every method writes into the partitioned table; the rows are left in place.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.log_storage import LogStorage
+from app.orm_models import RecommendationLogORM
+from app.recommender import log_row, recommend_many
+from app.scoring import CatalogueFeatures
+from app.vector_store import ProductVectorStore
+from .synthetic import HashingEncoder, make_products, make_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--methods", default="row,insert,copy")
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL") or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_logs.db')}"
+    engine = create_engine(url)
+    spill = os.path.join(tempfile.mkdtemp(), "spill.jsonl")
+
+    # A few distinct recommendations, repeated: row construction is not what is measured
+    products = make_products(500)
+    requests = make_requests(50, seed=7)
+    store = ProductVectorStore(products, model_name="stub", model=HashingEncoder())
+    outcomes = recommend_many(requests, products, store, CatalogueFeatures(products))
+    pairs = [(r, o) for r, o in zip(requests, outcomes) if not isinstance(o, Exception)]
+    rows = [log_row(*pairs[i % len(pairs)]) for i in range(args.rows)]
+
+    LogStorage(bind=engine, spill_path=spill).prepare()
+    Session = sessionmaker(bind=engine)
+    print(f"database={engine.dialect.name} rows={args.rows} batch_size={args.batch_size}")
+    for method in args.methods.split(","):
+        if method == "copy" and engine.dialect.name != "postgresql":
+            print("copy:   skipped (Postgres only)")
+            continue
+        t0 = time.perf_counter()
+        if method == "row":
+            with Session() as db:
+                for row in rows:
+                    db.add(RecommendationLogORM(**row))
+                    db.commit()
+        else:
+            storage = LogStorage(bind=engine, method=method, spill_path=spill)
+            for start in range(0, len(rows), args.batch_size):
+                storage.write(rows[start:start + args.batch_size])
+        elapsed = time.perf_counter() - t0
+        print(f"{method + ':':7s} {elapsed * 1000:9.1f} ms  {len(rows) / elapsed:10.1f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Microbenchmarks of the recommendation hot path on synthetic catalogues, as JSON.
+
+    python -m benchmarks.bench_micro --sizes 100,10000,100000 --out benchmarks/results/micro.json
+    python -m benchmarks.compare benchmarks/results/micro-main.json benchmarks/results/micro.json
+
+For each catalogue size it times, rotating through --requests synthetic requests:
+  * build_blueprint
+  * rank_candidates: the per-product loop, for one construct's candidates
+  * search: ProductVectorStore.search (stub encode + retrieval)
+  * match_products: scoring + best product per construct
+  * build_bundle: the bundle optimizer over precomputed scores
+  * recommend_one: the whole in-process pipeline
+  * pdf: app.pdf_utils.render_pdf, once per run (it does not depend on the catalogue size)
+Setup (catalogue features, vector store) is timed separately. Everything runs offline
+with the hashing stub encoder; --min-time bounds the time spent per benchmark.
+"""
+import argparse
+import time
+
+from app.pdf_utils import render_pdf
+from app.recommender import (
+    build_blueprint,
+    build_bundle,
+    match_products,
+    query_text,
+    rank_candidates,
+    recommend_one,
+    score_request,
+    semantic_top_k,
+)
+from app.scoring import CatalogueFeatures
+from app.vector_store import ProductVectorStore
+from .report import measure, write_results
+from .synthetic import HashingEncoder, make_products, make_requests
+
+BENCHMARKS = (
+    "build_blueprint", "rank_candidates", "search", "match_products", "build_bundle", "recommend_one", "pdf",
+)
+
+
+def bench_size(n: int, requests, selected, min_time: float) -> list:
+    results = []
+    t0 = time.perf_counter()
+    products = make_products(n, seed=n)
+    generate_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    features = CatalogueFeatures(products)
+    features_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    store = ProductVectorStore(products, model_name="stub", model=HashingEncoder(), index_dir=None)
+    store_s = time.perf_counter() - t0
+    results.append({
+        "name": "setup", "products": n, "generate_s": round(generate_s, 4),
+        "features_s": round(features_s, 4), "vector_store_s": round(store_s, 4), "index": store.index_type,
+    })
+
+    top_k = semantic_top_k(n)
+    texts = [query_text(r) for r in requests]
+    semantic = store.search_batch(texts, top_k)
+    blueprints = [build_blueprint(r) for r in requests]
+    scored = [score_request(b, r, products, store, features, s) for b, r, s in zip(blueprints, requests, semantic)]
+    m = len(requests)
+
+    def run(name, fn):
+        if name in selected:
+            results.append({"name": name, "products": n, **measure(fn, min_time=min_time)})
+
+    run("build_blueprint", lambda i: build_blueprint(requests[i % m]))
+
+    # rank_candidates gets one construct's candidates, as the loop engine passed them
+    ranking_inputs = []
+    for req, blueprint, found in zip(requests, blueprints, semantic):
+        construct = blueprint[0]["construct"] if blueprint else "cognitive_ability"
+        candidates = [
+            p for p in products
+            if construct in p.constructs and any(lang in p.languages for lang in req.languages)
+        ]
+        ranking_inputs.append((candidates, construct, req, {p.product_id: s for p, s in found}))
+
+    run("rank_candidates", lambda i: rank_candidates(*ranking_inputs[i % m]))
+    run("search", lambda i: store.search(texts[i % m], top_k))
+    run("match_products", lambda i: match_products(
+        blueprints[i % m], requests[i % m], products, store, features, semantic[i % m]
+    ))
+    run("build_bundle", lambda i: build_bundle(blueprints[i % m], requests[i % m], products, scored[i % m], features))
+    run("recommend_one", lambda i: recommend_one(requests[i % m], products, store, features, semantic[i % m]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,10000,100000")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS))
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark (at least 5 calls)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None, help="JSON result file ('-' prints it instead)")
+    args = parser.parse_args()
+
+    selected = set(args.benchmarks.split(","))
+    requests = make_requests(args.requests, seed=args.seed)
+    results = []
+    for n in (int(s) for s in args.sizes.split(",")):
+        results += bench_size(n, requests, selected, args.min_time)
+
+    if "pdf" in selected:
+        products = make_products(100)
+        store = ProductVectorStore(products, model_name="stub", model=HashingEncoder(), index_dir=None)
+        features = CatalogueFeatures(products)
+        responses = [recommend_one(r, products, store, features) for r in requests]
+        m = len(requests)
+        results.append({
+            "name": "pdf",
+            **measure(lambda i: render_pdf(requests[i % m], responses[i % m]), min_time=args.min_time),
+        })
+
+    write_results(results, args.out, benchmark="micro", requests=args.requests, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
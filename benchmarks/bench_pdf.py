@@ -0,0 +1,112 @@
+"""
+PDF rendering throughput, serial and through thread / process pools, as JSON.
+
+    python -m benchmarks.bench_pdf --documents 500 --workers 1,2,4 --out benchmarks/results/pdf.json
+
+Renders --documents bundle PDFs from synthetic recommendations:
+  * pdf_one: app.pdf_utils.render_pdf latency, in process
+  * pdf_pool: all documents through a pool of N threads or N processes in chunks of
+    --chunk-size (what /recommend/pdf/bulk?format=zip does); docs_per_s is the
+    throughput. Threads share the GIL, so only processes scale with N.
+  * pdf_report: one combined report of all documents (format=combined)
+  * pdf_zip: app.pdf_service.zip_stream end to end, with the pool configured by
+    PDF_WORKERS (compare PDF_WORKERS=0 for the in-process thread pool)
+Process-pool start-up is excluded (the API warms the pool at startup) and reported
+as setup.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app import pdf_service
+from app.pdf_utils import fonts, render_pdf, render_pdfs, render_report
+from app.recommender import recommend_one
+from app.scoring import CatalogueFeatures
+from app.vector_store import ProductVectorStore
+from .report import measure, write_results
+from .synthetic import HashingEncoder, make_products, make_requests
+
+
+def _pool(mode: str, workers: int):
+    if mode == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def bench_pool(mode: str, workers: int, pairs, chunk_size: int, repeat: int) -> list:
+    t0 = time.perf_counter()
+    pool = _pool(mode, workers)
+    for future in [pool.submit(fonts) for _ in range(workers)]:
+        future.result()
+    setup_s = time.perf_counter() - t0
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+    best = None
+    size = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = sum(len(pdf) for batch in pool.map(render_pdfs, chunks) for pdf in batch)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    pool.shutdown()
+    return [{
+        "name": "pdf_pool", "mode": mode, "concurrency": workers, "documents": len(pairs),
+        "setup_s": round(setup_s, 4), "elapsed_s": round(best, 4),
+        "docs_per_s": round(len(pairs) / best, 2), "mb": round(size / 1e6, 3),
+    }]
+
+
+async def _zip(rows) -> int:
+    return sum([len(chunk) async for chunk in pdf_service.zip_stream(rows)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--workers", default="1,2,4", help="pool sizes to compare")
+    parser.add_argument("--modes", default="thread,process")
+    parser.add_argument("--chunk-size", type=int, default=pdf_service.PDF_CHUNK_SIZE)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per pool (the fastest is kept)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds for pdf_one")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None, help="JSON result file ('-' prints it instead)")
+    args = parser.parse_args()
+
+    products = make_products(200, seed=args.seed)
+    store = ProductVectorStore(products, model_name="stub", model=HashingEncoder(), index_dir=None)
+    features = CatalogueFeatures(products)
+    requests = make_requests(args.documents, seed=args.seed)
+    pairs = [(r, recommend_one(r, products, store, features)) for r in requests]
+    n = len(pairs)
+
+    results = [{"name": "pdf_one", **measure(lambda i: render_pdf(*pairs[i % n]), min_time=args.min_time)}]
+    for mode in args.modes.split(","):
+        for workers in (int(w) for w in args.workers.split(",")):
+            results += bench_pool(mode, workers, pairs, args.chunk_size, args.repeat)
+
+    rows = [(i, pair, None) for i, pair in enumerate(pairs)]
+    t0 = time.perf_counter()
+    size = len(render_report(rows))
+    elapsed = time.perf_counter() - t0
+    results.append({
+        "name": "pdf_report", "documents": n, "elapsed_s": round(elapsed, 4),
+        "docs_per_s": round(n / elapsed, 2), "mb": round(size / 1e6, 3),
+    })
+
+    pdf_service.warm()
+    t0 = time.perf_counter()
+    size = asyncio.run(_zip(rows))
+    elapsed = time.perf_counter() - t0
+    results.append({
+        "name": "pdf_zip", "mode": pdf_service.stats()["mode"], "concurrency": max(pdf_service.PDF_WORKERS, 1),
+        "documents": n, "elapsed_s": round(elapsed, 4), "docs_per_s": round(n / elapsed, 2),
+        "mb": round(size / 1e6, 3),
+    })
+    pdf_service.pdf_executor.shutdown()
+
+    write_results(results, args.out, benchmark="pdf", documents=n, chunk_size=args.chunk_size, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
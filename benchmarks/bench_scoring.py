@@ -0,0 +1,95 @@
+"""
+Parity check + benchmark: vectorized `score_blueprint` vs the per-product
+`rank_candidates` loop.
+
+    python -m benchmarks.bench_scoring --sizes 100,1000,5000 --requests 50
+
+Exits non-zero if any ranking differs between the two engines.
+"""
+import argparse
+import sys
+import time
+
+from app.recommender import build_blueprint, rank_candidates
+from app.scoring import CatalogueFeatures, score_blueprint
+from .synthetic import make_products, make_requests, make_semantic_scores
+
+
+def loop_rankings(blueprint, req, products, semantic_scores):
+    out = []
+    for element in blueprint:
+        construct = element["construct"]
+        candidates = [
+            p for p in products
+            if construct in p.constructs
+            and any(lang in p.languages for lang in req.languages)
+        ]
+        ranked = rank_candidates(candidates, construct, req, semantic_scores)
+        out.append([p.product_id for p in ranked])
+    return out
+
+
+def vectorized_rankings(blueprint, req, features, semantic):
+    constructs = [element["construct"] for element in blueprint]
+    scored = score_blueprint(features, constructs, req, semantic)
+    rankings = []
+    for row in range(len(constructs)):
+        full = [features.product_ids[i] for i in scored.top_k(row)]
+        # argpartition top-k must agree with the head of the full ranking
+        for k in (1, 5):
+            if [features.product_ids[i] for i in scored.top_k(row, k)] != full[:k]:
+                return None
+        rankings.append(full)
+    return rankings
+
+
+def run(size: int, n_requests: int) -> dict:
+    products = make_products(size, seed=size)
+    semantic_scores = make_semantic_scores(products, seed=size)
+    requests = make_requests(n_requests, seed=size)
+    blueprints = [build_blueprint(r) for r in requests]
+
+    t0 = time.perf_counter()
+    features = CatalogueFeatures(products)
+    build_s = time.perf_counter() - t0
+    semantic = features.semantic_vector(semantic_scores)
+
+    t0 = time.perf_counter()
+    expected = [loop_rankings(b, r, products, semantic_scores) for b, r in zip(blueprints, requests)]
+    loop_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    actual = [vectorized_rankings(b, r, features, semantic) for b, r in zip(blueprints, requests)]
+    vec_s = time.perf_counter() - t0
+
+    return {
+        "products": size,
+        "requests": n_requests,
+        "feature_build_ms": build_s * 1000,
+        "loop_ms_per_request": loop_s * 1000 / n_requests,
+        "vectorized_ms_per_request": vec_s * 1000 / n_requests,
+        "speedup": loop_s / vec_s if vec_s else float("inf"),
+        "parity": expected == actual,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    ok = True
+    for size in [int(s) for s in args.sizes.split(",")]:
+        r = run(size, args.requests)
+        ok = ok and r["parity"]
+        print(
+            f"products={r['products']:>7}  loop={r['loop_ms_per_request']:8.2f} ms/req  "
+            f"vectorized={r['vectorized_ms_per_request']:7.2f} ms/req  "
+            f"speedup={r['speedup']:6.1f}x  build={r['feature_build_ms']:7.1f} ms  parity={r['parity']}"
+        )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
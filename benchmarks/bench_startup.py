@@ -0,0 +1,131 @@
+"""
+Cold-start timings of the API: import cost and time to the first recommendation.
+
+    python -m benchmarks.bench_startup --products 2000 --runs 3
+
+Each run starts from a fresh interpreter:
+  * import: wall time of `import app.main` plus which heavy modules it pulled in
+  * serve: `uvicorn app.main:app` on a throwaway SQLite catalogue (persisted index is
+    reused after the first run), timing until /health/live answers, /health/ready
+    answers 200 and the first POST /recommend succeeds.
+The embedding backend is whatever EMBEDDING_BACKEND / EMBEDDING_MODEL select.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from .synthetic import make_requests
+
+HEAVY_MODULES = ("faiss", "torch", "sentence_transformers", "onnxruntime", "reportlab")
+
+_IMPORT_PROBE = (
+    "import json, sys, time\n"
+    "t0 = time.perf_counter()\n"
+    "import app.main\n"
+    "elapsed = time.perf_counter() - t0\n"
+    "print(json.dumps({'import_s': elapsed, 'heavy_modules': [m for m in %r if m in sys.modules]}))\n"
+) % (HEAVY_MODULES,)
+
+
+def _env(database_url: str, index_dir: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url, VECTOR_INDEX_DIR=index_dir, STARTUP_WARMUP="background")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    return env
+
+
+def _seed(env: dict, n_products: int):
+    code = (
+        "import sys\n"
+        "from app.db import Base, SessionLocal, engine\n"
+        "from app.orm_models import ProductORM\n"
+        "from benchmarks.synthetic import make_products\n"
+        "Base.metadata.create_all(bind=engine)\n"
+        "with SessionLocal() as db:\n"
+        "    db.bulk_save_objects([ProductORM(**p.dict()) for p in make_products(int(sys.argv[1]))])\n"
+        "    db.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", code, str(n_products)], check=True, env=env)
+
+
+def _request(url: str, body: dict = None) -> int:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def _until(predicate, t0: float, deadline: float) -> float:
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise RuntimeError("API did not become ready in time")
+        time.sleep(0.02)
+    return time.perf_counter() - t0
+
+
+def serve_run(env: dict, port: int, timeout: float) -> dict:
+    base = f"http://127.0.0.1:{port}"
+    sample = make_requests(1, seed=3)[0].dict()
+    t0 = time.perf_counter()
+    deadline = t0 + timeout
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        live_s = _until(lambda: _request(f"{base}/health/live") == 200, t0, deadline)
+        ready_s = _until(lambda: _request(f"{base}/health/ready") == 200, t0, deadline)
+        first_s = _until(lambda: _request(f"{base}/recommend", sample) == 200, t0, deadline)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return {"live_s": live_s, "ready_s": ready_s, "first_recommendation_s": first_s}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(f"sqlite:///{os.path.join(tmp, 'catalogue.db')}", os.path.join(tmp, "vector_index"))
+        _seed(env, args.products)
+
+        imports = []
+        for _ in range(args.runs):
+            out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], env=env, check=True,
+                                 capture_output=True, text=True).stdout
+            imports.append(json.loads(out.strip().splitlines()[-1]))
+
+        # The first serve run also builds and persists the index
+        runs = [serve_run(env, args.port, args.timeout) for _ in range(args.runs + 1)]
+
+    def median(rows, key):
+        return float(np.median([r[key] for r in rows]))
+
+    print(json.dumps({
+        "products": args.products,
+        "import_s": median(imports, "import_s"),
+        "heavy_modules_on_import": imports[0]["heavy_modules"],
+        "cold_build": runs[0],
+        "warm_index": {key: median(runs[1:], key) for key in runs[0]},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare two benchmark result files (e.g. from two commits).
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Results are matched on their name and parameters (products, route, concurrency...).
+Latency metrics (`*_ms`, `*_s`) regress when they grow; throughput metrics
+(`ops_per_s`, `req_per_s`, `docs_per_s`) regress when they shrink. Exits with 1 if
+any compared metric regressed by more than --threshold, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+# Keys that identify a result rather than measure it
+_PARAMS = ("name", "products", "route", "concurrency", "mode", "size", "documents")
+_HIGHER_IS_BETTER = ("ops_per_s", "req_per_s", "docs_per_s")
+
+
+def _key(row: dict) -> Tuple:
+    return tuple((k, row[k]) for k in _PARAMS if k in row)
+
+
+def _load(path: str) -> Tuple[dict, Dict[Tuple, dict]]:
+    with open(path) as f:
+        payload = json.load(f)
+    return payload.get("environment", {}), {_key(row): row for row in payload["results"]}
+
+
+def _compared(metric: str) -> bool:
+    return metric in _HIGHER_IS_BETTER or metric.endswith(("_ms", "_s"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    parser.add_argument("--metrics", default="p50_ms,p95_ms,ops_per_s,req_per_s,docs_per_s",
+                        help="comma-separated metrics to compare ('all' for every latency/throughput metric)")
+    args = parser.parse_args()
+
+    base_env, base = _load(args.baseline)
+    cand_env, cand = _load(args.candidate)
+    wanted = None if args.metrics == "all" else set(args.metrics.split(","))
+    print(f"baseline {base_env.get('commit')}  candidate {cand_env.get('commit')}  threshold {args.threshold:.0%}")
+
+    regressions = 0
+    for key in base:
+        if key not in cand:
+            continue
+        label = " ".join(f"{v}" for _, v in key)
+        for metric, old in base[key].items():
+            new = cand[key].get(metric)
+            if not _compared(metric) or (wanted and metric not in wanted):
+                continue
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+                continue
+            change = (new - old) / old
+            worse = -change if metric in _HIGHER_IS_BETTER else change
+            flag = ""
+            if worse > args.threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            elif worse < -args.threshold:
+                flag = "  improved"
+            print(f"{label:40s} {metric:12s} {old:12.4f} -> {new:12.4f}  {change:+7.1%}{flag}")
+
+    missing = [k for k in base if k not in cand]
+    if missing:
+        print(f"{len(missing)} baseline results have no counterpart in the candidate")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Offline retrieval evaluation: ranking quality and latency of semantic (FAISS),
+lexical (BM25) and hybrid retrieval.
+
+    python -m benchmarks.eval_retrieval --products 10000 --queries 500 --k 10
+    python -m benchmarks.eval_retrieval --queries-file judged.jsonl --model all-MiniLM-L6-v2
+
+Without --queries-file, known-item queries are generated from the synthetic
+catalogue: a few words of one product's constructs and description plus noise
+words, with that product as the only relevant result. A judged file is JSON Lines
+of {"query": "...", "relevant": ["product_id", ...]} against the same synthetic
+catalogue (--products / --seed). Embeddings use the hashing stub encoder unless
+--model names a sentence-transformers model.
+
+Reported per mode: MRR@k, recall@k, and retrieval latency per query (p50/p95,
+query encoding excluded since it is the same for every mode).
+"""
+import argparse
+import json
+import random
+import time
+from typing import List, Set, Tuple
+
+import numpy as np
+
+from app import vector_store
+from app.lexical import tokenize
+from app.vector_store import ProductVectorStore
+from .synthetic import WORDS, HashingEncoder, make_products
+
+MODES = ("semantic", "lexical", "hybrid-rrf", "hybrid-weighted")
+
+
+def known_item_queries(products, n: int, seed: int) -> List[Tuple[str, Set[str]]]:
+    rng = random.Random(seed)
+    queries = []
+    for p in rng.sample(products, min(n, len(products))):
+        words = tokenize(p.description)
+        picked = rng.sample(words, min(len(words), 5))
+        construct = rng.choice(p.constructs).replace("_", " ")
+        text = " ".join([construct] + picked + rng.choices(WORDS, k=2))
+        queries.append((text, {p.product_id}))
+    return queries
+
+
+def load_queries(path: str) -> List[Tuple[str, Set[str]]]:
+    with open(path, encoding="utf-8") as f:
+        return [(row["query"], set(row["relevant"])) for row in map(json.loads, f) if row.get("query")]
+
+
+def evaluate(store: ProductVectorStore, queries, q_emb: np.ndarray, mode: str, k: int) -> dict:
+    retrieval, _, fusion = mode.partition("-")
+    if fusion:
+        vector_store.HYBRID_FUSION = fusion
+    rr, recall, latencies = [], [], []
+    for (text, relevant), emb in zip(queries, q_emb):
+        t0 = time.perf_counter()
+        found = store.retrieve(emb[None, :], [text], k, mode=retrieval)[0]
+        latencies.append(time.perf_counter() - t0)
+        ranked = [p.product_id for p, _ in found]
+        first = next((i for i, pid in enumerate(ranked) if pid in relevant), None)
+        rr.append(0.0 if first is None else 1.0 / (first + 1))
+        recall.append(len(relevant.intersection(ranked)) / len(relevant))
+    ms = np.asarray(latencies) * 1000
+    return {
+        "mode": mode,
+        f"mrr@{k}": round(float(np.mean(rr)), 4),
+        f"recall@{k}": round(float(np.mean(recall)), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--queries-file", default=None)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--model", default=None, help="sentence-transformers model (default: hashing stub)")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per mode")
+    args = parser.parse_args()
+
+    products = make_products(args.products, seed=args.seed)
+    encoder = HashingEncoder() if args.model is None else None
+    store = ProductVectorStore(
+        products, model_name=args.model or "stub", model=encoder, index_dir=None, retrieval_mode="hybrid"
+    )
+    queries = load_queries(args.queries_file) if args.queries_file else known_item_queries(products, args.queries, args.seed)
+    q_emb = store.encode_queries([text for text, _ in queries])
+
+    if not args.json:
+        print(f"products={len(products)} queries={len(queries)} k={args.k} "
+              f"shortlist={vector_store.HYBRID_SHORTLIST} index={store.index_type}")
+    for mode in args.modes.split(","):
+        result = evaluate(store, queries, q_emb, mode, args.k)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print("  ".join(f"{key}={value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
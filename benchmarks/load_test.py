@@ -0,0 +1,257 @@
+"""
+End-to-end load driver for the API: concurrent clients against the FastAPI app.
+
+    python -m benchmarks.load_test --products 10000 --requests 2000 --concurrency 16 --out benchmarks/results/load.json
+    python -m benchmarks.load_test --url http://localhost:8000 --duration 60 --concurrency 32
+
+By default the app runs in process (httpx ASGI transport, no sockets) on a throwaway
+SQLite database seeded with --products synthetic products, with the hashing stub
+encoder (--call-overhead-ms mimics a model forward pass), so it runs offline. With
+--url the same traffic goes to a running server and its catalogue is used as is.
+
+Traffic is a closed loop: --concurrency clients each send the next request as soon
+as the previous one answers. --mix sets route weights (recommend, batch, pdf,
+stream). Every payload is distinct unless --distinct N is given, in which case N
+payloads are reused (exercising the response cache). Reports per-route latency
+percentiles, status codes and throughput, plus the server's per-stage timings from
+/admin/pipeline. Needs httpx (also used by FastAPI's TestClient).
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from .report import latency_stats, write_results
+
+ROUTES = {
+    "recommend": "/recommend",
+    "batch": "/recommend/batch",
+    "pdf": "/recommend/pdf",
+    "stream": "/recommend/stream",
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ROUTES:
+            raise SystemExit(f"unknown route {name!r} in --mix (expected {', '.join(ROUTES)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class Traffic:
+    """
+    Deterministic stream of (route, JSON body) pairs.
+    """
+
+    def __init__(self, mix: Dict[str, float], distinct: int, batch_size: int, seed: int):
+        from .synthetic import make_requests
+
+        self.rng = random.Random(seed)
+        self.routes = list(mix)
+        self.weights = [mix[r] for r in self.routes]
+        self.distinct = distinct
+        self.batch_size = batch_size
+        self.pool = [r.dict() for r in make_requests(max(distinct, 256), seed=seed)]
+        self.payloads = 0
+        self.issued = 0  # HTTP calls
+
+    def _payload(self) -> dict:
+        self.payloads += 1
+        if self.distinct:
+            return self.pool[self.rng.randrange(self.distinct)]
+        body = dict(self.rng.choice(self.pool))
+        body["job_title"] = f"{body['job_title']} #{self.payloads}"  # defeat the response cache
+        return body
+
+    def next(self) -> Tuple[str, dict]:
+        self.issued += 1
+        route = self.rng.choices(self.routes, self.weights)[0]
+        if route == "batch":
+            return route, {"requests": [self._payload() for _ in range(self.batch_size)]}
+        return route, self._payload()
+
+
+async def _client(client, traffic: Traffic, stop, samples, statuses, errors):
+    while not stop():
+        route, body = traffic.next()
+        t0 = time.perf_counter()
+        try:
+            resp = await client.post(ROUTES[route], json=body)
+            await resp.aread()
+            statuses[route][resp.status_code] += 1
+        except Exception as e:
+            statuses[route]["error"] += 1
+            errors[f"{type(e).__name__}: {e}"] += 1
+            continue
+        if resp.status_code < 400:
+            samples[route].append(time.perf_counter() - t0)
+
+
+async def drive(client, traffic: Traffic, concurrency: int, requests: int, duration: Optional[float]):
+    samples: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    errors: Counter = Counter()
+    started = time.perf_counter()
+
+    def stop() -> bool:
+        if duration is not None:
+            return time.perf_counter() - started >= duration
+        return traffic.issued >= requests
+
+    await asyncio.gather(*(_client(client, traffic, stop, samples, statuses, errors) for _ in range(concurrency)))
+    return time.perf_counter() - started, samples, statuses, errors
+
+
+def _configure_in_process(tmp: str):
+    # Must run before anything imports app.db (app.models does, via the ORM models)
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'load.db')}",
+        VECTOR_INDEX_DIR=os.path.join(tmp, "vector_index"),
+        LOG_SPILL_PATH=os.path.join(tmp, "log_spill.jsonl"),
+        STARTUP_WARMUP="blocking",
+    )
+
+
+def _prepare_in_process(args):
+    """
+    Seed the throwaway database and install a stub-encoder vector store, then
+    return the app.
+    """
+    from datetime import datetime, timezone
+
+    from app import main as api
+    from app.db import Base, SessionLocal, engine
+    from app.importer import upsert_products
+    from app.vector_store import ProductVectorStore
+    from .synthetic import HashingEncoder, make_products
+
+    Base.metadata.create_all(bind=engine)
+    products = make_products(args.products, seed=args.seed)
+    now = datetime.now(timezone.utc)
+    for start in range(0, len(products), 5000):
+        with engine.begin() as conn:
+            upsert_products(conn, products[start:start + 5000], now)
+
+    if args.model is None:
+        with SessionLocal() as db:
+            snapshot = api.catalogue_store.get(db)
+        store = ProductVectorStore(
+            list(snapshot.products),
+            model_name="stub",
+            model=HashingEncoder(call_overhead_ms=args.call_overhead_ms),
+            query_cache=api.query_embedding_cache,
+            index_dir=None,
+        )
+        store.catalogue_version = snapshot.version
+        api.vector_store = store  # warm-up finds it current and keeps it
+    return api.app
+
+
+async def run(args) -> Tuple[list, dict]:
+    import httpx
+
+    traffic = Traffic(parse_mix(args.mix), args.distinct, args.batch_size, args.seed)
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async def measure(client):
+        # Warm-up traffic (not recorded): first encodes, mapped pages, lazy imports
+        if args.warmup:
+            await drive(client, Traffic(parse_mix(args.mix), args.distinct, args.batch_size, args.seed + 1),
+                        args.concurrency, args.warmup, None)
+        elapsed, samples, statuses, errors = await drive(
+            client, traffic, args.concurrency, args.requests, args.duration
+        )
+        server = {}
+        try:
+            server = (await client.get("/admin/pipeline")).json().get("stages_seconds", {})
+        except Exception:
+            pass
+        return elapsed, samples, statuses, errors, server
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+            outcome = await measure(client)
+    else:
+        app = _prepare_in_process(args)
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=timeout) as client:
+                outcome = await measure(client)
+
+    elapsed, samples, statuses, errors, server = outcome
+    results = []
+    total_ok = 0
+    for route in sorted(statuses):
+        ok = len(samples[route])
+        total_ok += ok
+        stats = latency_stats(samples[route])
+        stats.pop("ops_per_s", None)  # one caller's rate; req_per_s is the route's throughput
+        results.append({
+            "name": "load",
+            "route": route,
+            "concurrency": args.concurrency,
+            **stats,
+            "req_per_s": round(ok / elapsed, 2),
+            "statuses": {str(k): v for k, v in statuses[route].items()},
+        })
+    results.append({
+        "name": "load_total",
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "ok": total_ok,
+        "failed": sum(n for c in statuses.values() for k, n in c.items() if k == "error" or k >= 400),
+        "req_per_s": round(total_ok / elapsed, 2),
+    })
+    meta = {
+        "benchmark": "load",
+        "target": args.url or "in-process",
+        "products": None if args.url else args.products,
+        "mix": args.mix,
+        "distinct": args.distinct,
+        "server_stages_seconds": server,
+        "errors": dict(errors.most_common(10)),
+    }
+    return results, meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="running API to load (default: in-process app)")
+    parser.add_argument("--products", type=int, default=10000, help="synthetic catalogue size (in-process)")
+    parser.add_argument("--requests", type=int, default=1000, help="requests to send (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run instead of --requests")
+    parser.add_argument("--warmup", type=int, default=50, help="unrecorded warm-up requests")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", default="recommend=8,batch=1,pdf=1")
+    parser.add_argument("--batch-size", type=int, default=20, help="requests per /recommend/batch call")
+    parser.add_argument("--distinct", type=int, default=0, help="reuse N payloads (0: every payload distinct)")
+    parser.add_argument("--call-overhead-ms", type=float, default=5.0, help="stub encoder cost per encode call")
+    parser.add_argument("--model", default=None, help="use the configured embedding backend instead of the stub")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="JSON result file ('-' prints it instead)")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.url is None:
+        tmp = tempfile.mkdtemp(prefix="load_test")
+        _configure_in_process(tmp)
+    try:
+        results, meta = asyncio.run(run(args))
+    finally:
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+    write_results(results, args.out, **meta)
+
+
+if __name__ == "__main__":
+    main()
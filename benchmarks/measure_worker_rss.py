@@ -0,0 +1,138 @@
+"""
+Per-worker memory of `uvicorn --workers N` with and without memory-mapped indexes.
+
+    python -m benchmarks.measure_worker_rss --products 20000 --workers 4
+
+Seeds a throwaway SQLite catalogue with synthetic products, runs the build step
+(`python -m app.vector_store build`) once, then starts the API twice — with
+VECTOR_INDEX_MMAP=0 and =1 — and reads /proc/<pid>/smaps_rollup of every worker once
+all of them report startup complete. RSS counts shared pages in every worker; PSS
+splits them between the processes mapping them, so total PSS is the real footprint.
+The embedding backend is whatever EMBEDDING_BACKEND / EMBEDDING_MODEL select. Linux only.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _seed(database_url: str, n_products: int):
+    code = (
+        "import sys\n"
+        "from app.db import Base, SessionLocal, engine\n"
+        "from app.orm_models import ProductORM\n"
+        "from benchmarks.synthetic import make_products\n"
+        "Base.metadata.create_all(bind=engine)\n"
+        "with SessionLocal() as db:\n"
+        "    db.bulk_save_objects([ProductORM(**p.dict()) for p in make_products(int(sys.argv[1]))])\n"
+        "    db.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", code, str(n_products)], check=True, env=_env(database_url))
+
+
+def _env(database_url: str, **extra) -> dict:
+    # Blocking warm-up so "startup complete" means the index is loaded
+    env = dict(os.environ, DATABASE_URL=database_url, STARTUP_WARMUP="blocking", **extra)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    return env
+
+
+def _workers(parent: int) -> list:
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/cmdline") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        if ppid == parent and "spawn_main" in cmdline:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def _smaps_rollup(pid: int) -> dict:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": fields.get("Rss", 0.0),
+        "pss_mb": fields.get("Pss", 0.0),
+        "private_mb": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+        "shared_mb": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+    }
+
+
+def measure(env: dict, workers: int, port: int, timeout: float) -> dict:
+    with tempfile.TemporaryFile("w+") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers)],
+            env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            deadline = time.time() + timeout
+            while True:
+                log.seek(0)
+                if log.read().count("Application startup complete") >= workers:
+                    break
+                if proc.poll() is not None or time.time() > deadline:
+                    log.seek(0)
+                    raise RuntimeError(f"API did not start:\n{log.read()[-2000:]}")
+                time.sleep(0.5)
+            time.sleep(1.0)
+            per_worker = [_smaps_rollup(pid) for pid in _workers(proc.pid)]
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    def mean(key):
+        return sum(w[key] for w in per_worker) / len(per_worker)
+
+    return {
+        "workers": len(per_worker),
+        "rss_mb_per_worker": mean("rss_mb"),
+        "pss_mb_per_worker": mean("pss_mb"),
+        "private_mb_per_worker": mean("private_mb"),
+        "shared_mb_per_worker": mean("shared_mb"),
+        "pss_mb_total": sum(w["pss_mb"] for w in per_worker),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'catalogue.db')}"
+        index_dir = os.path.join(tmp, "vector_index")
+        _seed(database_url, args.products)
+
+        t0 = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "app.vector_store", "build", "--index-dir", index_dir],
+            check=True, env=_env(database_url),
+        )
+        build_s = time.perf_counter() - t0
+
+        results = {"products": args.products, "build_s": build_s}
+        for mmap in ("0", "1"):
+            env = _env(database_url, VECTOR_INDEX_DIR=index_dir, VECTOR_INDEX_MMAP=mmap)
+            results[f"mmap={mmap}"] = measure(env, args.workers, args.port, args.timeout)
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
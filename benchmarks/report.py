@@ -0,0 +1,99 @@
+"""
+Timing helpers and JSON result files shared by the benchmark suite.
+
+Result files are `{"environment": {...}, "results": [{"name": ..., <params>, <metrics>}]}`;
+`python -m benchmarks.compare` diffs two of them by result name and parameters.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", *args], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() if out.returncode == 0 else None
+
+
+def environment() -> Dict[str, Any]:
+    """
+    What a result depends on besides the code: commit, interpreter, libraries, machine.
+    """
+    versions = {}
+    for module in ("numpy", "faiss", "sqlalchemy", "pydantic", "fastapi", "reportlab"):
+        mod = sys.modules.get(module)
+        if mod is None:
+            try:
+                mod = __import__(module)
+            except ImportError:
+                continue
+        versions[module] = getattr(mod, "__version__", None)
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": versions,
+    }
+
+
+def latency_stats(seconds: List[float]) -> Dict[str, float]:
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    if len(ms) == 0:
+        return {"calls": 0}
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "calls": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "ops_per_s": round(1000 / float(ms.mean()), 2) if ms.mean() > 0 else None,
+    }
+
+
+def measure(fn: Callable[[int], Any], min_time: float = 0.5, min_calls: int = 5, max_calls: int = 10000,
+            warmup: int = 1) -> Dict[str, float]:
+    """
+    Call `fn(i)` (i = call number, e.g. to rotate inputs) until `min_time` seconds and
+    `min_calls` calls are reached, timing each call.
+    """
+    for i in range(warmup):
+        fn(i)
+    times: List[float] = []
+    started = time.perf_counter()
+    i = 0
+    while i < max_calls and (i < min_calls or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - t0)
+        i += 1
+    return latency_stats(times)
+
+
+def write_results(results: List[Dict[str, Any]], path: Optional[str], **meta: Any):
+    """
+    Print one line per result, and write the full result file to `path` ("-" = stdout).
+    """
+    payload = {"environment": environment(), **meta, "results": results}
+    if path == "-":
+        print(json.dumps(payload, indent=2))
+        return
+    for row in results:
+        print("  ".join(f"{k}={v}" for k, v in row.items() if not isinstance(v, (dict, list))))
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(payload, f, indent=2)
+        print(f"wrote {path}")
@@ -0,0 +1,136 @@
+"""
+Synthetic catalogue / request generators shared by the benchmark scripts.
+"""
+import random
+from typing import List
+
+from app.models import Product, RecommendationRequest
+
+CONSTRUCTS = [
+    "cognitive_ability", "numerical_reasoning", "inductive_reasoning", "deductive_reasoning",
+    "verbal_reasoning", "behavioral_fit", "situational_judgement", "personality", "motivation",
+    "coding_skills", "language_proficiency", "leadership_potential",
+]
+CATEGORIES = ["A_ABILITY", "B_SJT", "P_PERSONALITY", "M_MOTIVATION", "K_KNOWLEDGE", "S_SIMULATION"]
+USE_CASES = ["selection", "development", "succession"]
+JOB_LEVELS = ["entry", "junior", "graduate", "professional", "manager", "executive"]
+JOB_FAMILIES = ["customer_service", "retail", "sales", "it", "analytics", "operations", "leadership"]
+LANGUAGES = ["en", "fr", "de", "es", "it", "nl", "pt", "ja", "zh"]
+TAGS = ["mobile_friendly", "unsupervised_ok", "high_volume", "broad_personality", "development_focus"]
+VOLUMES = ["low", "medium", "high"]
+WORDS = [
+    "customer", "service", "sales", "reasoning", "numerical", "verbal", "leadership", "team",
+    "java", "python", "call", "centre", "retail", "judgement", "personality", "motivation",
+    "graduate", "manager", "analytics", "operations", "safety", "communication", "problem",
+]
+
+
+def _sample(rng: random.Random, pool: List[str], lo: int, hi: int) -> List[str]:
+    return rng.sample(pool, rng.randint(lo, min(hi, len(pool))))
+
+
+def make_products(n: int, seed: int = 0) -> List[Product]:
+    rng = random.Random(seed)
+    products = []
+    for i in range(n):
+        constructs = _sample(rng, CONSTRUCTS, 1, 3)
+        products.append(
+            Product(
+                product_id=f"SYN_{i:06d}",
+                name=f"Synthetic {constructs[0].replace('_', ' ').title()} {i}",
+                description=" ".join(rng.choices(WORDS, k=12)),
+                category=rng.choice(CATEGORIES),
+                constructs=constructs,
+                use_cases=_sample(rng, USE_CASES, 1, 3),
+                job_levels=_sample(rng, JOB_LEVELS, 1, 4),
+                job_families=_sample(rng, JOB_FAMILIES, 1, 4),
+                max_duration_min=rng.choice([10, 15, 20, 25, 30, 36, 45, 60]),
+                languages=_sample(rng, LANGUAGES, 1, 4),
+                tags=_sample(rng, TAGS, 0, 2),
+            )
+        )
+    return products
+
+
+def make_requests(n: int, seed: int = 0) -> List[RecommendationRequest]:
+    rng = random.Random(seed)
+    requests = []
+    for i in range(n):
+        requests.append(
+            RecommendationRequest(
+                job_title=f"{rng.choice(WORDS).title()} {rng.choice(['Associate', 'Analyst', 'Lead'])}",
+                job_description=" ".join(rng.choices(WORDS, k=25)),
+                job_family=rng.choice(JOB_FAMILIES),
+                job_level=rng.choice(JOB_LEVELS),
+                use_case=rng.choice(USE_CASES),
+                volume=rng.choice(VOLUMES),
+                assessment_budget=rng.choice(VOLUMES),
+                max_total_duration_min=rng.choice([30, 45, 60, 90, 120]),
+                must_have_constructs=_sample(rng, CONSTRUCTS, 0, 2),
+                nice_to_have_constructs=_sample(rng, CONSTRUCTS, 0, 2),
+                languages=_sample(rng, LANGUAGES[:4], 1, 2),
+            )
+        )
+    return requests
+
+
+def make_semantic_scores(products: List[Product], seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    return {p.product_id: rng.uniform(-0.2, 0.9) for p in products}
+
+
+class HashingEncoder:
+    """
+    Offline stand-in for SentenceTransformer: hashed bag-of-words embeddings,
+    L2-normalised, with an optional fixed per-call cost to mimic a forward pass.
+    """
+
+    def __init__(self, dim: int = 384, call_overhead_ms: float = 0.0):
+        self.dim = dim
+        self.call_overhead_ms = call_overhead_ms
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True, **kwargs):
+        import time
+        import zlib
+        import numpy as np
+
+        if self.call_overhead_ms:
+            time.sleep(self.call_overhead_ms / 1000)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                h = zlib.crc32(token.encode("utf-8"))
+                out[row, h % self.dim] += 1.0 if h & 1 else -1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out /= np.where(norms == 0, 1.0, norms)
+        return out
+
+
+def main():
+    """
+    Write a synthetic catalogue as JSON Lines, e.g. to seed a running API for
+    `benchmarks.load_test --url` via `python -m app.importer` or POST /admin/import.
+
+        python -m benchmarks.synthetic --products 100000 --out data/synthetic_100k.jsonl
+    """
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Write a synthetic product catalogue (JSON Lines).")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        for p in make_products(args.products, seed=args.seed):
+            f.write(json.dumps(p.dict()) + "\n")
+    print(f"wrote {args.products} products to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
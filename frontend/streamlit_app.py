@@ -1,3 +1,4 @@
+import datetime
 import io
 import streamlit as st
 import requests
@@ -20,6 +21,38 @@ def extract_text_from_file(uploaded_file) -> str:
     return ""
 
 
+PRODUCT_FIELDS = [
+    "product_id", "name", "description", "category", "constructs", "use_cases",
+    "job_levels", "job_families", "max_duration_min", "languages", "tags",
+]
+DEFAULT_PRODUCT_FIELDS = ["product_id", "name", "category", "constructs", "max_duration_min", "languages"]
+
+
+def split_csv(value: str) -> list:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def fetch_products(params: dict):
+    """
+    One /admin/products page, revalidated with its ETag: an unchanged catalogue
+    answers 304 and the page cached in the session is reused.
+    """
+    params = {k: v for k, v in params.items() if v}
+    cache = st.session_state.setdefault("product_pages", {})
+    key = repr(sorted(params.items()))
+    cached = cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    r = requests.get(f"{API_BASE}/admin/products", params=params, headers=headers)
+    if r.status_code == 304 and cached:
+        return cached[1]
+    if r.status_code != 200:
+        return None
+    data = r.json()
+    if r.headers.get("ETag"):
+        cache[key] = (r.headers["ETag"], data)
+    return data
+
+
 def main():
     st.set_page_config(page_title="SHL Assessment Recommender", layout="wide")
 
@@ -143,13 +176,60 @@ def main():
 
     with tab_admin:
         st.header("Admin – Products (read-only demo)")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            categories = st.text_input("Categories (comma-separated)", value="")
+        with col2:
+            constructs = st.text_input("Constructs (comma-separated)", value="")
+        with col3:
+            product_languages = st.multiselect(
+                "Languages", options=["en", "fr", "de", "es"], default=[], key="product_languages"
+            )
+        with col4:
+            job_families = st.multiselect(
+                "Job Families",
+                options=["customer_service", "retail", "sales", "it", "analytics", "operations", "leadership"],
+                default=[],
+            )
+        fields = st.multiselect("Fields", options=PRODUCT_FIELDS, default=DEFAULT_PRODUCT_FIELDS)
+        limit = st.selectbox("Page size", options=[10, 25, 50, 100], index=1)
+
+        params = {
+            "category": split_csv(categories),
+            "construct": split_csv(constructs),
+            "language": product_languages,
+            "job_family": job_families,
+            "fields": ",".join(fields) if fields else None,
+            "limit": limit,
+        }
+        query_key = repr(sorted(params.items()))
+        if st.session_state.get("product_query") != query_key:
+            # New filters: back to the first page
+            st.session_state["product_query"] = query_key
+            st.session_state["product_cursors"] = [None]
+            st.session_state["product_pages"] = {}
+        cursors = st.session_state["product_cursors"]
+
         try:
-            r = requests.get(f"{API_BASE}/admin/products")
-            if r.status_code == 200:
-                products = r.json()
-                for p in products:
-                    with st.expander(f"{p['name']} ({p['product_id']})"):
+            page = fetch_products(dict(params, cursor=cursors[-1]))
+            if page is not None:
+                st.write(f"{page['total']} matching products, page {len(cursors)}")
+                for p in page["items"]:
+                    title = p.get("name", p.get("product_id", ""))
+                    if "product_id" in p and "name" in p:
+                        title = f"{p['name']} ({p['product_id']})"
+                    with st.expander(title):
                         st.json(p)
+                prev_col, next_col = st.columns(2)
+                with prev_col:
+                    st.button("Previous", disabled=len(cursors) == 1, on_click=cursors.pop)
+                with next_col:
+                    st.button(
+                        "Next",
+                        disabled=page["next_cursor"] is None,
+                        on_click=cursors.append,
+                        args=(page["next_cursor"],),
+                    )
             else:
                 st.error("Failed to load products")
         except Exception as e:
@@ -157,13 +237,38 @@ def main():
 
     with tab_analytics:
         st.header("Analytics")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            start_date = st.date_input("From", value=datetime.date.today() - datetime.timedelta(days=30))
+        with col2:
+            end_date = st.date_input("To (inclusive)", value=datetime.date.today())
+        with col3:
+            interval = st.selectbox("Interval", options=["day", "hour"], index=0)
         try:
-            r = requests.get(f"{API_BASE}/admin/analytics")
+            params = {
+                "start": start_date.isoformat(),
+                "end": (end_date + datetime.timedelta(days=1)).isoformat(),
+                "interval": interval,
+            }
+            r = requests.get(f"{API_BASE}/admin/analytics", params=params)
             if r.status_code == 200:
                 data = r.json()
                 st.write(f"Total recommendation requests: **{data['total_requests']}**")
-                st.write("By Job Family:")
-                st.json(data["by_job_family"])
+                if data["series"]:
+                    st.line_chart({p["bucket"]: p["count"] for p in data["series"]})
+                cols = st.columns(3)
+                for i, (key, label) in enumerate([
+                    ("by_job_family", "By Job Family"),
+                    ("by_job_level", "By Job Level"),
+                    ("by_use_case", "By Use Case"),
+                    ("by_volume", "By Volume"),
+                    ("by_product", "By Product"),
+                ]):
+                    with cols[i % 3]:
+                        st.write(f"{label}:")
+                        st.json(data[key])
+            elif r.status_code == 400:
+                st.error(r.json()["detail"])
             else:
                 st.error("Failed to load analytics")
         except Exception as e:
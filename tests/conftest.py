@@ -0,0 +1,6 @@
+import os
+import sys
+
+# app.db builds its engine at import time; the tests need no database server
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
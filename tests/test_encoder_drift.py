@@ -0,0 +1,33 @@
+"""
+The ONNX embedding backends must stay within MAX_DRIFT (1 - cosine) of the
+sentence-transformers reference. A backend is skipped only when it cannot be
+loaded here (model not downloaded, no ONNX export, onnxruntime missing).
+"""
+import numpy as np
+import pytest
+
+from app.encoders import load_encoder
+from benchmarks.bench_encoders import MAX_DRIFT, sample_texts
+
+TEXTS = sample_texts(128)
+
+
+def _encode(backend: str) -> np.ndarray:
+    try:
+        encoder = load_encoder(backend)
+    except (ImportError, OSError, RuntimeError) as e:
+        pytest.skip(f"{backend} backend unavailable: {e}")
+    return encoder.encode(TEXTS)
+
+
+@pytest.fixture(scope="module")
+def reference() -> np.ndarray:
+    return _encode("sentence-transformers")
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_backend_drift_within_threshold(backend, reference):
+    embeddings = _encode(backend)
+    drift = 1 - (embeddings * reference).sum(axis=1)
+    assert embeddings.shape == reference.shape
+    assert float(drift.max()) <= MAX_DRIFT, f"{backend}: max drift {drift.max():.5f} > {MAX_DRIFT}"
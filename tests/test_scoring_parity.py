@@ -0,0 +1,38 @@
+"""
+The vectorized scoring (scoring.score_blueprint) must rank exactly like the
+per-product reference loop (recommender.rank_candidates), with the same scores.
+"""
+import numpy as np
+import pytest
+
+from app.recommender import build_blueprint, candidate_score, rank_candidates
+from app.scoring import CatalogueFeatures, score_blueprint
+from benchmarks.synthetic import make_products, make_requests, make_semantic_scores
+
+
+@pytest.mark.parametrize("size", [100, 1000])
+def test_vectorized_scoring_matches_loop(size):
+    products = make_products(size, seed=size)
+    semantic_scores = make_semantic_scores(products, seed=size)
+    features = CatalogueFeatures(products)
+    semantic = features.semantic_vector(semantic_scores)
+
+    for req in make_requests(25, seed=size):
+        constructs = [element["construct"] for element in build_blueprint(req)]
+        scored = score_blueprint(features, constructs, req, semantic)
+        for row, construct in enumerate(constructs):
+            candidates = [
+                p for p in products
+                if construct in p.constructs and any(lang in p.languages for lang in req.languages)
+            ]
+            expected = rank_candidates(candidates, construct, req, semantic_scores)
+            ranked = scored.top_k(row)
+
+            assert [features.product_ids[i] for i in ranked] == [p.product_id for p in expected]
+            np.testing.assert_allclose(
+                scored.scores[row, ranked],
+                [candidate_score(p, construct, req, semantic_scores) for p in expected],
+                rtol=0, atol=1e-9,
+            )
+            for k in (1, 5):
+                assert list(scored.top_k(row, k)) == list(ranked[:k])